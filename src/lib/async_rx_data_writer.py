@@ -0,0 +1,136 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Asynchronous RX Data Writer
+"""
+# Description:
+#   Write the RX recorded data and meta-data to files by background writer workers.
+#   The acquisition loop hands off each filled record buffer to a bounded queue and continues
+#   with the next record. The writer workers take ownership of the buffer until it is written,
+#   then the optional "on_done" callback is called to release the buffer.
+#   If the queue is full, the hand off blocks until a worker is free (backpressure).
+#   All pending records are written when the writer is flushed or closed.
+#
+import queue
+import threading
+import time
+
+# To print colours
+from termcolor import colored
+
+
+# Define asynchronous writer
+class AsyncRxDataWriter:
+    """Asynchronous RX data writer class"""
+
+    def __init__(self, write_function, num_workers=1, queue_size=4):
+        if num_workers < 1:
+            raise Exception("ERROR: Number of writer workers should be at least one", num_workers)
+        if queue_size < 1:
+            raise Exception("ERROR: Writer queue size should be at least one", queue_size)
+        self.write_function = write_function
+        self.write_queue = queue.Queue(maxsize=queue_size)
+        self.stats_lock = threading.Lock()
+        self.errors = []
+        # per-record stats in ms
+        self.handoff_latency_ms = []
+        self.write_latency_ms = []
+        self.total_latency_ms = []
+        self.workers = [
+            threading.Thread(target=self.run_worker, name=f"rx_data_writer_{idx}", daemon=True)
+            for idx in range(num_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+        self.is_closed = False
+
+    # Hand off a record to the writer workers, blocks if the queue is full
+    def submit(self, *args, on_done=None, **kwargs):
+        if self.is_closed:
+            raise Exception("ERROR: Writer is already closed")
+        submit_time = time.perf_counter()
+        self.write_queue.put((args, kwargs, on_done, submit_time))
+        handoff_latency_ms = (time.perf_counter() - submit_time) * 1000
+        with self.stats_lock:
+            self.handoff_latency_ms.append(handoff_latency_ms)
+        return handoff_latency_ms
+
+    def run_worker(self):
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                self.write_queue.task_done()
+                break
+            args, kwargs, on_done, submit_time = item
+            start_time = time.perf_counter()
+            try:
+                self.write_function(*args, **kwargs)
+            except Exception as error:
+                with self.stats_lock:
+                    self.errors.append(error)
+            finally:
+                end_time = time.perf_counter()
+                with self.stats_lock:
+                    self.write_latency_ms.append((end_time - start_time) * 1000)
+                    self.total_latency_ms.append((end_time - submit_time) * 1000)
+                # release record buffer
+                if on_done is not None:
+                    on_done()
+                self.write_queue.task_done()
+
+    # Wait until all pending records are written
+    def flush(self):
+        self.write_queue.join()
+        with self.stats_lock:
+            errors = self.errors
+            self.errors = []
+        if errors:
+            raise Exception("ERROR: Writing RX recorded data failed", errors)
+
+    # Flush and stop the writer workers
+    def close(self):
+        if self.is_closed:
+            return
+        self.is_closed = True
+        try:
+            self.flush()
+        finally:
+            for _ in self.workers:
+                self.write_queue.put(None)
+            for worker in self.workers:
+                worker.join()
+
+    def get_stats(self):
+        def summarize(values):
+            if not values:
+                return {"mean_ms": 0.0, "max_ms": 0.0}
+            return {"mean_ms": sum(values) / len(values), "max_ms": max(values)}
+
+        with self.stats_lock:
+            return {
+                "num_records": len(self.write_latency_ms),
+                "handoff": summarize(self.handoff_latency_ms),
+                "write": summarize(self.write_latency_ms),
+                "total": summarize(self.total_latency_ms),
+            }
+
+    def print_stats(self):
+        stats = self.get_stats()
+        print("Written records: ", colored(stats["num_records"], "green"))
+        for name in ["handoff", "write", "total"]:
+            print(
+                f"Record {name} latency: mean",
+                colored(round(stats[name]["mean_ms"], 3), "yellow"),
+                "ms, max",
+                colored(round(stats[name]["max_ms"], 3), "yellow"),
+                "ms",
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
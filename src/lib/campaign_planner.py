@@ -0,0 +1,151 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Campaign Planner
+"""
+# Description:
+#   Run a campaign of several RF data recording configs. Each config is a sub-campaign with its own variations.
+#   The planner partitions the configs by the devices they use (USRPs and mmWave units):
+#       -   configs that share a device are in the same device group and run one after the other
+#       -   device groups without common devices run in parallel, each in its own worker process
+#           with its own UHD sessions
+#   The reports of all configs (number of variations, RX data size, elapsed time) are merged into one
+#   campaign report.
+#
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# To print colours
+from termcolor import colored
+
+from lib import rf_data_recording_config_interface
+
+# Device args that identify a USRP
+DEVICE_ID_KEYS = ["IPaddress", "addr", "serial", "resource", "name"]
+# Config sections of mmWave units, identified by serial number
+MMWAVE_DEVICE_SECTIONS = ["mmwave_antenna_array_parameters", "mmwave_up_down_converter_parameters"]
+
+
+# Get IDs of all devices used by the given config
+def get_device_ids(rf_data_acq_config):
+    device_ids = set()
+    devices_config = (rf_data_acq_config.get("transmitters_config") or []) + (
+        rf_data_acq_config.get("receivers_config") or []
+    )
+    for device_config in devices_config:
+        for key in DEVICE_ID_KEYS:
+            if key in device_config:
+                device_ids.add(f"{key.replace('IPaddress', 'addr')}={device_config[key]}")
+        for section in MMWAVE_DEVICE_SECTIONS:
+            if section in device_config:
+                serial_numbers = device_config[section]["serial_number"]["Values"]
+                if not isinstance(serial_numbers, list):
+                    serial_numbers = [serial_numbers]
+                for serial_number in serial_numbers:
+                    device_ids.add(f"mmwave_serial={serial_number}")
+    return device_ids
+
+
+# Partition configs into device groups, two configs that share a device are in the same group
+# configs_device_ids: list of device IDs of each config
+# Return list of config indexes of each device group, the config order is kept in each group
+def plan_device_groups(configs_device_ids):
+    groups = []
+    for config_idx, device_ids in enumerate(configs_device_ids):
+        group = {"configs": [config_idx], "device_ids": set(device_ids)}
+        # merge all groups that share a device with this config
+        for other_group in [other for other in groups if other["device_ids"] & group["device_ids"]]:
+            groups.remove(other_group)
+            group["configs"] = other_group["configs"] + group["configs"]
+            group["device_ids"] |= other_group["device_ids"]
+        groups.append(group)
+    # keep the config order in each group, groups are ordered by their first config
+    return sorted((sorted(group["configs"]) for group in groups), key=lambda configs: configs[0])
+
+
+# Run the configs of one device group one after the other
+def run_config_group(run_config, config_files):
+    return [run_config(config_file) for config_file in config_files]
+
+
+# Run the campaign and get the campaign report
+# run_config: function that runs one config and returns its report, it should be picklable for worker processes
+# max_workers: max number of worker processes, 0: one worker per device group, 1: run in this process
+def run_campaign(config_files, run_config, max_workers=0):
+    configs_device_ids = []
+    for config_file in config_files:
+        rf_data_acq_config, _ = rf_data_recording_config_interface.read_config_files(config_file)
+        configs_device_ids.append(get_device_ids(rf_data_acq_config))
+    # the same config file can be given several times, it is repeated in its device group
+    device_groups = [
+        [config_files[config_idx] for config_idx in config_group]
+        for config_group in plan_device_groups(configs_device_ids)
+    ]
+    num_workers = len(device_groups) if max_workers == 0 else min(max_workers, len(device_groups))
+    print("Campaign device groups: ", device_groups)
+
+    start_time = time.time()
+    if num_workers <= 1:
+        group_reports = [run_config_group(run_config, config_group) for config_group in device_groups]
+    else:
+        print("Run device groups in parallel, number of worker processes: ", num_workers)
+        # UHD sessions should not be inherited by worker processes, so workers are spawned
+        with ProcessPoolExecutor(
+            max_workers=num_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            futures = [
+                executor.submit(run_config_group, run_config, config_group) for config_group in device_groups
+            ]
+            group_reports = [future.result() for future in futures]
+    elapsed_time_s = time.time() - start_time
+
+    config_reports = [report for reports in group_reports for report in reports]
+    return {
+        "device_groups": device_groups,
+        "num_workers": max(num_workers, 1),
+        "config_reports": config_reports,
+        "num_variations": sum(report["num_variations"] for report in config_reports),
+        "rx_data_nbytes": sum(report["rx_data_nbytes"] for report in config_reports),
+        "elapsed_time_s": elapsed_time_s,
+        "configs_elapsed_time_s": sum(report["elapsed_time_s"] for report in config_reports),
+    }
+
+
+def print_campaign_report(campaign_report):
+    print("")
+    print("Campaign report:")
+    for report in campaign_report["config_reports"]:
+        print(
+            "Config: ",
+            os.path.basename(report["config_file"]),
+            ", variations: ",
+            report["num_variations"],
+            ", RX data: ",
+            round(report["rx_data_nbytes"] / 1e6, 3),
+            "MByte, elapsed time: ",
+            round(report["elapsed_time_s"], 3),
+            "s",
+        )
+    print(
+        "Total: device groups: ",
+        len(campaign_report["device_groups"]),
+        ", worker processes: ",
+        campaign_report["num_workers"],
+        ", variations: ",
+        campaign_report["num_variations"],
+        ", RX data: ",
+        colored(round(campaign_report["rx_data_nbytes"] / 1e6, 3), "yellow"),
+        "MByte",
+    )
+    print(
+        "Campaign elapsed time: ",
+        colored(round(campaign_report["elapsed_time_s"], 3), "yellow"),
+        "s, sum of config elapsed times: ",
+        round(campaign_report["configs_elapsed_time_s"], 3),
+        "s",
+    )
@@ -0,0 +1,127 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Device Worker Pool
+"""
+# Description:
+#   Run the TX and RX tasks of each variation on long-lived device workers instead of new threads.
+#   There is one worker thread per USRP, identified by its device key. The mmWave unit attached to a USRP
+#   is configured by the TX or RX task of this USRP, so it is served by the same worker.
+#   Each worker takes its tasks from a queue, one after the other, and reports the completion of each task
+#   by a future. The USRP sessions and buffers of the session pool stay with the same worker thread
+#   across all variations. The workers are stopped when the pool is shut down.
+#   The tasks of one variation wait for each other (variation sync), so they should run on different devices:
+#   two tasks of the same device would be queued on one worker and block each other.
+#
+import queue
+import threading
+import traceback
+from concurrent.futures import Future, wait
+
+# To print colours
+from termcolor import colored
+
+from lib.usrp_session_pool import get_device_key
+
+
+# Define long-lived worker of one device
+class DeviceWorker:
+    """Device worker class"""
+
+    def __init__(self, device_key):
+        self.device_key = device_key
+        self.task_queue = queue.Queue()
+        self.num_tasks = 0
+        self.thread = threading.Thread(
+            target=self.run_worker, name=f"device_worker_{device_key}", daemon=True
+        )
+        self.thread.start()
+
+    # Queue a task and get its future
+    def submit(self, target, *args, **kwargs):
+        future = Future()
+        self.task_queue.put((future, target, args, kwargs))
+        return future
+
+    def run_worker(self):
+        while True:
+            item = self.task_queue.get()
+            if item is None:
+                break
+            future, target, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(target(*args, **kwargs))
+            except BaseException as error:
+                # print it like an exception of a thread, the other devices of the variation continue
+                print(colored(f"ERROR: Task of device {self.device_key} failed", "red"))
+                traceback.print_exc()
+                future.set_exception(error)
+            finally:
+                self.num_tasks += 1
+
+    def stop(self):
+        self.task_queue.put(None)
+        self.thread.join()
+
+
+# Define pool of device workers
+class DeviceWorkerPool:
+    """Device worker pool class"""
+
+    def __init__(self):
+        self.workers = {}
+        self.lock = threading.Lock()
+
+    # Get the worker of the device with given args, the worker is started on first use
+    def get_worker(self, device_args):
+        device_key = get_device_key(device_args)
+        with self.lock:
+            worker = self.workers.get(device_key)
+            if worker is None:
+                worker = DeviceWorker(device_key)
+                self.workers[device_key] = worker
+            return worker
+
+    # Run the task on the worker of the given device and get its future
+    def submit(self, device_args, target, *args, **kwargs):
+        return self.get_worker(device_args).submit(target, *args, **kwargs)
+
+    # Check that the tasks of one variation run on different devices
+    @staticmethod
+    def check_variation_devices(devices_args):
+        device_keys = [get_device_key(device_args) for device_args in devices_args]
+        for device_key in device_keys:
+            if device_keys.count(device_key) > 1:
+                raise Exception(
+                    "ERROR: Several TX or RX stations of one variation use the same device", device_key
+                )
+
+    # Wait until all given tasks are done, return the errors of the failed tasks
+    @staticmethod
+    def wait_for_tasks(futures):
+        wait(futures)
+        return [future.exception() for future in futures if future.exception() is not None]
+
+    # Wait until all given tasks are done, raise an error if any task failed
+    @staticmethod
+    def wait_for_tasks_or_raise(futures):
+        errors = DeviceWorkerPool.wait_for_tasks(futures)
+        if errors:
+            raise Exception("ERROR: Device tasks of the variation failed", errors) from errors[0]
+
+    def get_stats(self):
+        with self.lock:
+            return {worker.device_key: worker.num_tasks for worker in self.workers.values()}
+
+    # Stop all device workers, the pending tasks are done before
+    def shutdown(self):
+        with self.lock:
+            workers = list(self.workers.values())
+            self.workers = {}
+        for worker in workers:
+            worker.stop()
@@ -0,0 +1,177 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Energy Trigger
+"""
+# Description:
+#   Energy-triggered capture: only records that contain signal are written. The power of each record is
+#   averaged over a sliding window (mean over all channels) and compared to the noise floor:
+#       -   a signal burst is detected where the window power is above the noise floor plus the threshold
+#       -   the record is trimmed to the samples from the first to the last burst, with pre- and post-trigger
+#           margins, a record without burst is dropped
+#   The noise floor is given in dBFS or calibrated ("auto") on the records of the variation: the low percentile
+#   of the window power of each record is a noise estimate, and the lowest estimate is kept.
+#   The detector is vectorized over the whole record, the sliding window is a cumulative sum.
+#   The statistics of each burst (peak and mean power, SNR) are written to the SigMF annotations.
+#
+import numpy as np
+
+# To print colours
+from termcolor import colored
+
+# Percentile of the window power of a record used as noise estimate
+NOISE_FLOOR_PERCENTILE = 10
+
+
+# Get power of each sample in full scale, mean over all channels
+def get_sample_power(rx_data, scale_factor=1.0):
+    if rx_data.dtype.fields is not None:
+        # complex int16 samples
+        real = rx_data["re"].astype(np.float32)
+        imag = rx_data["im"].astype(np.float32)
+        sample_power = (real * real + imag * imag) * np.float32(scale_factor * scale_factor)
+    else:
+        sample_power = rx_data.real * rx_data.real + rx_data.imag * rx_data.imag
+    if sample_power.ndim > 1:
+        sample_power = sample_power.mean(axis=0)
+    return sample_power
+
+
+# Get mean power of each window of the given number of samples, window i covers samples [i, i + window_num_samps)
+def get_window_power(sample_power, window_num_samps):
+    window_num_samps = min(window_num_samps, len(sample_power))
+    cumulative_power = np.concatenate(([0.0], np.cumsum(sample_power, dtype=np.float64)))
+    return (cumulative_power[window_num_samps:] - cumulative_power[:-window_num_samps]) / window_num_samps
+
+
+def power_to_db(power):
+    return float(10 * np.log10(max(power, 1e-30)))
+
+
+# Define energy trigger
+class EnergyTrigger:
+    """Energy trigger class"""
+
+    def __init__(
+        self,
+        threshold_db=10.0,
+        window_num_samps=256,
+        pre_trigger_num_samps=1000,
+        post_trigger_num_samps=1000,
+        noise_floor_dbfs="auto",
+        scale_factor=1.0,
+    ):
+        if window_num_samps < 1:
+            raise Exception("ERROR: Window size of energy trigger should be positive", window_num_samps)
+        if pre_trigger_num_samps < 0 or post_trigger_num_samps < 0:
+            raise Exception(
+                "ERROR: Trigger margins should not be negative", pre_trigger_num_samps, post_trigger_num_samps
+            )
+        self.threshold_db = threshold_db
+        self.window_num_samps = window_num_samps
+        self.pre_trigger_num_samps = pre_trigger_num_samps
+        self.post_trigger_num_samps = post_trigger_num_samps
+        self.is_noise_floor_calibrated = noise_floor_dbfs == "auto"
+        self.noise_floor_power = None if self.is_noise_floor_calibrated else 10 ** (float(noise_floor_dbfs) / 10)
+        self.scale_factor = scale_factor
+        self.num_records = 0
+        self.num_triggered_records = 0
+        self.num_samps = 0
+        self.num_kept_samps = 0
+
+    def get_noise_floor_dbfs(self):
+        return None if self.noise_floor_power is None else power_to_db(self.noise_floor_power)
+
+    # Detect signal bursts in the given record
+    # Return list of bursts with sample start, sample count and power statistics
+    def detect(self, rx_data):
+        window_power = get_window_power(get_sample_power(rx_data, self.scale_factor), self.window_num_samps)
+        if self.is_noise_floor_calibrated:
+            noise_estimate = np.percentile(window_power, NOISE_FLOOR_PERCENTILE)
+            if self.noise_floor_power is None or noise_estimate < self.noise_floor_power:
+                self.noise_floor_power = max(noise_estimate, 1e-30)
+        is_above = window_power > self.noise_floor_power * 10 ** (self.threshold_db / 10)
+
+        # start and stop window index of each run of windows above the threshold
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], is_above.view(np.int8), [0]))))
+        window_num_samps = rx_data.shape[-1] - len(window_power) + 1
+        bursts = []
+        for start, stop in zip(edges[0::2], edges[1::2]):
+            burst_power = window_power[start:stop]
+            bursts.append(
+                {
+                    "sample_start": int(start),
+                    # the last window above the threshold ends window_num_samps after its start
+                    "sample_count": int(stop - start + window_num_samps - 1),
+                    "peak_power_dbfs": power_to_db(burst_power.max()),
+                    "mean_power_dbfs": power_to_db(burst_power.mean()),
+                    "snr_db": power_to_db(burst_power.mean() / self.noise_floor_power),
+                }
+            )
+        return bursts
+
+    # Apply the trigger to the given record
+    # Return the trimmed record and its record info with the trigger annotations
+    # The record is None if no signal is detected, so it is dropped
+    def apply(self, rx_data, record_info):
+        num_samps = rx_data.shape[-1]
+        self.num_records += 1
+        self.num_samps += num_samps
+        if num_samps == 0:
+            return None, record_info
+        bursts = self.detect(rx_data)
+        if not bursts:
+            return None, record_info
+        sample_start = max(bursts[0]["sample_start"] - self.pre_trigger_num_samps, 0)
+        sample_stop = min(
+            bursts[-1]["sample_start"] + bursts[-1]["sample_count"] + self.post_trigger_num_samps, num_samps
+        )
+        self.num_triggered_records += 1
+        self.num_kept_samps += sample_stop - sample_start
+
+        record_info = dict(record_info)
+        # offset of the first written sample in the received record
+        record_info["trigger_sample_offset"] = sample_start
+        record_info["trigger_noise_floor_dbfs"] = self.get_noise_floor_dbfs()
+        record_info["trigger_threshold_db"] = self.threshold_db
+        # annotations of the bursts, the sample start is given in the trimmed record
+        record_info["trigger_annotations"] = [
+            {
+                "sample_start": burst["sample_start"] - sample_start,
+                "sample_count": burst["sample_count"],
+                "metadata": {
+                    "core:label": "energy_trigger",
+                    "peak_power_dbfs": burst["peak_power_dbfs"],
+                    "mean_power_dbfs": burst["mean_power_dbfs"],
+                    "snr_db": burst["snr_db"],
+                },
+            }
+            for burst in bursts
+        ]
+        return rx_data[..., sample_start:sample_stop], record_info
+
+    def get_stats(self):
+        return {
+            "num_records": self.num_records,
+            "num_triggered_records": self.num_triggered_records,
+            "num_samps": self.num_samps,
+            "num_kept_samps": self.num_kept_samps,
+            "noise_floor_dbfs": self.get_noise_floor_dbfs(),
+        }
+
+    def print_stats(self):
+        stats = self.get_stats()
+        print(
+            "Energy trigger: triggered records: ",
+            colored(stats["num_triggered_records"], "yellow"),
+            "of",
+            stats["num_records"],
+            ", kept samples: ",
+            colored(round(100 * stats["num_kept_samps"] / max(stats["num_samps"], 1), 2), "yellow"),
+            "%, noise floor: ",
+            None if stats["noise_floor_dbfs"] is None else round(stats["noise_floor_dbfs"], 2),
+            "dBFS",
+        )
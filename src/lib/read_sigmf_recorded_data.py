@@ -0,0 +1,152 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Read recorded data interface - SigMF format
+"""
+# Description:
+#   Read the RX records from the recorded files in SigMF format.
+#   It supports both RX data file layouts:
+#       -   per_record: one record per data file
+#       -   per_variation: all records of a variation in one data file, one capture segment per record
+#   A record is read by index without parsing or scanning the data file, its offset is given by the
+#   sample start of its capture segment. A short record of the per_variation layout has its number of valid
+#   samples in its capture, only these samples are read.
+#   Records of complex int16 data (ci16_le, RX sample format sc16) are converted to complex64 on load by the
+#   scale factor given in the metadata, so they have the same values as records of complex float data.
+#   Compressed data files (.sigmf-cdata) are read by the chunk offset index of each record, a sample range
+#   is read by decompressing only the chunks it covers.
+#
+import os
+import json
+import numpy as np
+from lib.rx_data_compression import read_compressed_bytes, COMPRESSED_DATA_FILE_EXTENSION
+from lib.rx_sample_format import SC16_DTYPE, SC16_SCALE_FACTOR, SAMPLE_SCALE_FACTOR_KEY, sc16_to_complex64
+
+# Map of SigMF data types to numpy data types
+SIGMF_DATATYPE_MAP = {
+    "cf32_le": np.complex64,
+    "ci16_le": SC16_DTYPE,
+}
+
+
+# Define SigMF record reader
+class SigMFRecordReader:
+    """SigMF record reader class"""
+
+    def __init__(self, meta_file_path):
+        if not meta_file_path.endswith(".sigmf-meta"):
+            meta_file_path = meta_file_path + ".sigmf-meta"
+        with open(meta_file_path, "r") as meta_file:
+            self.metadata = json.load(meta_file)
+        self.data_file_path = os.path.splitext(meta_file_path)[0] + ".sigmf-data"
+
+        global_info = self.metadata["global"]
+        datatype = global_info["core:datatype"]
+        if datatype not in SIGMF_DATATYPE_MAP:
+            raise Exception("ERROR: SigMF data type is not supported", datatype)
+        self.dtype = np.dtype(SIGMF_DATATYPE_MAP[datatype])
+        self.scale_factor = global_info.get(SAMPLE_SCALE_FACTOR_KEY, SC16_SCALE_FACTOR)
+        self.num_channels = global_info.get("core:num_channels", 1)
+        self.captures = self.metadata["captures"]
+
+        # Sample start of each record, the last entry is the end of the data file
+        sample_nbytes = self.dtype.itemsize * self.num_channels
+        self.compression_info = global_info.get("compression")
+        if self.compression_info is not None:
+            self.data_file_path = os.path.splitext(self.data_file_path)[0] + COMPRESSED_DATA_FILE_EXTENSION
+            num_samps = self.captures[-1]["core:sample_start"] + self.captures[-1]["raw_nbytes"] // sample_nbytes
+        else:
+            num_samps = os.path.getsize(self.data_file_path) // sample_nbytes
+        self.record_sample_starts = [
+            capture["core:sample_start"] for capture in self.captures
+        ] + [num_samps]
+        # Records of the per_variation layout have a fixed region size, a dropped record leaves a gap in the captures
+        self.record_region_num_samps = global_info.get("record_num_samps")
+
+    def get_num_records(self):
+        return len(self.captures)
+
+    def get_global_info(self):
+        return self.metadata["global"]
+
+    def get_capture_info(self, idx):
+        return self.captures[idx]
+
+    def get_annotations(self):
+        return self.metadata["annotations"]
+
+    # Get number of samples of the record region in the data file
+    def get_record_region_num_samps(self, idx):
+        if self.record_region_num_samps is not None:
+            return self.record_region_num_samps
+        return self.record_sample_starts[idx + 1] - self.record_sample_starts[idx]
+
+    # Get number of valid samples of the record
+    def get_record_num_samps(self, idx):
+        return self.captures[idx].get("valid_num_samps", self.get_record_region_num_samps(idx))
+
+    # Get number of samples between two channels of the record
+    # Compressed records are stored without the unused samples of a short record
+    def get_channel_stride(self, idx):
+        if self.compression_info is not None:
+            return self.get_record_num_samps(idx)
+        return self.get_record_region_num_samps(idx)
+
+    # Read one record, the data is returned as array of shape (channels, samples)
+    # Integer samples are converted to complex64 unless the raw data is requested
+    def read_record(self, idx, raw=False):
+        if idx < 0:
+            idx += self.get_num_records()
+        if idx < 0 or idx >= self.get_num_records():
+            raise Exception("ERROR: Record index is out of range", idx)
+        if self.compression_info is not None:
+            return self.read_samples(idx, 0, self.get_record_num_samps(idx), raw)
+        sample_start = self.record_sample_starts[idx]
+        region_num_samps = self.get_record_region_num_samps(idx)
+        rx_data = np.fromfile(
+            self.data_file_path,
+            dtype=self.dtype,
+            count=region_num_samps * self.num_channels,
+            offset=sample_start * self.num_channels * self.dtype.itemsize,
+        )
+        rx_data = rx_data.reshape(self.num_channels, region_num_samps)[:, : self.get_record_num_samps(idx)]
+        if self.dtype == SC16_DTYPE and not raw:
+            rx_data = sc16_to_complex64(rx_data, self.scale_factor)
+        return rx_data
+
+    # Read the given sample range of one record, the data is returned as array of shape (channels, samples)
+    # The samples of each channel are stored one after the other in the record, so each channel is read separately
+    def read_samples(self, idx, sample_start, num_samps, raw=False):
+        if idx < 0:
+            idx += self.get_num_records()
+        if idx < 0 or idx >= self.get_num_records():
+            raise Exception("ERROR: Record index is out of range", idx)
+        record_num_samps = self.get_record_num_samps(idx)
+        if sample_start < 0 or num_samps < 0 or sample_start + num_samps > record_num_samps:
+            raise Exception("ERROR: Sample range is out of record", sample_start, num_samps)
+        channel_stride = self.get_channel_stride(idx)
+        rx_data = np.empty((self.num_channels, num_samps), dtype=self.dtype)
+        with open(self.data_file_path, "rb") as data_file:
+            for chan in range(self.num_channels):
+                byte_start = (chan * channel_stride + sample_start) * self.dtype.itemsize
+                nbytes = num_samps * self.dtype.itemsize
+                if self.compression_info is not None:
+                    chan_data = read_compressed_bytes(
+                        data_file,
+                        self.compression_info["codec"],
+                        self.compression_info["chunk_nbytes"],
+                        self.captures[idx]["chunk_offsets"],
+                        byte_start,
+                        nbytes,
+                    )
+                else:
+                    record_offset = self.record_sample_starts[idx] * self.num_channels * self.dtype.itemsize
+                    data_file.seek(record_offset + byte_start)
+                    chan_data = data_file.read(nbytes)
+                rx_data[chan] = np.frombuffer(chan_data, dtype=self.dtype)
+        if self.dtype == SC16_DTYPE and not raw:
+            rx_data = sc16_to_complex64(rx_data, self.scale_factor)
+        return rx_data
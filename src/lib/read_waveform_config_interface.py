@@ -31,116 +31,126 @@ import xml.etree.cElementTree as ET
 
 # import related functions
 from lib import rf_data_recording_api_def
-from lib import read_waveform_data_interface
+from lib.waveform_cache import waveform_cache
+from lib.waveform_config_index import waveform_config_index
 from lib import data_format_conversion_lib
+from lib.wireless_link_parameter_map import get_wireless_link_parameter_map
+
+# Default wireless link parameter map in config folder
+DEFAULT_WIRELESS_LINK_PARAMETER_MAP = "wireless_link_parameter_map.yaml"
+
+
+# Get path of wireless link parameter map file in config folder
+def get_wireless_link_parameter_map_path(wireless_link_parameter_map_file):
+    dir_path = os.path.dirname(__file__)
+    src_path = os.path.split(dir_path)[0]
+    return os.path.join(src_path, "config", wireless_link_parameter_map_file)
+
+
+# Read wireless link parameter map from yaml file
+# The map is loaded once and compiled, it is loaded again only if the file is changed
+def read_wireless_link_parameter_map(wireless_link_parameter_map_file):
+    return get_wireless_link_parameter_map(
+        get_wireless_link_parameter_map_path(wireless_link_parameter_map_file)
+    )
+
 
 # Get 5G NR Waveform parameters from RFmx RFWS config
-def get_nr_waveform_parameters_from_rfws_format(waveform_path, waveform_file_name):
-    # Note: The wireless_link_parameter_map is not used to get parameters from RFWS waveform config file
+# rfws_elements: text of each RFWS element read from the RFWS file, see extract_rfws_elements
+def get_nr_waveform_parameters_from_rfws_format(waveform_path, waveform_file_name, rfws_elements):
+    # Note: The wireless_link_parameter_map gives only the RFWS elements to read from RFWS waveform config file
     # Due to the dependency between parameters; it requires hierarchical parameter extraction.
 
     # Preallocate target dict for waveform config
     waveform_config_src = {}
 
-    # The tdms waveform config file is saved with the same name of waveform but it has .rfws extension
-    waveform_file_path = os.path.join(waveform_path, waveform_file_name + ".rfws")
-
-    ## Load Waveform Config from rfws file
-    xmlDoc = ET.parse(waveform_file_path)
-    root = xmlDoc.getroot()
-    # XPath expression searching all elements recursively starting from root './/*'
-    # that have an attribute 'name' with the value ei.e. 'Bandwidth (Hz)'
-    # returns a list, either iterate over the list or select list element zero [0] if you expect only one hit
-    # more sophisticated expressions are possible
-
     # get standard
-    factory = root.findall(".//*[@name='factory']")
-    standard = factory[0].text
+    standard = rfws_elements["factory"][0]
     # waveform_config_src["factory"] = "standard"
     waveform_config_src["standard"] = "5gnr"
 
     # get frequency range
-    freqRanges = root.findall(".//*[@name='Frequency Range']")
-    FR = freqRanges[0].text
+    freqRanges = rfws_elements["Frequency Range"]
+    FR = freqRanges[0]
     waveform_config_src["Frequency Range"] = FR
 
     # get bandwidth
-    bwElements = root.findall(".//*[@name='Bandwidth (Hz)']")
-    bw = bwElements[0].text
+    bwElements = rfws_elements["Bandwidth (Hz)"]
+    bw = bwElements[0]
     waveform_config_src[
         "Bandwidth (Hz)"
     ] = data_format_conversion_lib.si_unit_string_converstion_to_float(bw)
 
     # get link direction
-    link_directions = root.findall(".//*[@name='Link Direction']")
-    link_direction = link_directions[0].text
+    link_directions = rfws_elements["Link Direction"]
+    link_direction = link_directions[0]
     waveform_config_src["Link Direction"] = link_direction
 
     # get cell id
-    cell_id = root.findall(".//*[@name='Cell ID']")
-    cell_id_str = cell_id[0].text  #
+    cell_id = rfws_elements["Cell ID"]
+    cell_id_str = cell_id[0]  #
     waveform_config_src["Cell ID"] = cell_id_str
 
     # get number of frames
-    n_frames = root.findall(".//*[@name='Number of Frames']")
-    n_frames = n_frames[0].text
+    n_frames = rfws_elements["Number of Frames"]
+    n_frames = n_frames[0]
     waveform_config_src["Number of Frames"] = n_frames
 
     # get subcarrier spacing
-    scs = root.findall(".//*[@name='Subcarrier Spacing (Hz)']")
-    scs = scs[0].text
+    scs = rfws_elements["Subcarrier Spacing (Hz)"]
+    scs = scs[0]
     waveform_config_src[
         "Subcarrier Spacing (Hz)"
     ] = data_format_conversion_lib.si_unit_string_converstion_to_float(scs)
 
     # get Cyclic prefix mode
-    cp_mode = root.findall(".//*[@name='Cyclic Prefix Mode']")
-    cp_mode_str = cp_mode[0].text  #
+    cp_mode = rfws_elements["Cyclic Prefix Mode"]
+    cp_mode_str = cp_mode[0]  #
     waveform_config_src["Cyclic Prefix Mode"] = cp_mode_str
 
     # get CC index
-    # cc_index = root.findall(".//*[@name='CarrierCCIndex']")
-    # cc_index = cc_index[0].text
+    # cc_index = rfws_elements["CarrierCCIndex"]
+    # cc_index = cc_index[0]
     # waveform_config_src["carrier_CC_index"] = cc_index
 
     # get ssb info
-    ssb_config_set = root.findall(".//*[@name='Configuration Set']")
-    ssb_config_set = ssb_config_set[0].text
+    ssb_config_set = rfws_elements["Configuration Set"]
+    ssb_config_set = ssb_config_set[0]
     waveform_config_src["Configuration Set"] = ssb_config_set
 
     # get ssb info
-    ssb_scs = root.findall(".//*[@name='Subcarrier Spacing Common']")
-    ssb_scs_str = ssb_scs[0].text
+    ssb_scs = rfws_elements["Subcarrier Spacing Common"]
+    ssb_scs_str = ssb_scs[0]
     waveform_config_src[
         "Subcarrier Spacing Common"
     ] = data_format_conversion_lib.si_unit_string_converstion_to_float(ssb_scs_str)
 
     # get ssb periodicity
-    ssb_periodicity = root.findall(".//*[@name='Periodicity']")
-    ssb_periodicity = ssb_periodicity[0].text
+    ssb_periodicity = rfws_elements["Periodicity"]
+    ssb_periodicity = ssb_periodicity[0]
     waveform_config_src[
         "Periodicity"
     ] = data_format_conversion_lib.si_unit_string_converstion_to_float(ssb_periodicity)
 
     if waveform_config_src["Link Direction"] == "Downlink":
         # check if test model is enabled
-        dl_ch_config_modes = root.findall(".//*[@name='DL Ch Configuration Mode']")
-        dl_ch_config_mode = dl_ch_config_modes[0].text
+        dl_ch_config_modes = rfws_elements["DL Ch Configuration Mode"]
+        dl_ch_config_mode = dl_ch_config_modes[0]
         if dl_ch_config_mode == "Test Model":
             # get DL test model
-            dl_test_models = root.findall(".//*[@name='DL Test Model']")
-            dl_test_model = dl_test_models[0].text
+            dl_test_models = rfws_elements["DL Test Model"]
+            dl_test_model = dl_test_models[0]
             waveform_config_src["Test Model"] = dl_test_model
 
             # get modulation type
-            mod = root.findall(".//*[@name='DL Test Model Modulation Type']")
+            mod = rfws_elements["DL Test Model Modulation Type"]
             # for PDSCH, select first catch, for PUSCH select second catch
-            mod = mod[0].text
+            mod = mod[0]
             waveform_config_src["DL Modulation Type"] = mod
 
             # get frame structure - duplexing scheme
-            dl_duplex = root.findall(".//*[@name='DL Test Model Duplex Scheme']")
-            dl_duplex = dl_duplex[0].text
+            dl_duplex = rfws_elements["DL Test Model Duplex Scheme"]
+            dl_duplex = dl_duplex[0]
             waveform_config_src["Duplex Scheme"] = dl_duplex
 
         elif dl_ch_config_mode == "User Defined":
@@ -148,9 +158,9 @@ def get_nr_waveform_parameters_from_rfws_format(waveform_path, waveform_file_nam
             waveform_config_src["Test Model"] = dl_ch_config_mode
 
             # get modulation type
-            mod = root.findall(".//*[@name='Modulation Type']")
+            mod = rfws_elements["Modulation Type"]
             # for PDSCH, select first catch, for PUSCH select second catch
-            mod = mod[0].text
+            mod = mod[0]
             waveform_config_src["DL Modulation Type"] = mod
 
             # get frame structure - duplexing scheme
@@ -161,9 +171,9 @@ def get_nr_waveform_parameters_from_rfws_format(waveform_path, waveform_file_nam
         waveform_config_src["Test Model"] = "user_defined"
 
         # get modulation type
-        mod = root.findall(".//*[@name='Modulation Type']")
+        mod = rfws_elements["Modulation Type"]
         # for PDSCH, select first catch, for PUSCH select second catch
-        mod = mod[1].text
+        mod = mod[1]
         waveform_config_src["UL Modulation Type"] = mod
 
         # get frame structure - duplexing scheme
@@ -174,18 +184,19 @@ def get_nr_waveform_parameters_from_rfws_format(waveform_path, waveform_file_nam
             waveform_config_src["link_direction"],
         )
 
-    # get rate
-    tx_data_complex, waveform_IQ_rate = read_waveform_data_interface.read_waveform_data_tdms(
-        waveform_path, waveform_file_name
+    # get rate, the waveform is read once and kept in the waveform cache for the transmitter
+    tx_data_complex, waveform_properties = waveform_cache.get_waveform(
+        waveform_path, waveform_file_name, "tdms"
     )
-    waveform_config_src["sample_rate_hz"] = waveform_IQ_rate
+    waveform_config_src["sample_rate_hz"] = waveform_properties["waveform_IQ_rate"]
 
     return waveform_config_src
 
 
 # Get LTE Waveform parameters from RFmx RFWS config
-def get_lte_waveform_parameters_from_rfws_format(waveform_path, waveform_file_name):
-    # Note: The wireless_link_parameter_map is not used to get parameters from RFWS waveform config file
+# rfws_elements: text of each RFWS element read from the RFWS file, see extract_rfws_elements
+def get_lte_waveform_parameters_from_rfws_format(waveform_path, waveform_file_name, rfws_elements):
+    # Note: The wireless_link_parameter_map gives only the RFWS elements to read from RFWS waveform config file
     # Due to the dependency between parameters; it requires hierarchical parameter extraction.
 
     # Preallocate target dict for waveform config
@@ -196,20 +207,8 @@ def get_lte_waveform_parameters_from_rfws_format(waveform_path, waveform_file_na
         req_key = key[y + 3 :]
         return req_key
 
-    # The tdms waveform config file is saved with the same name of waveform but it has .rfws extension
-    waveform_file_path = os.path.join(waveform_path, waveform_file_name + ".rfws")
-
-    ## Load Waveform Config from rfws file
-    xmlDoc = ET.parse(waveform_file_path)
-    root = xmlDoc.getroot()
-    # XPath expression searching all elements recursively starting from root './/*'
-    # that have an attribute 'name' with the value i.e. 'Bandwidth (Hz)'
-    # returns a list, either iterate over the list or select list element zero [0] if you expect only one hit
-    # more sophisticated expressions are possible
-
     ## get standard
-    factory = root.findall(".//*[@name='factory']")
-    standard = factory[0].text
+    standard = rfws_elements["factory"][0]
     # waveform_config_src["factory"] = "standard"
     waveform_config_src["standard"] = "lte"
 
@@ -220,8 +219,8 @@ def get_lte_waveform_parameters_from_rfws_format(waveform_path, waveform_file_na
     waveform_config_src["factory"] = result.group(1)
 
     # get bandwidth
-    bwElements = root.findall(".//*[@name='Bandwidth']")
-    bw_str = bwElements[0].text
+    bwElements = rfws_elements["Bandwidth"]
+    bw_str = bwElements[0]
     # the output likes this: "afGenLte_bw10MHz"
     bw = get_lte_parameter_config(bw_str, "bw")
     bw_wo_unit = bw[:-2]
@@ -230,39 +229,39 @@ def get_lte_waveform_parameters_from_rfws_format(waveform_path, waveform_file_na
     ] = data_format_conversion_lib.si_unit_string_converstion_to_float(bw_wo_unit)
 
     # get link direction
-    link_directions = root.findall(".//*[@name='LinkDirection']")
-    link_direction_str = link_directions[0].text  #
+    link_directions = rfws_elements["LinkDirection"]
+    link_direction_str = link_directions[0]  #
     link_direction = get_lte_parameter_config(link_direction_str, "ld")
     waveform_config_src["LinkDirection"] = link_direction
 
     # get cell id
-    cell_id = root.findall(".//*[@name='CellID']")
-    cell_id_str = cell_id[0].text  #
+    cell_id = rfws_elements["CellID"]
+    cell_id_str = cell_id[0]  #
     waveform_config_src["CellID"] = cell_id_str
 
     # get Cyclic prefix mode
-    cp_mode = root.findall(".//*[@name='CyclicPrefixType']")
-    cp_mode_str = cp_mode[0].text  #
+    cp_mode = rfws_elements["CyclicPrefixType"]
+    cp_mode_str = cp_mode[0]  #
     waveform_config_src["CyclicPrefixType"] = cp_mode_str
 
     # get test model
-    test_models = root.findall(".//*[@name='TestModel']")
-    test_model_str = test_models[0].text
+    test_models = rfws_elements["TestModel"]
+    test_model_str = test_models[0]
     test_model = get_lte_parameter_config(test_model_str, "tm")
     waveform_config_src["TestModel"] = test_model
 
     if waveform_config_src["LinkDirection"] == "Downlink":
         # get modulation type
-        mod = root.findall(".//*[@name='PDSCHCodeWord1ModulationType']")
+        mod = rfws_elements["PDSCHCodeWord1ModulationType"]
         # Select the first hit, since every subframe has own modulation config
-        mod = mod[0].text
+        mod = mod[0]
         waveform_config_src["PDSCHCodeWord1ModulationType"] = get_lte_parameter_config(mod, "mt")
 
     elif waveform_config_src["LinkDirection"] == "Uplink":
         # get modulation type
-        mod = root.findall(".//*[@name='User Defined Modulation Type']")
+        mod = rfws_elements["User Defined Modulation Type"]
         # Select the first hit, since every subframe has own modulation config
-        mod = mod[0].text
+        mod = mod[0]
         waveform_config_src["User Defined Modulation Type"] = get_lte_parameter_config(mod, "mt")
     else:
         raise Exception(
@@ -273,45 +272,93 @@ def get_lte_waveform_parameters_from_rfws_format(waveform_path, waveform_file_na
     # get subcarrier spacing
     waveform_config_src["subcarrier_spacing"] = 15000.0
 
-    # get rate
-    tx_data_complex, waveform_IQ_rate = read_waveform_data_interface.read_waveform_data_tdms(
-        waveform_path, waveform_file_name
+    # get rate, the waveform is read once and kept in the waveform cache for the transmitter
+    tx_data_complex, waveform_properties = waveform_cache.get_waveform(
+        waveform_path, waveform_file_name, "tdms"
     )
-    waveform_config_src["sample_rate"] = waveform_IQ_rate
+    waveform_config_src["sample_rate"] = waveform_properties["waveform_IQ_rate"]
 
     return waveform_config_src
 
 
+## Extract RFWS elements from RFWS file in a single pass
+# rfws_generators: waveform generators with RFWS config file, given in wireless link parameter map
+# The waveform generator is selected by the "factory" element, then its RFWS elements are collected
+# until the given number of occurrences of each element is found, the rest of the file is not read
+# Return the key of the waveform generator and the list of texts of each RFWS element in document order
+def extract_rfws_elements(waveform_file_path, rfws_generators):
+    generator_key = None
+    element_counts = {}
+    rfws_elements = {}
+    num_remaining = 0
+    # named elements before the factory element, the elements to read are not known yet
+    pending_elements = []
+
+    def add_element(name, text):
+        nonlocal num_remaining
+        if name in element_counts and len(rfws_elements[name]) < element_counts[name]:
+            rfws_elements[name].append(text)
+            num_remaining -= 1
+
+    for _, element in ET.iterparse(waveform_file_path, events=("end",)):
+        name = element.get("name")
+        text = element.text
+        # the element is read, free its content
+        element.clear()
+        if name is None:
+            continue
+        if generator_key is not None:
+            add_element(name, text)
+            if num_remaining == 0:
+                break
+        elif name == "factory":
+            generator_key = next(
+                (key for key, generator in rfws_generators.items() if generator["rfws_factory"] in text),
+                None,
+            )
+            if generator_key is None:
+                raise Exception("ERROR: Unknown or not supported standard", text)
+            element_counts = rfws_generators[generator_key]["rfws_elements"]
+            rfws_elements = {element_name: [] for element_name in element_counts}
+            rfws_elements["factory"] = [text]
+            num_remaining = sum(element_counts.values())
+            for pending_name, pending_text in pending_elements:
+                add_element(pending_name, pending_text)
+            if num_remaining == 0:
+                break
+        else:
+            pending_elements.append((name, text))
+
+    if generator_key is None:
+        raise Exception("ERROR: No factory is given in Waveform Config file", waveform_file_path)
+    return generator_key, rfws_elements
+
+
 ## Read tdms waveform data config from rfws file
-def read_tdms_waveform_config(waveform_path, waveform_file_name):
+def read_tdms_waveform_config(
+    waveform_path, waveform_file_name, wireless_link_parameter_map_file=DEFAULT_WIRELESS_LINK_PARAMETER_MAP
+):
 
     # The tdms waveform config file is saved with the same name of waveform but it has .rfws extension
     waveform_file_path = os.path.join(waveform_path, waveform_file_name + ".rfws")
 
     # check if file exists
-    if exists(waveform_file_path):
-        ## Load Waveform Config from rfws file
-        xmlDoc = ET.parse(waveform_file_path)
-        root = xmlDoc.getroot()
-        # Get standard
-        factory = root.findall(".//*[@name='factory']")
-        standard = factory[0].text
-
-        # XPath expressiion searching all elements recursively starting from root './/*'
-        # that have an attribute 'name' with the value e.i. 'Bandwidth (Hz)'
-        # returns a list, either iterate over the list or select list element zero [0] if you expect only one hit
-        # more sophisticated expressions are possible
-    else:
+    if not exists(waveform_file_path):
         raise Exception("ERROR: Waveform Config file is not exist", waveform_file_path)
 
+    # The RFWS elements to read of each waveform generator are given in wireless link parameter map
+    rfws_generators = read_wireless_link_parameter_map(wireless_link_parameter_map_file).get_rfws_generators()
+    generator_key, rfws_elements = extract_rfws_elements(waveform_file_path, rfws_generators)
+
     # Get parameters based on standard
-    if "NR" in standard:
+    standard = rfws_generators[generator_key]["standard"]
+    if standard == "5gnr":
         waveform_config_src = get_nr_waveform_parameters_from_rfws_format(
-            waveform_path, waveform_file_name
+            waveform_path, waveform_file_name, rfws_elements
         )
-    elif "LTE" in standard:
+    elif standard == "lte":
         waveform_config_src = get_lte_waveform_parameters_from_rfws_format(
-            waveform_path, waveform_file_name
+            waveform_path, waveform_file_name, rfws_elements
         )
     else:
         raise Exception("ERROR: Unknown or not supported standard", standard)
@@ -377,61 +424,28 @@ def map_metadata_to_sigmf_format(
     The used parameters and the mapping pairs are specified in a separate YAML file
     that must be provided as well.
     """
-    # read waveform parameter map from yaml file
-    dir_path = os.path.dirname(__file__)
-    src_path = os.path.split(dir_path)[0]
-    with open(os.path.join(src_path, "config", wireless_link_parameter_map_file), "r") as file:
-        wireless_link_parameter_map_dic = yaml.load(file, Loader=yaml.Loader)
-
-    # check if standard key is given
-    if wireless_link_parameter_map_dic["waveform_generator"][waveform_generator] is None:
-        raise Exception(
-            f"Invalid standard key: Name should be corrected or added to wireless_link_parameter_map.yaml, given: ",
-            waveform_generator,
-        )
+    # read compiled waveform parameter map
+    wireless_link_parameter_map = read_wireless_link_parameter_map(wireless_link_parameter_map_file)
 
     #  get standard and name of generator
-    standard_key = wireless_link_parameter_map_dic["waveform_generator"][waveform_generator]
-
-    # get parameters map based on standard key
-    if standard_key["standard"] == "802.11":
-        waveform_parameter_map_dic = wireless_link_parameter_map_dic["transmitter"]["wifi"]
-    else:
-        waveform_parameter_map_dic = wireless_link_parameter_map_dic["transmitter"][
-            standard_key["standard"]
-        ]
+    standard_key = wireless_link_parameter_map.get_standard_key(waveform_generator)
 
     # pre-allocate target dict
     waveform_config = {}
 
-    for parameter_pair in waveform_parameter_map_dic:
-        # check if key for chosen simulator even exists
-        if waveform_generator + "_parameter" in parameter_pair.keys():
-            # only continue with mapping from file if direct equivalent exists
-            if parameter_pair[waveform_generator + "_parameter"]["name"]:
-                # It is not necessary to get all parameters from wireless_link_parameter_map.yaml in waveform_config_src
-                # since some parameters related to DL or UL only
-                if (
-                    parameter_pair[waveform_generator + "_parameter"]["name"]
-                    in waveform_config_src.keys()
-                ):
-                    # extract value from waveform config source
-                    value = waveform_config_src[
-                        parameter_pair[waveform_generator + "_parameter"]["name"]
-                    ]
-                    # additional mapping if parameter values should come from a discrete set of values
-                    if "value_map" in parameter_pair[waveform_generator + "_parameter"].keys():
-                        value = parameter_pair[waveform_generator + "_parameter"]["value_map"][
-                            value
-                        ]
-                    # write to target dictionary for SigMF
-                    waveform_config[parameter_pair["sigmf_parameter_name"]] = value
-            else:
-                raise Exception(
-                    f"Incomplete specification in field '{waveform_generator}_parameter'!"
-                )
-        # else:  # fill_non_explicit_fields
-        #     waveform_config[parameter_pair["sigmf_parameter_name"]] = "none"
+    # It is not necessary to get all parameters from wireless_link_parameter_map.yaml in waveform_config_src
+    # since some parameters related to DL or UL only
+    for src_parameter_name, sigmf_parameter_name, value_map in wireless_link_parameter_map.get_parameter_pairs(
+        waveform_generator
+    ):
+        if src_parameter_name in waveform_config_src:
+            # extract value from waveform config source
+            value = waveform_config_src[src_parameter_name]
+            # additional mapping if parameter values should come from a discrete set of values
+            if value_map is not None:
+                value = value_map[value]
+            # write to target dictionary for SigMF
+            waveform_config[sigmf_parameter_name] = value
     if not waveform_config:
         raise Exception(
             """ERROR: Check waveform config: waveform_generator, waveform_file_name, waveform_path, waveform_path_type, waveform_format")
@@ -471,6 +485,31 @@ def map_metadata_to_sigmf_format(
     return waveform_config
 
 
+# read waveform config from waveform config file (RFWS, YAML or CSV) based on waveform format
+# The wireless link parameter map gives the RFWS elements to read from RFWS file
+def read_waveform_config_file(
+    waveform_path,
+    waveform_file_name,
+    waveform_format,
+    wireless_link_parameter_map_file=DEFAULT_WIRELESS_LINK_PARAMETER_MAP,
+):
+    if waveform_format == "tdms":
+        waveform_config_src = read_tdms_waveform_config(
+            waveform_path,
+            waveform_file_name,
+            wireless_link_parameter_map_file,
+        )
+    elif waveform_format in ["matlab", "matlab_ieee"]:
+        waveform_config_src = read_matlab_waveform_config(
+            waveform_path,
+            waveform_file_name,
+            waveform_format,
+        )
+    else:
+        raise Exception(f"Error: Waveform format is not supported: ", waveform_format)
+    return waveform_config_src
+
+
 # read tx waveform config
 def read_tx_waveform_config(tx_data_recording_api_config, wireless_link_parameter_map):
 
@@ -481,18 +520,17 @@ def read_tx_waveform_config(tx_data_recording_api_config, wireless_link_paramete
     waveform_generator = tx_data_recording_api_config.waveform_generator
 
     if waveform_format in ["tdms", "matlab", "matlab_ieee"]:
-        if waveform_format == "tdms":
-            waveform_config_src = read_tdms_waveform_config(
-                waveform_path,
-                waveform_file_name,
-            )
-        elif waveform_format in ["matlab", "matlab_ieee"]:
-
-            waveform_config_src = read_matlab_waveform_config(
-                waveform_path,
-                waveform_file_name,
-                waveform_format,
-            )
+        # The waveform config file is parsed only once, then it is taken from the waveform config index
+        # The RFWS elements are given in wireless link parameter map, so a changed map invalidates the index entry
+        waveform_config_src = waveform_config_index.get_waveform_config(
+            waveform_path,
+            waveform_file_name,
+            waveform_format,
+            lambda waveform_path, waveform_file_name, waveform_format: read_waveform_config_file(
+                waveform_path, waveform_file_name, waveform_format, wireless_link_parameter_map
+            ),
+            dependency_files=[get_wireless_link_parameter_map_path(wireless_link_parameter_map)],
+        )
         tx_data_recording_api_config.waveform_config = map_metadata_to_sigmf_format(
             waveform_config_src, wireless_link_parameter_map, waveform_generator
         )
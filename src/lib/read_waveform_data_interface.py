@@ -13,6 +13,7 @@ Read Waveform Data in TDMS/MATLAB format
 #
 import os
 from pathlib import Path
+import numpy as np
 
 # to read tdms file
 from nptdms import TdmsFile
@@ -53,8 +54,9 @@ def read_waveform_data_tdms(waveform_path, waveform_file_name):
 
         waveform_IQ_rate = channel.properties["NI_RF_IQRate"]
 
-        tx_data_float = channel[:]
-        tx_data_complex = tx_data_float[::2] + 1j * tx_data_float[1::2]
+        # The IQ samples are interleaved, view them as complex samples without building a new array per I and Q
+        tx_data_float = np.ascontiguousarray(channel[:], dtype=np.float32)
+        tx_data_complex = tx_data_float.view(np.complex64)
     else:
         raise Exception("ERROR: Waveform Config file is not exist", path_to_file)
 
@@ -83,3 +85,32 @@ def read_waveform_data_matlab(waveform_path, waveform_file_name):
     tx_data_complex = data.flatten()
 
     return tx_data_complex
+
+
+## Get path of the waveform data file, used to check if the waveform file is changed
+def get_waveform_data_file_path(waveform_path, waveform_file_name, waveform_format):
+    if waveform_format == "tdms":
+        return os.path.join(waveform_path, waveform_file_name + ".tdms")
+    elif waveform_format == "matlab_ieee":
+        return os.path.join(waveform_path, waveform_file_name, "sbb_str.mat")
+    elif waveform_format == "matlab":
+        return os.path.join(waveform_path, waveform_file_name + ".mat")
+    else:
+        raise Exception("ERROR: Unknown or not supported tx waveform format.")
+
+
+## Read waveform data based on waveform format
+# Return the waveform data as complex64 and the waveform properties given in waveform file
+def read_waveform_data(waveform_path, waveform_file_name, waveform_format):
+    waveform_properties = {}
+    if waveform_format == "tdms":
+        tx_data_complex, waveform_IQ_rate = read_waveform_data_tdms(waveform_path, waveform_file_name)
+        waveform_properties["waveform_IQ_rate"] = waveform_IQ_rate
+    elif waveform_format == "matlab_ieee":
+        tx_data_complex = read_waveform_data_matlab_ieee(waveform_path, waveform_file_name)
+    elif waveform_format == "matlab":
+        tx_data_complex = read_waveform_data_matlab(waveform_path, waveform_file_name)
+    else:
+        raise Exception("ERROR: Unknown or not supported tx waveform format.")
+
+    return np.ascontiguousarray(tx_data_complex, dtype=np.complex64).reshape(-1), waveform_properties
@@ -0,0 +1,128 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Replay Memory Allocator
+"""
+# Description:
+#   Manage the on-board memory (DRAM) of the RFNoC replay block, so several waveforms can be stored on
+#   the device at the same time. Each waveform is stored once at a word-aligned address and identified by
+#   its content hash. Every variation plays the buffer of the waveform it needs, so a waveform is uploaded
+#   only once per device as long as it is not evicted.
+#   If the memory is full, the least recently used waveforms that are not played are evicted.
+#
+import threading
+from collections import OrderedDict
+
+
+# Define replay memory allocator
+class ReplayMemoryAllocator:
+    """Replay memory allocator class"""
+
+    def __init__(self, mem_size, word_size, base_addr=0):
+        self.mem_size = mem_size
+        self.word_size = word_size
+        self.base_addr = base_addr
+        # allocated buffers ordered from least to most recently used: content hash -> buffer info
+        self.buffers = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def align(self, nbytes):
+        return -(-nbytes // self.word_size) * self.word_size
+
+    # Find the lowest free address where the given size fits, None if there is no free space
+    def find_free_addr(self, nbytes):
+        addr = self.base_addr
+        for buffer_info in sorted(self.buffers.values(), key=lambda info: info["addr"]):
+            if buffer_info["addr"] - addr >= nbytes:
+                return addr
+            addr = max(addr, buffer_info["addr"] + buffer_info["reserved_size"])
+        if self.base_addr + self.mem_size - addr >= nbytes:
+            return addr
+        return None
+
+    # Get replay buffer of the waveform with given content hash and size in bytes
+    # Return the buffer address and whether the waveform is already loaded to this buffer
+    # The buffer is in use until it is released, buffers in use are not evicted
+    def allocate(self, content_hash, nbytes):
+        reserved_size = self.align(nbytes)
+        with self.lock:
+            # The same content hash means the same waveform data, so the same size
+            buffer_info = self.buffers.get(content_hash)
+            if buffer_info is not None:
+                self.buffers.move_to_end(content_hash)
+                buffer_info["num_users"] += 1
+                if buffer_info["is_loaded"]:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                return buffer_info["addr"], buffer_info["is_loaded"]
+            if reserved_size > self.mem_size:
+                raise Exception(
+                    "ERROR: Waveform size is larger than the replay memory",
+                    nbytes,
+                    self.mem_size,
+                )
+            addr = self.find_free_addr(reserved_size)
+            while addr is None:
+                # evict the least recently used buffer that is not in use
+                evicted_hash = next(
+                    (key for key, info in self.buffers.items() if info["num_users"] == 0), None
+                )
+                if evicted_hash is None:
+                    raise Exception("ERROR: Replay memory is full, all buffers are in use")
+                del self.buffers[evicted_hash]
+                self.evictions += 1
+                addr = self.find_free_addr(reserved_size)
+
+            self.buffers[content_hash] = {
+                "addr": addr,
+                "size": nbytes,
+                "reserved_size": reserved_size,
+                "is_loaded": False,
+                "num_users": 1,
+            }
+            self.misses += 1
+            return addr, False
+
+    # Get replay buffer of the waveform and upload the waveform only if it is not loaded to this buffer already
+    # The upload function gets the buffer address, the buffer is released if the upload fails
+    # Return the buffer address and whether the upload is skipped
+    def load(self, content_hash, nbytes, upload_function):
+        addr, is_loaded = self.allocate(content_hash, nbytes)
+        if not is_loaded:
+            try:
+                upload_function(addr)
+            except BaseException:
+                self.release(content_hash)
+                raise
+            self.set_loaded(content_hash)
+        return addr, is_loaded
+
+    # Mark the waveform as loaded after it is uploaded to its buffer
+    def set_loaded(self, content_hash):
+        with self.lock:
+            self.buffers[content_hash]["is_loaded"] = True
+
+    # Release the buffer after the waveform playback is stopped
+    def release(self, content_hash):
+        with self.lock:
+            buffer_info = self.buffers.get(content_hash)
+            if buffer_info is not None and buffer_info["num_users"] > 0:
+                buffer_info["num_users"] -= 1
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "num_buffers": len(self.buffers),
+                "allocated_nbytes": sum(info["reserved_size"] for info in self.buffers.values()),
+                "mem_size": self.mem_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
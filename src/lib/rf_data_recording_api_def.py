@@ -18,8 +18,6 @@ import signal
 
 # from timeit import default_timer as timer
 from pathlib import Path
-import pandas as pd
-import uhd
 import math
 import lib.run_rf_replay_data_transmitter
 
@@ -28,18 +26,17 @@ import lib.run_rf_replay_data_transmitter
 from re import X
 import xml.etree.cElementTree as ET
 
-import time
-
-# importing the threading module
-import threading
-
 # import related functions
 from lib import run_rf_replay_data_transmitter
 from lib import run_rf_data_recorder
 from lib import sync_settings
+from lib.timed_start import TimedStart
 from lib import rf_data_recording_config_interface
 from lib.run_mmWave_device import get_device_type, get_device_name
 from lib.data_format_conversion_lib import str2bool, str2list
+from lib.usrp_session_pool import UsrpSessionPool
+from lib.device_worker_pool import DeviceWorkerPool
+from lib.waveform_cache import waveform_cache
 
 
 class RFDataRecorderAPI:
@@ -54,6 +51,22 @@ class RFDataRecorderAPI:
         # Store them in the class
         self.variations_map = variations_map
 
+        # USRP sessions are opened once and reused across all variations
+        self.usrp_session_pool = UsrpSessionPool()
+        # TX and RX tasks of all variations run on one long-lived worker per device
+        self.device_worker_pool = DeviceWorkerPool()
+
+        # TX waveforms are read once and shared by all variations
+        general_config = variations_map.general_config.iloc[0]
+        waveform_cache.set_max_nbytes(
+            int(float(general_config.get("waveform_cache_size_mb", 1024)) * 1024 * 1024)
+        )
+
+    # Close all opened USRP sessions, called at the end of API execution
+    def close_sessions(self):
+        self.device_worker_pool.shutdown()
+        self.usrp_session_pool.close_all()
+
     # Modulation schemes: lookup table as a constant dictionary:
     modulation_schemes = {"1": "BPSK", "2": "QPSK", "4": "16QAM", "6": "64QAM", "8": "256QAM"}
     RFmode = ["Tx", "Rx"]
@@ -235,6 +248,8 @@ class RFDataRecorderAPI:
             self.clock_reference = iteration_config[rx_id + "_clock_reference"]
             # "time duration of IQ data acquisition"
             self.duration = iteration_config[rx_id + "_duration"]
+            # index of the variation in config order (cross product order), variations may be reordered
+            self.variation_index = int(iteration_config.name)
             # "number of snapshots from RX IQ data acquisition"
             self.nrecords = general_config["nrecords"]
             # captured data file name
@@ -259,6 +274,8 @@ class RFDataRecorderAPI:
             self.coerced_rx_gain = 0.0
             self.coerced_rx_bandwidth = 0.0
             self.coerced_rx_lo_source = 0.0
+            # decimation factor of the recorded data on the host, 1: no decimation
+            self.decimation_factor = 1
             # channel parameters of this RX
             # expected channel atteuntion, type = float"
             self.channel_attenuation_db = iteration_config[rx_id + "_channel_attenuation_db"]
@@ -291,8 +308,8 @@ class RFDataRecorderAPI:
                 idx = n + 1
                 args_list = variations_product[RFmode + str(idx) + "_args"]
                 args = args_list[0]
-                # open the session to USRP
-                usrp = uhd.usrp.MultiUSRP(args)
+                # open the session to USRP, the session is kept in the pool to be reused
+                usrp = self.usrp_session_pool.get_multi_usrp_session(args).usrp
                 # get USRP daughterboard ID, UBX, CBX ...etc
                 if RFmode == RFDataRecorderAPI.RFmode[0]:
                     usrp_info = usrp.get_usrp_tx_info()
@@ -322,29 +339,25 @@ class RFDataRecorderAPI:
                         usrp_bandwidth,
                     )
 
-                data_frame_i = pd.DataFrame(
-                    {RFmode + str(idx) + "_hw_type": ["USRP " + usrp_mboard_id]}
+                # HW info is the same for all variations, it does not change the number of variations
+                variations_product.add_constant_column(
+                    RFmode + str(idx) + "_hw_type", "USRP " + usrp_mboard_id
                 )
-                variations_product = variations_product.merge(data_frame_i, how="cross")
-
-                data_frame_i = pd.DataFrame(
-                    {RFmode + str(idx) + "_hw_subtype": [usrp_daughterboard_id_wo_ref]}
+                variations_product.add_constant_column(
+                    RFmode + str(idx) + "_hw_subtype", usrp_daughterboard_id_wo_ref
                 )
-                variations_product = variations_product.merge(data_frame_i, how="cross")
-
-                data_frame_i = pd.DataFrame({RFmode + str(idx) + "_seid": [usrp_serial_number]})
-                variations_product = variations_product.merge(data_frame_i, how="cross")
-
-                data_frame_i = pd.DataFrame(
-                    {RFmode + str(idx) + "_max_RF_bandwidth": [usrp_bandwidth]}
+                variations_product.add_constant_column(RFmode + str(idx) + "_seid", usrp_serial_number)
+                variations_product.add_constant_column(
+                    RFmode + str(idx) + "_max_RF_bandwidth", usrp_bandwidth
                 )
-                variations_product = variations_product.merge(data_frame_i, how="cross")
 
             return variations_product
 
         def add_mmwave_hw_type(RFmode, idx, variations_product, device_name):
             hw_type_index = RFmode + str(idx) + "_hw_type"
-            variations_product[hw_type_index] = variations_product[hw_type_index] + " + " + device_name
+            variations_product.set_column_values(
+                hw_type_index, [hw_type + " + " + device_name for hw_type in variations_product[hw_type_index]]
+            )
             return variations_product
 
         def get_mmwave_device_info(num_usrps, RFmode, variations_product):
@@ -363,8 +376,9 @@ class RFDataRecorderAPI:
                     raise Exception(
                         f"ERROR: The device type of beam former can't be found. SN: {serial_number_beam_former}")
                 else:
-                    data_frame_i = pd.DataFrame({device_id_beam_former + "device_type": [device_type_beam_former]})
-                    variations_product = variations_product.merge(data_frame_i, how="cross")
+                    variations_product.add_constant_column(
+                        device_id_beam_former + "device_type", device_type_beam_former
+                    )
 
                 # mmwave ud converter
                 device_id_ud_converter = RFmode + str(idx) + "_mmwave_up_down_converter_"
@@ -387,8 +401,9 @@ class RFDataRecorderAPI:
                     raise Exception(
                         f"ERROR: The device type of ud converter can't be found. SN: {serial_number_ud_converter}")
                 else:
-                    data_frame_i = pd.DataFrame({device_id_ud_converter + "device_type": [device_type_ud_converter]})
-                    variations_product = variations_product.merge(data_frame_i, how="cross")
+                    variations_product.add_constant_column(
+                        device_id_ud_converter + "device_type", device_type_ud_converter
+                    )
             return variations_product
 
         # get hW info of TX Stations
@@ -623,16 +638,37 @@ class RFDataRecorderAPI:
         print("General config: ")
         print(general_config)
 
+    ## Create sync of TX and RX threads of one variation
+    # start_timing_mode: immediate: start TX and RX as soon as they are ready
+    # ................: timed: start TX replay and RX streaming at a common device time, see timed_start
+    def create_variation_sync(num_txs, num_rxs, general_config):
+        timed_start = None
+        start_timing_mode = general_config.get("start_timing_mode", "immediate")
+        if start_timing_mode == "timed":
+            timed_start = TimedStart(
+                num_txs + num_rxs,
+                float(general_config.get("timed_start_delay_s", 0.5)),
+                general_config.get("device_time_source", "pps"),
+            )
+        elif start_timing_mode != "immediate":
+            raise Exception("ERROR: Unknown start timing mode", start_timing_mode)
+        return sync_settings.VariationSync(
+            num_txs,
+            num_rxs,
+            general_config.get("rx_start_trigger", "any_tx_ready"),
+            timed_start,
+        )
+
     ## Use Ctrl-handler to stop TX in case of Tx Only
-    def call_stop_tx_siganl():
+    def call_stop_tx_siganl(variation_sync):
         # Ctrl+C handler
         def signal_handler(sig, frame):
             print("Exiting . . .")
-            sync_settings.stop_tx_signal_called = True
+            variation_sync.stop_tx_signal()
 
         # Wait until the Tx station is ready and then print how to stop tx
-        while sync_settings.start_rx_data_acquisition_called == False:
-            time.sleep(0.1)  # sleep for 100ms
+        if not variation_sync.wait_for_start_rx_data_acquisition():
+            return
 
         # ** Wait until user says to stop **
         # Setup SIGINT handler (Ctrl+C)
@@ -640,11 +676,11 @@ class RFDataRecorderAPI:
         list = ["\\", "|", "/", "—"]
         print("")
         print("Press Ctrl+C to stop RF streaming for this iteration ...")
-        while sync_settings.stop_tx_signal_called == False:
-            for i in range(0, 4):
-                index = i % 4
-                print("\rRF streaming {}".format(list[index]), end="")
-                time.sleep(0.1)  # sleep for 100ms
+        i = 0
+        # the spinner is updated every 100ms, the wait returns as soon as TX is stopped
+        while not variation_sync.wait_for_stop_tx_signal(timeout=0.1):
+            print("\rRF streaming {}".format(list[i % 4]), end="")
+            i += 1
 
     ## Start execution - TX emitters in parallel
     def start_execution_txs_in_parallel(
@@ -656,49 +692,59 @@ class RFDataRecorderAPI:
         rx_data_nbytes_que,
     ):
 
-        # initialize threads
-        threads = []
+        # Sync of TX and RX threads of this variation
+        variation_sync = RFDataRecorderAPI.create_variation_sync(
+            len(txs_data_recording_api_config), len(rxs_data_recording_api_config), general_config
+        )
+        # the tasks of this variation wait for each other, so each task should have its own device
+        DeviceWorkerPool.check_variation_devices(
+            [config.args for config in txs_data_recording_api_config + rxs_data_recording_api_config]
+        )
+        # futures of device tasks
+        futures = []
         # start transmitters
         for idx, tx_data_recording_api_config in enumerate(txs_data_recording_api_config):
-            process = threading.Thread(
-                target=run_rf_replay_data_transmitter.rf_replay_data_transmitter,
-                args=(txs_data_recording_api_config[idx],),
+            future = self.device_worker_pool.submit(
+                tx_data_recording_api_config.args,
+                sync_settings.run_with_variation_sync,
+                variation_sync,
+                run_rf_replay_data_transmitter.rf_replay_data_transmitter,
+                tx_data_recording_api_config,
+                self.usrp_session_pool,
+                tx_idx=idx,
             )
-            process.start()
-            threads.append(process)
+            futures.append(future)
 
         # start receivers
         # Trigger Rx:
-        # ---------The data acquisition will start as soon as one Tx station is ready and started signal transmission
-        # ---------The flag: "sync_settings.start_rx_data_acquisition_called" is used for that
+        # ---------The data acquisition will start as soon as one Tx station (or all Tx stations, see rx_start_trigger)
+        # ---------is ready and started signal transmission
         # Stop Tx:
-        # ------ As soon as the Rx data is recorded, the txs will stop data tranmission
-        # ------ The flag "sync_settings.stop_tx_signal_called" is used for that
+        # ------ As soon as the Rx data is recorded by all Rx stations, the txs will stop data tranmission
+        # ------ The variation sync object is used for that
         for idx, rx_data_recording_api_config in enumerate(rxs_data_recording_api_config):
-            process = threading.Thread(
-                target=run_rf_data_recorder.rf_data_recorder,
-                args=(
-                    rxs_data_recording_api_config[idx],
-                    txs_data_recording_api_config,
-                    general_config,
-                    rx_data_nbytes_que,
-                ),
+            future = self.device_worker_pool.submit(
+                rx_data_recording_api_config.args,
+                sync_settings.run_with_variation_sync,
+                variation_sync,
+                run_rf_data_recorder.rf_data_recorder,
+                rx_data_recording_api_config,
+                txs_data_recording_api_config,
+                general_config,
+                rx_data_nbytes_que,
+                self.usrp_session_pool,
             )
-            process.start()
-            threads.append(process)
+            futures.append(future)
 
         # For Tx-only mode: the stop tx signal is done manaully using Ctrl+C command
         if api_operation_mode == RFDataRecorderAPI.API_operation_modes[0]:
             # Ctrl+C handler
-            RFDataRecorderAPI.call_stop_tx_siganl()
-
-        # We now pause execution on the main thread by 'joining' all of our started threads.
-        # This ensures that each has finished processing the urls.
-        for process in threads:
-            process.join()
+            RFDataRecorderAPI.call_stop_tx_siganl(variation_sync)
 
-        # settling time
-        time.sleep(0.05)
+        # We now pause execution on the main thread until all device tasks of this variation are done.
+        # The tasks are done after the TX is stopped and the RX data is recorded, so no settling time is needed.
+        # A failed task cancels the variation and its error is raised here.
+        DeviceWorkerPool.wait_for_tasks_or_raise(futures)
 
     ## Start execution - TX emitters in sequential
     def start_execution_txs_in_sequential(
@@ -712,62 +758,62 @@ class RFDataRecorderAPI:
     ):
 
         for tx_idx, tx_data_recording_api_config in enumerate(txs_data_recording_api_config):
-            ##  Initlize sync settings
-            sync_settings.init()
+            ##  Initlize sync of the active TX and RX threads
+            variation_sync = RFDataRecorderAPI.create_variation_sync(
+                1, len(rxs_data_recording_api_config), general_config
+            )
             if enable_console_logging:
-                print(
-                    "Sync Status: Start Data acquisition called = ",
-                    sync_settings.start_rx_data_acquisition_called,
-                    " Stop Tx Signal called = ",
-                    sync_settings.stop_tx_signal_called,
-                )
-            # initialize threads
-            threads = []
+                print("Sync Status: ", variation_sync.get_status())
+            # the tasks of this TX wait for each other, so each task should have its own device
+            DeviceWorkerPool.check_variation_devices(
+                [tx_data_recording_api_config.args]
+                + [config.args for config in rxs_data_recording_api_config]
+            )
+            # futures of device tasks
+            futures = []
             # start transmitter
-            process = threading.Thread(
-                target=run_rf_replay_data_transmitter.rf_replay_data_transmitter,
-                args=(txs_data_recording_api_config[tx_idx],),
+            future = self.device_worker_pool.submit(
+                tx_data_recording_api_config.args,
+                sync_settings.run_with_variation_sync,
+                variation_sync,
+                run_rf_replay_data_transmitter.rf_replay_data_transmitter,
+                tx_data_recording_api_config,
+                self.usrp_session_pool,
+                tx_idx=tx_idx,
             )
-            process.start()
-            threads.append(process)
+            futures.append(future)
 
             # start receivers
             # Trigger Rx:
-            # ---------The data acquisition will start as soon as one Tx station is ready and started signal transmission
-            # ---------The flag: "sync_settings.start_rx_data_acquisition_called" is used for that
+            # ---------The data acquisition will start as soon as the Tx station is ready and started signal transmission
             # Stop Tx:
-            # ------ As soon as the Rx data is recorded, the txs will stop data tranmission
-            # ------ The flag "sync_settings.stop_tx_signal_called" is used for that
+            # ------ As soon as the Rx data is recorded by all Rx stations, the tx will stop data tranmission
+            # ------ The variation sync object is used for that
 
             # Read tx config of related Tx to be stored in meta-data
             # In case of squential tranmissions, store only the meta-data of active Tx.
             txs_data_recording_api_config_i = [txs_data_recording_api_config[tx_idx]]
             for rx_idx, rx_data_recording_api_config in enumerate(rxs_data_recording_api_config):
-                rx_data_recording_api_config = rxs_data_recording_api_config[rx_idx]
-                process = threading.Thread(
-                    target=run_rf_data_recorder.rf_data_recorder,
-                    args=(
-                        rx_data_recording_api_config,
-                        txs_data_recording_api_config_i,
-                        general_config,
-                        rx_data_nbytes_que,
-                    ),
+                future = self.device_worker_pool.submit(
+                    rx_data_recording_api_config.args,
+                    sync_settings.run_with_variation_sync,
+                    variation_sync,
+                    run_rf_data_recorder.rf_data_recorder,
+                    rx_data_recording_api_config,
+                    txs_data_recording_api_config_i,
+                    general_config,
+                    rx_data_nbytes_que,
+                    self.usrp_session_pool,
                 )
-                process.start()
-                threads.append(process)
+                futures.append(future)
 
             # Tx-only mode
             if api_operation_mode == RFDataRecorderAPI.API_operation_modes[0]:
                 # Ctrl+C handler
-                RFDataRecorderAPI.call_stop_tx_siganl(api_operation_mode)
+                RFDataRecorderAPI.call_stop_tx_siganl(variation_sync)
 
-            # We now pause execution on the main thread by 'joining' all of our started threads.
-            # This ensures that each has finished processing the urls.
-            for process in threads:
-                process.join()
-
-            # settling time
-            time.sleep(0.05)
+            # We now pause execution on the main thread until all device tasks of this TX are done.
+            DeviceWorkerPool.wait_for_tasks_or_raise(futures)
 
     ## Execute Rxs only for RX only mode
     def start_rxs_execution(
@@ -778,28 +824,28 @@ class RFDataRecorderAPI:
         rx_data_nbytes_que,
     ):
 
-        threads = []
+        # the tasks of this variation wait for each other, so each task should have its own device
+        DeviceWorkerPool.check_variation_devices([config.args for config in rxs_data_recording_api_config])
+        futures = []
         # For Rx only, no trigger required from Tx to start data acquisition
-        # Send a command to start RX data acquisition
-        sync_settings.start_rx_data_acquisition_called = True
+        # The sync without TX starts RX data acquisition immediately
+        variation_sync = RFDataRecorderAPI.create_variation_sync(
+            0, len(rxs_data_recording_api_config), general_config
+        )
 
         for idx, rx_data_recording_api_config in enumerate(rxs_data_recording_api_config):
-            process = threading.Thread(
-                target=run_rf_data_recorder.rf_data_recorder,
-                args=(
-                    rxs_data_recording_api_config[idx],
-                    txs_data_recording_api_config,
-                    general_config,
-                    rx_data_nbytes_que,
-                ),
+            future = self.device_worker_pool.submit(
+                rx_data_recording_api_config.args,
+                sync_settings.run_with_variation_sync,
+                variation_sync,
+                run_rf_data_recorder.rf_data_recorder,
+                rx_data_recording_api_config,
+                txs_data_recording_api_config,
+                general_config,
+                rx_data_nbytes_que,
+                self.usrp_session_pool,
             )
-            process.start()
-            threads.append(process)
-
-        # We now pause execution on the main thread by 'joining' all of our started threads.
-        # This ensures that each has finished processing the urls.
-        for process in threads:
-            process.join()
+            futures.append(future)
 
-        # settling time
-        time.sleep(0.05)
+        # We now pause execution on the main thread until all device tasks of this variation are done.
+        DeviceWorkerPool.wait_for_tasks_or_raise(futures)
@@ -14,43 +14,163 @@ RF Data Recording API Configuration Interface
 # 	    - RX USRP configuration
 #
 import os
+import glob
 import yaml
 import json
+import hashlib
+import time
 import pandas as pd
-import functools
 from pathlib import Path
 
+# Use the C YAML loader if PyYAML is built with LibYAML, and orjson if it is installed
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# To print colours
+from termcolor import colored
+
 # import other functions
 from lib import data_format_conversion_lib
 from lib import rf_data_recording_api_def
+from lib.variations_product import VariationsProduct
+from lib.user_cache import get_user_cache_dir
 
-# Read config file
-def read_config_files(rf_data_acq_config_file: str):
-    """
-    Reads rf data recording config file of RF Data Collection API
-    """
-    name, extension = os.path.splitext(rf_data_acq_config_file)
+# Version of the parsed config cache, to be increased if the cached data is changed
+CONFIG_CACHE_VERSION = 2
+# Folder of parsed config cache files in the user cache folder, outside of the source tree
+CONFIG_CACHE_NAME = "config_cache"
+# Wireless link parameter map, input of the variations next to the config files
+WIRELESS_LINK_PARAMETER_MAP_FILE = os.path.join("config", "wireless_link_parameter_map.yaml")
+
+
+# Get path of config file, relative paths are given from the src folder
+def get_config_file_path(rf_data_acq_config_file: str):
     dir_path = os.path.dirname(__file__)
     src_path = os.path.split(dir_path)[0]
+    return os.path.join(src_path, rf_data_acq_config_file)
+
+
+# Parse content of config file based on file extension
+def parse_config_data(config_data: bytes, extension: str):
     # read general parameter set from yaml config file
     if extension == ".yaml":
-        with open(os.path.join(src_path, rf_data_acq_config_file), "r") as file:
-            rf_data_acq_config = yaml.load(file, Loader=yaml.Loader)
+        rf_data_acq_config = yaml.load(config_data, Loader=YamlLoader)
     # Read general parameter set from json config file
     elif extension == ".json":
-        with open(os.path.join(src_path, rf_data_acq_config_file), "r") as file:
-            rf_data_acq_config = json.load(file)
+        if orjson is not None:
+            rf_data_acq_config = orjson.loads(config_data)
+        else:
+            rf_data_acq_config = json.loads(config_data)
     else:
         raise Exception(f"Unsupported file format '{extension}'.")
+    return rf_data_acq_config
+
+
+# Read config file
+def read_config_files(rf_data_acq_config_file: str):
+    """
+    Reads rf data recording config file of RF Data Collection API
+    """
+    name, extension = os.path.splitext(rf_data_acq_config_file)
+    if extension not in [".yaml", ".json"]:
+        raise Exception(f"Unsupported file format '{extension}'.")
+    with open(get_config_file_path(rf_data_acq_config_file), "rb") as file:
+        rf_data_acq_config = parse_config_data(file.read(), extension)
 
     return rf_data_acq_config, extension
 
 
+# Get files that the parsed config and the variation map depend on, besides the config file:
+# all modules of the API and the wireless link parameter map
+def get_config_dependency_files():
+    src_path = os.path.split(os.path.dirname(__file__))[0]
+    dependency_files = sorted(glob.glob(os.path.join(src_path, "lib", "*.py")))
+    wireless_link_parameter_map_path = os.path.join(src_path, WIRELESS_LINK_PARAMETER_MAP_FILE)
+    if os.path.exists(wireless_link_parameter_map_path):
+        dependency_files.append(wireless_link_parameter_map_path)
+    return dependency_files
+
+
+# Get content hash of config, the code and files that create the variation map are part of the hash,
+# so a cached variation map is not used after any of them is changed
+def get_config_hash(config_data: bytes, extension: str):
+    config_hash = hashlib.sha1()
+    config_hash.update(f"{CONFIG_CACHE_VERSION}{extension}".encode())
+    config_hash.update(config_data)
+    for dependency_file in get_config_dependency_files():
+        config_hash.update(os.path.basename(dependency_file).encode())
+        with open(dependency_file, "rb") as file:
+            config_hash.update(file.read())
+    return config_hash.hexdigest()
+
+
+# Get folder of parsed config cache files in the user cache folder
+def get_config_cache_dir():
+    return get_user_cache_dir(CONFIG_CACHE_NAME)
+
+
+# Get path of parsed config cache file of given config file and hash
+# The cache file name starts with the hash of the config file path, so each config file has its own cache file
+def get_config_cache_path(config_file_path: str, config_hash: str):
+    config_path_hash = hashlib.sha1(os.path.abspath(config_file_path).encode()).hexdigest()[:16]
+    return os.path.join(get_config_cache_dir(), f"{config_path_hash}.{config_hash}.json")
+
+
+# Load parsed config and variation map data from cache file, None if it is not cached or not readable
+# The cache is plain JSON, so it is only parsed and never executed
+def load_cached_config(config_cache_path: str):
+    if not os.path.exists(config_cache_path):
+        return None
+    try:
+        with open(config_cache_path, "rb") as file:
+            cached_config = parse_config_data(file.read(), ".json")
+        return (
+            cached_config["rf_data_acq_config"],
+            cached_config["variations_dict"],
+            cached_config["general_config_dict"],
+        )
+    except Exception:
+        # i.e. a cache file that is written partly
+        return None
+
+
+# Save parsed config and variation map data to cache file, older cache files of the same config are removed
+def save_cached_config(config_cache_path: str, rf_data_acq_config, variations_map):
+    cache_dir = os.path.dirname(config_cache_path)
+    config_path_hash = os.path.basename(config_cache_path).split(".")[0]
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for file_name in os.listdir(cache_dir):
+            if file_name.split(".")[0] == config_path_hash:
+                os.remove(os.path.join(cache_dir, file_name))
+        temp_cache_path = config_cache_path + ".tmp"
+        with open(temp_cache_path, "w") as file:
+            json.dump(
+                {
+                    "rf_data_acq_config": rf_data_acq_config,
+                    "variations_dict": variations_map.variations_dict,
+                    "general_config_dict": variations_map.general_config_dict,
+                },
+                file,
+            )
+        os.replace(temp_cache_path, config_cache_path)
+    except (OSError, TypeError, ValueError) as error:
+        # the config is still used, it is parsed again in the next run
+        print(colored("Warning: Parsed config cannot be cached: " + str(error), "yellow"))
+
+
 # Check whether dict of config is filled at all
+# Numbers and booleans are filled even if they are zero or false, i.e. a pipeline depth of zero
 def check_config_dict(config_dict):
     if bool(config_dict):
         for key, value in config_dict.items():
-            if not value:
+            if not value and not isinstance(value, (bool, int, float)):
                 raise Exception(f"Config field '{key}' is not filled!")
 
 
@@ -173,9 +293,31 @@ def get_device_variations_config_dict(device_variations_config_dict, RFmode, var
 class CreateVariationsMap:
     """Top-level Create variation map class"""
 
-    def __init__(self, rf_data_acq_config):
+    # The variations and the general config are given if they are loaded from the parsed config cache
+    def __init__(self, rf_data_acq_config, variations_dict=None, general_config_dict=None):
         # Save RF data collection config as it is in the given file in the class
         self.rf_data_acq_config = rf_data_acq_config
+        if variations_dict is None or general_config_dict is None:
+            variations_dict, general_config_dict = CreateVariationsMap.get_variations_config(rf_data_acq_config)
+        # plain parameter values, they are stored in the parsed config cache
+        self.variations_dict = variations_dict
+        self.general_config_dict = general_config_dict
+
+        # ---------------------------------------
+        ## Get Variations map by doing a Cross-product
+        # --------------------------------------
+        # The cross product is lazy, every variation is computed on demand from its index
+        self.variations_product = VariationsProduct(variations_dict)
+
+        # ---------------------------------------
+        ## Get general config
+        # --------------------------------------
+        # one row with a column per general config parameter
+        self.general_config = pd.DataFrame({key: [value] for key, value in general_config_dict.items()})
+
+    # Get the parameter values of all variations and the general config parameters
+    @staticmethod
+    def get_variations_config(rf_data_acq_config):
         # ---------------------------------------
         ## Get Variations config
         # --------------------------------------
@@ -225,42 +367,15 @@ class CreateVariationsMap:
             rx_variations_config_dict, RFmode_rx, variations_dict
         )
 
-        # ---------------------------------------
-        ## Get Variations map by doing a Cross-product
-        # --------------------------------------
-        # First, create a data frame for all parameters
-        # preallocate list to collect pandas data frames
-        variations_list = list(variations_dict.items())
-        parameter_config = variations_list[0]
-        parameter, value = parameter_config
-        variations_product = pd.DataFrame({parameter: value})
-        for i in range(len(variations_list) - 1):
-            parameter_config = variations_list[i + 1]
-            parameter, value = parameter_config
-            data_frame_i = pd.DataFrame({parameter: value})
-            variations_product = variations_product.merge(data_frame_i, how="cross")
-
-        # Store variations product in self class
-        self.variations_product = variations_product
-
         # ---------------------------------------
         ## Get general config
         # --------------------------------------
-        general_config_dict = rf_data_acq_config["general_config"]
+        general_config_dict = dict(rf_data_acq_config["general_config"])
         # check whether dict for general_config is filled at all
         check_config_dict(general_config_dict)
-
-        # preallocate list to collect pandas data frames
-        general_config_frames = []
-        for key, value in general_config_dict.items():
-            # collect all data frames in a list
-            general_config_frames.append(pd.DataFrame({key: [value]}))
-        # Store number of TX USRPs
-        data_frame_tx = pd.DataFrame({"num_tx_usrps": [num_tx_usrps]})
-        general_config_frames.append(data_frame_tx)
-        # Store number of RX USRPs
-        data_frame_rx = pd.DataFrame({"num_rx_usrps": [num_rx_usrps]})
-        general_config_frames.append(data_frame_rx)
+        # Store number of TX and RX USRPs
+        general_config_dict["num_tx_usrps"] = num_tx_usrps
+        general_config_dict["num_rx_usrps"] = num_rx_usrps
 
         # Derive API Operation Mode: Tx-only, Rx-only, Tx-Rx
         if num_tx_usrps > 0 and num_rx_usrps > 0:  # Tx-Rx mode
@@ -273,16 +388,9 @@ class CreateVariationsMap:
             raise Exception(
                 f"Unknown API operation mode, num Tx stations:{num_tx_usrps}, num Rx stations:{num_rx_usrps}."
             )
-        data_frame_op_mode = pd.DataFrame({"API_operation_mode": [API_operation_mode]})
-        general_config_frames.append(data_frame_op_mode)
+        general_config_dict["API_operation_mode"] = API_operation_mode
 
-        # create cross-product of all single data frames
-        general_config = functools.reduce(
-            lambda df1, df2: pd.merge(df1, df2, how="cross"), general_config_frames
-        )
-
-        # Store general config in self class
-        self.general_config = general_config
+        return variations_dict, general_config_dict
 
 
 def generate_rf_data_recording_configs(rf_data_acq_config_file: str):
@@ -291,7 +399,26 @@ def generate_rf_data_recording_configs(rf_data_acq_config_file: str):
     ranges.
     """
     # Read RF Data collection API YAML config file
-    rf_data_acq_config, extension = read_config_files(rf_data_acq_config_file)
+    # The parsed config and the variation map are cached by content hash of the config file,
+    # so the same config is parsed only once
+    start_time = time.perf_counter()
+    name, extension = os.path.splitext(rf_data_acq_config_file)
+    config_file_path = get_config_file_path(rf_data_acq_config_file)
+    with open(config_file_path, "rb") as file:
+        config_data = file.read()
+    config_cache_path = get_config_cache_path(config_file_path, get_config_hash(config_data, extension))
+    cached_config = load_cached_config(config_cache_path)
+    if cached_config is not None:
+        rf_data_acq_config, variations_dict, general_config_dict = cached_config
+        variations_map = CreateVariationsMap(rf_data_acq_config, variations_dict, general_config_dict)
+        print(
+            "Load parsed config from cache: ",
+            round((time.perf_counter() - start_time) * 1000, 3),
+            "ms",
+        )
+    else:
+        rf_data_acq_config = parse_config_data(config_data, extension)
+        variations_map = None
 
     enable_console_logging = data_format_conversion_lib.str2bool(
         rf_data_acq_config["general_config"]["enable_console_logging"]
@@ -310,7 +437,9 @@ def generate_rf_data_recording_configs(rf_data_acq_config_file: str):
         print(rf_data_acq_config)
 
     # Create the variation map
-    variations_map = CreateVariationsMap(rf_data_acq_config)
+    if variations_map is None:
+        variations_map = CreateVariationsMap(rf_data_acq_config)
+        save_cached_config(config_cache_path, rf_data_acq_config, variations_map)
 
     # Print resulting variations product on terminal
     if enable_console_logging:
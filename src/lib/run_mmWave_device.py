@@ -11,13 +11,15 @@ Run mmWave devices from TMYTek
 #
 import threading
 from lib.data_format_conversion_lib import str2bool
+# The TMYTek API is only needed if mmWave support is enabled, so a missing API is reported when a mmWave device
+# is used and not at import. There is no prompt, the module is also imported by worker processes without console.
+tmytek_api_import_error = None
 try:
     from lib.TLKCoreService import TLKCoreService
     from lib.TMYPublic import DevInterface, RetCode, RFMode, UDState, BeamType, UDM_REF
 except Exception as e:
-    if e.msg.__contains__("No module named \'lib"):
-        print("Please check if you have installed the TMYTek API.")
-        input(" === There is no TMYTek API, do you want to continue? ===") # Just press the keyboard if no need to support mmWave
+    if isinstance(e, ImportError) and "No module named \'lib" in str(e):
+        tmytek_api_import_error = e
     else:
         raise Exception("ERROR: The TMYTek API can't work, please check pip install -r requirements.txt")
 
@@ -35,6 +37,11 @@ class SingletonTLKCoreService:
         return cls._instance
 
     def __init__(self):
+        if tmytek_api_import_error is not None:
+            raise Exception(
+                "ERROR: There is no TMYTek API, please check if you have installed it to support mmWave",
+                str(tmytek_api_import_error),
+            )
         self.TLKApi = TLKCoreService()
         self.device_list = self.scan_devices()
 
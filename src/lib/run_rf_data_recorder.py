@@ -18,7 +18,6 @@ RF Data Recorder
 from pickle import FALSE, TRUE
 from unicodedata import name
 import numpy as np
-import uhd
 
 # To save to specific path
 import os
@@ -26,16 +25,30 @@ from pathlib import Path
 
 # To measure elapsed time
 import time
+import functools
 
 # To print colours
 from termcolor import colored, cprint
 
 # import related functions
 from lib import write_rx_recorded_data_in_sigmf, run_mmWave_device
+from lib.data_format_conversion_lib import str2bool
 from lib import sync_settings
+from lib.usrp_session_pool import UsrpSessionPool
+from lib.rx_continuous_streamer import ContinuousRxStreamer
+from lib.async_rx_data_writer import AsyncRxDataWriter
+from lib.rx_sample_format import get_rx_sample_format
+from lib.energy_trigger import EnergyTrigger
+from lib.rx_decimator import get_rx_decimator
+from lib.rx_channelizer import get_rx_channelizer
 
-def rf_data_recorder(rx_args, txs_args, general_config, rx_data_nbytes_que):
+def rf_data_recorder(
+    rx_args, txs_args, general_config, rx_data_nbytes_que, usrp_session_pool=None, variation_sync=None
+):
     """RX Data Recorder"""
+    # Sync with TX threads of this variation, without TX the data acquisition starts immediately
+    if variation_sync is None:
+        variation_sync = sync_settings.VariationSync(num_rxs=1)
 
     # Run mmwave devices first if exist
     if rx_args.enable_mmwave:
@@ -60,130 +73,372 @@ def rf_data_recorder(rx_args, txs_args, general_config, rx_data_nbytes_que):
     if not isinstance(rx_args.channels, list):
         rx_args.channels = [rx_args.channels]
 
-    # Initialize usrp
+    # Get usrp session from the pool: the device is opened only once and reused across variations
     print("Initialize usrp ...")
-    usrp = uhd.usrp.MultiUSRP(rx_args.args)
-    usrp_info = usrp.get_usrp_rx_info()
-    # print("RX USRP info:")
-    # print(usrp_info)
-    # rx_args.usrp_mboard_serial = usrp_info["mboard_serial"]
-    # rx_args.usrp_mboard_id = usrp_info["mboard_id"]
+    close_usrp_session = usrp_session_pool is None
+    if close_usrp_session:
+        usrp_session_pool = UsrpSessionPool()
+    usrp_session = usrp_session_pool.get_multi_usrp_session(rx_args.args)
+    usrp = usrp_session.usrp
 
     # Set clock reference
-    usrp.set_clock_source(rx_args.clock_reference)
+    usrp_session.set_clock_source(rx_args.clock_reference)
 
     # Set up the stream
+    # RX sample format: fc32 --> the samples are converted to complex float on the host
+    # sc16 --> the samples are kept as complex int16 as they are sent by the radio
     print("Setup the stream ...")
-    cpu_format = "fc32"
+    cpu_format = general_config.get("rx_sample_format", "fc32")
+    rx_sample_dtype = get_rx_sample_format(cpu_format)["dtype"]
     wire_format = "sc16"
-    st_args = uhd.usrp.StreamArgs(cpu_format, wire_format)
-    st_args.channels = rx_args.channels  # If you're only using one channel, then this is simply [0]
-    rx_streamer = usrp.get_rx_stream(st_args)
-
-    # Set receive port (TX/RX or RX2)
-    for index in rx_args.channels:
-        usrp.set_rx_antenna(rx_args.antenna, index)
-        # set the IF filter bandwidth
-        if not isX4xx:
-            usrp.set_rx_bandwidth(rx_args.bandwidth, index)
-    # set RF Configure and capture zero sample for RF Settling time
-    usrp.recv_num_samps(
-        0,
+    rx_streamer = usrp_session.get_rx_stream(rx_args.channels, cpu_format, wire_format)
+
+    # Set receive port (TX/RX or RX2), IF filter bandwidth and RF configuration
+    # Only the settings that changed compared to the previous variation are applied
+    usrp_session.configure_rx(
+        rx_args.channels,
         rx_args.freq,
         rx_args.rate,
-        rx_args.channels,
         rx_args.gain,
-        streamer=rx_streamer,
+        rx_args.antenna,
+        rx_args.bandwidth if not isX4xx else None,
     )
     # Wait to get a command to start RX data acquisition if TX is on TX mode already
-    while sync_settings.start_rx_data_acquisition_called == False:
-        time.sleep(0.1)  # sleep for 100ms
+    sync_timeout = float(general_config.get("sync_timeout_s", 60))
+    # Timed start: wait until all TX and RX devices are configured and get the common start time (device time)
+    timed_start_time = None
+    if variation_sync.timed_start is not None:
+        timed_start_time = variation_sync.wait_for_timed_start(usrp_session, sync_timeout)
+        is_started = timed_start_time is not None
+    else:
+        is_started = variation_sync.wait_for_start_rx_data_acquisition(sync_timeout)
+    if not is_started:
+        # release the TX threads waiting for this RX
+        variation_sync.cancel()
+        raise Exception(
+            "ERROR: RX data acquisition is not started, TX is not ready or the variation is cancelled",
+            variation_sync.get_status(),
+        )
 
     # Run data recording loop over specified number of iterations
     print("Start fetching RX data from USRP...")
 
     rx_data_nbytes = 0.0
 
-    for i in range(rx_args.nrecords):
-        print("")
-        # Fetch data from usrp device
-        start_time = time.time()
-        rx_data = usrp.recv_num_samps(
-            rx_args.num_rx_samps,
-            rx_args.freq,
-            rx_args.rate,
-            rx_args.channels,
-            rx_args.gain,
-            streamer=rx_streamer,
+    # RX data output mode: buffered, memmap or direct, see write_rx_recorded_data_in_sigmf
+    rx_data_output_mode = general_config.get("rx_data_output_mode", "buffered")
+    if rx_data_output_mode not in ["buffered", "memmap", "direct"]:
+        raise Exception("ERROR: Unknown RX data output mode", rx_data_output_mode)
+    # Compressed records are written by the writer workers, they cannot be received into the data file
+    if rx_data_output_mode == "memmap" and general_config.get("rx_data_compression", "none") != "none":
+        raise Exception("ERROR: RX data compression is not supported with the memmap output mode")
+
+    # RX trigger mode:
+    # none: all records are written
+    # energy: only records with signal are written, trimmed to the detected bursts with pre- and post-trigger
+    # margins
+    rx_trigger_mode = general_config.get("rx_trigger_mode", "none")
+    energy_trigger = None
+    if rx_trigger_mode == "energy":
+        # Trimmed records have different sizes, so each record is written to its own files
+        rx_data_file_layout = general_config.get("rx_data_file_layout", "per_record")
+        if rx_data_output_mode == "memmap" or rx_data_file_layout != "per_record":
+            raise Exception(
+                "ERROR: Energy trigger is supported with per_record data file layout only, without memmap output mode"
+            )
+        energy_trigger = EnergyTrigger(
+            float(general_config.get("rx_trigger_threshold_db", 10)),
+            int(general_config.get("rx_trigger_window_num_samps", 256)),
+            int(general_config.get("rx_trigger_pre_num_samps", 1000)),
+            int(general_config.get("rx_trigger_post_num_samps", 1000)),
+            general_config.get("rx_trigger_noise_floor_dbfs", "auto"),
+            get_rx_sample_format(cpu_format)["scale_factor"],
         )
+    elif rx_trigger_mode != "none":
+        raise Exception("ERROR: Unknown RX trigger mode", rx_trigger_mode)
+
+    # RX decimation mode:
+    # none: the records are written with the RX rate
+    # signal_bandwidth: the records are decimated to the occupied bandwidth of the TX signals before writing
+    rx_decimator = get_rx_decimator(
+        general_config, usrp.get_rx_rate(rx_args.channels[0]), rx_args.freq, txs_args
+    )
+    rx_args.decimation_factor = 1
+    num_recorded_samps = rx_args.num_rx_samps
+    if rx_decimator is not None:
+        if rx_data_output_mode == "memmap":
+            raise Exception("ERROR: RX decimation is not supported with the memmap output mode")
+        rx_args.decimation_factor = rx_decimator.decimation_factor
+        num_recorded_samps = rx_decimator.get_num_out_samps(rx_args.num_rx_samps)
         print(
-            "Received ",
-            colored(rx_data.size, "green"),
-            " samples - record number #",
-            colored(i, "green"),
+            "RX decimation factor: ",
+            colored(rx_decimator.decimation_factor, "yellow"),
+            ", recorded rate: ",
+            rx_decimator.out_rate / 1e6,
+            "Msps, occupied bandwidth: ",
+            rx_decimator.bandwidth / 1e6,
+            "MHz",
+        )
+
+    # Get preallocated record buffers, the pool is kept by the usrp session while the record shape is unchanged
+    # A buffer is released to the pool when the writer finishes writing it
+    # In memmap mode, the samples are received into the mapped data files, so no buffer pool is needed
+    if rx_data_output_mode != "memmap":
+        rx_buffer_pool = usrp_session.get_rx_buffer_pool(
+            int(general_config.get("rx_buffer_pool_size", 4)),
+            len(rx_args.channels),
+            rx_args.num_rx_samps,
+            str2bool(general_config.get("rx_buffer_lock_memory", "False")),
+            rx_sample_dtype,
         )
-        rx_data_nbytes = rx_data_nbytes + rx_data.nbytes
-
-        # Get USRP coerced values only once
-        # To reduce latency, the number of records is executed per each configuration
-        if i == 0:
-            # In the future, if we are going to extend the code to capture from multiple channels, we should update the meta-data also. We can read those coerced values in a loop based on the channels order.
-            print(f"Requesting RX Freq: {(rx_args.freq / 1e6)} MHz...")
-            rx_args.coerced_rx_freq = usrp.get_rx_freq(rx_args.channels[0])
-            print(f"Actual RX Freq: {rx_args.coerced_rx_freq / 1e6}  MHz...")
+
+    # RX streaming mode:
+    # records: Issue a stream command per record to fetch the given number of samples
+    # continuous: Issue one continuous stream command and carve records out of the stream
+    rx_streaming_mode = general_config.get("rx_streaming_mode", "records")
+    if rx_streaming_mode == "continuous":
+        continuous_rx_streamer = ContinuousRxStreamer(
+            usrp, rx_streamer, rx_args.channels, dtype=rx_sample_dtype
+        )
+        continuous_rx_streamer.start(timed_start_time)
+    elif rx_streaming_mode != "records":
+        raise Exception("ERROR: Unknown RX streaming mode", rx_streaming_mode)
+
+    # Write data into files with the given format
+    # The records are handed off to background writer workers, so disk latency does not delay the next record
+    # RX data file layout:
+    # per_record: each record is written to its own data and meta-data files
+    # per_variation: all records of the variation are written to one data file with a capture segment per record
+    rx_data_file_layout = general_config.get("rx_data_file_layout", "per_record")
+    rx_sigmf_archive = None
+    if rx_args.rx_recorded_data_saving_format == "SigMF":
+        if rx_data_file_layout == "per_variation":
+            rx_sigmf_archive = write_rx_recorded_data_in_sigmf.RxSigMFArchiveWriter(
+                rx_args,
+                txs_args,
+                general_config,
+                rx_args.nrecords,
+                dtype=rx_sample_dtype,
+                num_samps=num_recorded_samps,
+            )
+            write_rx_recorded_data = rx_sigmf_archive.write_record
+        elif rx_data_file_layout == "per_record":
+            write_rx_recorded_data = write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf
+        else:
+            raise Exception("ERROR: Unknown RX data file layout", rx_data_file_layout)
+    else:
+        # Report error.
+        raise Exception("ERROR: selected writing Rx recorded data format is not supported")
+    # The records are decimated by the writer workers
+    if rx_decimator is not None:
+        write_rx_recorded_data = rx_decimator.wrap_write_function(write_rx_recorded_data)
+
+    # RX channelizer mode:
+    # none: only the wideband records are written
+    # per_emitter: the record of each TX is channelized out of the wideband record and written to its own files,
+    # the channelizer gets the received samples, the wideband record is decimated if the RX decimation is enabled
+    rx_channelizer = get_rx_channelizer(
+        general_config, usrp.get_rx_rate(rx_args.channels[0]), rx_args.freq, txs_args
+    )
+    # ratio of written bytes to received bytes of a record
+    rx_data_nbytes_ratio = 1 / rx_args.decimation_factor
+    if rx_channelizer is not None:
+        if rx_data_output_mode == "memmap":
+            raise Exception("ERROR: RX channelizer is not supported with the memmap output mode")
+        rx_channelizer_keep_wideband = str2bool(general_config.get("rx_channelizer_keep_wideband", "True"))
+        if not rx_channelizer_keep_wideband:
+            rx_data_nbytes_ratio = 0
+        for channel in rx_channelizer.channels:
+            rx_data_nbytes_ratio += 1 / channel["decimation_factor"]
             print(
-                f"** RX Carrier Frequency Offset: {rx_args.coerced_rx_freq - rx_args.freq}  Hz..."
+                "RX channel of TX",
+                channel["transmitter_id"],
+                ": frequency offset: ",
+                channel["freq_offset"] / 1e6,
+                "MHz, bandwidth: ",
+                channel["bandwidth"] / 1e6,
+                "MHz, decimation factor: ",
+                colored(channel["decimation_factor"], "yellow"),
             )
+        write_rx_recorded_data = rx_channelizer.wrap_write_function(
+            write_rx_recorded_data, rx_channelizer_keep_wideband
+        )
+    rx_data_writer = AsyncRxDataWriter(
+        write_rx_recorded_data,
+        int(general_config.get("rx_writer_num_workers", 1)),
+        int(general_config.get("rx_writer_queue_size", 4)),
+    )
 
-            print(f"Requesting RX Rate: {(rx_args.rate / 1e6) } Msps...")
-            rx_args.coerced_rx_rate = usrp.get_rx_rate(rx_args.channels[0])
-            print(f"Actual RX Rate: {(rx_args.coerced_rx_rate / 1e6)} Msps...")
+    try:
+        for i in range(rx_args.nrecords):
+            print("")
+            # Fetch data from usrp device
+            start_time = time.time()
+            record_time = start_time
+            if rx_data_output_mode == "memmap" and rx_sigmf_archive is not None:
+                # receive directly into the record region of the preallocated and memory-mapped archive
+                rx_data = rx_sigmf_archive.create_record_memmap(i)
+                release_buffer = None
+            elif rx_data_output_mode == "memmap":
+                # receive directly into the preallocated and memory-mapped data file
+                rx_data = write_rx_recorded_data_in_sigmf.create_rx_data_memmap(
+                    rx_args,
+                    txs_args,
+                    general_config,
+                    i,
+                    record_time,
+                    len(rx_args.channels),
+                    rx_args.num_rx_samps,
+                    rx_sample_dtype,
+                )
+                release_buffer = None
+            else:
+                buffer_idx, rx_data = rx_buffer_pool.acquire()
+                release_buffer = functools.partial(rx_buffer_pool.release, buffer_idx)
+            if rx_streaming_mode == "continuous":
+                record_info = continuous_rx_streamer.recv_record(rx_data)
+                if record_info["rx_overflow_count"] or record_info["rx_late_count"]:
+                    print(
+                        "Overflows: ",
+                        colored(record_info["rx_overflow_count"], "red"),
+                        " Late commands: ",
+                        colored(record_info["rx_late_count"], "red"),
+                    )
+                # keep only the received samples, the rest of the record buffer is stale after a recv timeout
+                if record_info["rx_num_samps"] < rx_data.shape[-1]:
+                    print(
+                        colored(
+                            f"Warning: Record number #{i} is short: {record_info['rx_num_samps']} of "
+                            f"{rx_data.shape[-1]} samples received",
+                            "yellow",
+                        )
+                    )
+                    record_info["rx_short_record"] = True
+                    rx_data = rx_data[:, : record_info["rx_num_samps"]]
+            else:
+                # only the first record is started at the timed start time
+                record_info = {}
+                rx_data = usrp_session.recv_num_samps(
+                    rx_streamer,
+                    rx_args.num_rx_samps,
+                    rx_args.channels,
+                    rx_data,
+                    timed_start_time if i == 0 else None,
+                    record_info,
+                    rx_sample_dtype,
+                )
+            # Report the achieved start offset of the timed start in the capture of the first record
+            if i == 0 and timed_start_time is not None:
+                record_info["scheduled_start_time_s"] = timed_start_time
+                if "rx_time_s" in record_info:
+                    record_info["start_time_offset_s"] = record_info["rx_time_s"] - timed_start_time
+                    print("Timed start offset:", colored(record_info["start_time_offset_s"], "yellow"), "s")
             print(
-                f"** RX Sampling Rate Offset: {rx_args.coerced_rx_rate - rx_args.rate}  Sample per second..."
+                "Received ",
+                colored(rx_data.size, "green"),
+                " samples - record number #",
+                colored(i, "green"),
             )
 
-            print(f"Requesting RX Gain: {rx_args.gain} dB...")
-            rx_args.coerced_rx_gain = usrp.get_rx_gain(rx_args.channels[0])
-            print(f"Actual RX Gain: {rx_args.coerced_rx_gain} dB...")
+            # Get USRP coerced values only once
+            # To reduce latency, the number of records is executed per each configuration
+            if i == 0:
+                # In the future, if we are going to extend the code to capture from multiple channels, we should update the meta-data also. We can read those coerced values in a loop based on the channels order.
+                print(f"Requesting RX Freq: {(rx_args.freq / 1e6)} MHz...")
+                rx_args.coerced_rx_freq = usrp.get_rx_freq(rx_args.channels[0])
+                print(f"Actual RX Freq: {rx_args.coerced_rx_freq / 1e6}  MHz...")
+                print(
+                    f"** RX Carrier Frequency Offset: {rx_args.coerced_rx_freq - rx_args.freq}  Hz..."
+                )
+
+                print(f"Requesting RX Rate: {(rx_args.rate / 1e6) } Msps...")
+                rx_args.coerced_rx_rate = usrp.get_rx_rate(rx_args.channels[0])
+                print(f"Actual RX Rate: {(rx_args.coerced_rx_rate / 1e6)} Msps...")
+                print(
+                    f"** RX Sampling Rate Offset: {rx_args.coerced_rx_rate - rx_args.rate}  Sample per second..."
+                )
+
+                print(f"Requesting RX Gain: {rx_args.gain} dB...")
+                rx_args.coerced_rx_gain = usrp.get_rx_gain(rx_args.channels[0])
+                print(f"Actual RX Gain: {rx_args.coerced_rx_gain} dB...")
 
-            print(f"Requesting RX Bandwidth: {(rx_args.bandwidth / 1e6)} MHz...")
-            rx_args.coerced_rx_bandwidth = usrp.get_rx_bandwidth(rx_args.channels[0])
-            print(f"Actual RX Bandwidth: {rx_args.coerced_rx_bandwidth / 1e6} MHz...")
-            print("Note: Not all doughterboards support variable analog bandwidth")
+                print(f"Requesting RX Bandwidth: {(rx_args.bandwidth / 1e6)} MHz...")
+                rx_args.coerced_rx_bandwidth = usrp.get_rx_bandwidth(rx_args.channels[0])
+                print(f"Actual RX Bandwidth: {rx_args.coerced_rx_bandwidth / 1e6} MHz...")
+                print("Note: Not all doughterboards support variable analog bandwidth")
 
-            # rx_args.coerced_rx_lo_source = usrp.get_rx_lo_source()  # Not part of meta data yet
+                # rx_args.coerced_rx_lo_source = usrp.get_rx_lo_source()  # Not part of meta data yet
 
-        # Write data into files with the given format
-        if rx_args.rx_recorded_data_saving_format == "SigMF":
-            write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf(
-                rx_data, rx_args, txs_args, general_config, i
+            # Keep only the records with signal if the energy trigger is enabled
+            if energy_trigger is not None:
+                rx_data, record_info = energy_trigger.apply(rx_data, record_info)
+
+            if rx_data is not None and rx_data.shape[-1] == 0:
+                print(colored(f"Warning: No samples are received, record number #{i} is dropped", "yellow"))
+                if release_buffer is not None:
+                    release_buffer()
+            elif rx_data is None:
+                print("No signal is detected, record number #", i, "is dropped")
+                if release_buffer is not None:
+                    release_buffer()
+            else:
+                # the records are written decimated if the RX decimation is enabled, and channelized if the RX
+                # channelizer is enabled
+                rx_data_nbytes = rx_data_nbytes + rx_data.nbytes * rx_data_nbytes_ratio
+                # Hand off the record to the writer, it blocks if the writer queue is full
+                rx_data_writer.submit(
+                    rx_data,
+                    rx_args,
+                    txs_args,
+                    general_config,
+                    i,
+                    record_info,
+                    record_time,
+                    on_done=release_buffer,
+                )
+
+            end_time = time.time()
+            time_elapsed = end_time - start_time
+            time_elapsed_ms = int(time_elapsed * 1000)
+            print(
+                "Elapsed time of getting Rx samples and handing off data to the writer:",
+                colored(time_elapsed_ms, "yellow"),
+                "ms",
             )
-        else:
-            # Report error.
-            raise Exception("ERROR: selected writing Rx recorded data format is not supported")
 
-        end_time = time.time()
-        time_elapsed = end_time - start_time
-        time_elapsed_ms = int(time_elapsed * 1000)
-        print(
-            "Elapsed time of getting Rx samples and writing data and meta data files:",
-            colored(time_elapsed_ms, "yellow"),
-            "ms",
-        )
+            if sync_settings.external_stop_rx_data_acquisition_called or variation_sync.is_cancelled():
+                break
+            if rx_streaming_mode == "continuous":
+                # keep the stream running and drop the samples of dwell time
+                continuous_rx_streamer.skip_samps(int(general_config.dwell_time * rx_args.rate))
+            else:
+                time.sleep(general_config.dwell_time)
 
-        if sync_settings.external_stop_rx_data_acquisition_called:
-            break
-        time.sleep(general_config.dwell_time)
+    finally:
+        if rx_streaming_mode == "continuous":
+            continuous_rx_streamer.stop()
+        # Flush: wait until all records are written
+        try:
+            rx_data_writer.close()
+        finally:
+            if rx_sigmf_archive is not None:
+                rx_sigmf_archive.close()
+    rx_data_writer.print_stats()
+    if energy_trigger is not None:
+        energy_trigger.print_stats()
+    if rx_data_output_mode != "memmap":
+        rx_buffer_pool.print_stats()
 
     rx_data_nbytes_que.put(rx_data_nbytes)
 
-    # Send command to TX thread to stop data transmission
-    sync_settings.stop_tx_signal_called = True
+    # Send command to TX threads to stop data transmission if all RXs are done
+    variation_sync.set_rx_done()
 
     if rx_args.enable_mmwave:
         if start_ud_execution_called:
             run_mmWave_device.deinit_mmwave_device(mmwave_up_down_converter_parameters.serial_number)
         run_mmWave_device.deinit_mmwave_device(mmwave_antenna_array_parameters.serial_number)
 
-    # disable the flag
-    sync_settings.start_rx_data_acquisition_called = False
+    # Close usrp session if it is not managed by a session pool of the caller
+    if close_usrp_session:
+        usrp_session_pool.close_all()
@@ -24,8 +24,10 @@ from nptdms import TdmsFile
 import scipy.io
 
 # import other functions
-from lib import read_waveform_data_interface, run_mmWave_device
+from lib import run_mmWave_device
 from lib import sync_settings
+from lib.usrp_session_pool import UsrpSessionPool
+from lib.waveform_cache import waveform_cache
 
 # string to boolean
 def str2bool(v):
@@ -39,10 +41,89 @@ def str2bool(v):
         raise argparse.ArgumentTypeError("Boolean value expected.")
 
 
-def rf_replay_data_transmitter(args):
+# Upload waveform to the on-board memory of the replay block (== record the data)
+def upload_waveform_to_replay_memory(
+    replay_ctrl, tx_streamer, tx_data, replay_buff_addr, replay_buff_size, replay_chan
+):
+    tx_md = uhd.types.TXMetadata()
+    samples_to_replay = tx_data.shape[-1]
+    words_to_replay = int(replay_buff_size / replay_ctrl.get_word_size())
+
+    # ************************************************************************
+    # * Configure replay block
+    # ***********************************************************************
+    # Configure a buffer in the on-board memory at the given address that's equal in
+    # size to the file we want to play back (rounded down to a multiple of
+    # 64-bit words). Note that it is allowed to playback a different size or
+    # location from what was recorded.
+    print("")
+    print("Configuring replay block....")
+
+    replay_ctrl.record(replay_buff_addr, replay_buff_size, replay_chan)
+
+    # Display replay configuration
+    print(
+        f"Replay file size:      {replay_buff_size} bytes ({ words_to_replay} qwords, {samples_to_replay} samples)"
+    )
+    print(f"Record base address:0x {replay_ctrl.get_record_offset(replay_chan)}")
+    print(f"Record buffer size:    {replay_ctrl.get_record_size(replay_chan)}  bytes")
+    print(f"Record fullness:       {replay_ctrl.get_record_fullness(replay_chan)} bytes")
+
+    # Restart record buffer repeatedly until no new data appears on the Replay
+    # block's input. This will flush any data that was buffered on the input.
+    print("Emptying record buffer...")
+    fullness = 1
+    while fullness > 0:
+        replay_ctrl.record_restart(replay_chan)
+        # Make sure the record buffer doesn't start to fill again
+        start_time = time.time()
+        seconds_elapsed = 0
+        while seconds_elapsed < 0.250:
+            fullness = replay_ctrl.get_record_fullness(replay_chan)
+            end_time = time.time()
+            seconds_elapsed = end_time - start_time
+            if fullness != 0:
+                break
+
+    print(f"Record fullness:     {replay_ctrl.get_record_fullness(replay_chan)}  bytes")
+
+    # ************************************************************************
+    # * Send data to replay (== record the data)
+    # ************************************************************************
+    print("")
+    print("Sending data to be recorded...")
+
+    tx_md.start_of_burst = True
+    tx_md.end_of_burst = True
+
+    # We use a very big timeout here, any network buffering issue etc. is not
+    # a problem for this application, and we want to upload all the data in one
+    # send() call.
+    # num_tx_samps = tx_streamer.send(tx_data, samples_to_replay, tx_md, 5.0)
+    # Note: if samples_to_replay is used in the above function, we got error
+    print(tx_data.size)
+    num_tx_samps = tx_streamer.send(tx_data, tx_md, 5.0)
+    if num_tx_samps != samples_to_replay:
+        print(f"ERROR: Unable to send {samples_to_replay} samples (sent {num_tx_samps} )")
+
+    # ************************************************************************
+    # * Wait for data to be stored in on-board memory
+    # ************************************************************************
+    print("Waiting for recording to complete...")
+    while replay_ctrl.get_record_fullness(replay_chan) < replay_buff_size:
+        print(f"Record fullness: {replay_ctrl.get_record_fullness(replay_chan)}")
+        time.sleep(0.05)  # sleep for 50ms
+
+    print(f"Record fullness: {replay_ctrl.get_record_fullness(replay_chan)} bytes")
+
+
+def rf_replay_data_transmitter(args, usrp_session_pool=None, variation_sync=None, tx_idx=None):
     """
     Run Tx waveform playback
     """
+    # Sync with RX threads of this variation, without RX the transmission is stopped by the caller
+    if variation_sync is None:
+        variation_sync = sync_settings.VariationSync(num_txs=1)
 
     # Run mmwave devices first if exist
     if args.enable_mmwave:
@@ -61,59 +142,30 @@ def rf_replay_data_transmitter(args):
     # ************************************************************************
     # Create device and block controls
     # ************************************************************************
+    # Get RFNoC graph session from the pool: the device is opened and the graph is committed
+    # only once and reused across variations
     print("Creating the RFNoC graph with args: ", args.args)
-    graph = uhd.rfnoc.RfnocGraph(args.args)
-    # print("USRP Static connections:")
-    # for edge in graph.enumerate_static_connections():
-    #    print(edge.to_string())
-    # print("")
-
-    # Create handle for radio object
-    available_radios = graph.find_blocks("Radio")
-    print("Avaliable radios: ", len(available_radios))
-
-    radio_ctrl_id = uhd.rfnoc.BlockID(0, "Radio", args.radio_id)
-    radio_ctrl = uhd.rfnoc.RadioControl(graph.get_block(radio_ctrl_id))
-
-    # Check if the replay block exists on this device
-    replay_ctrl_id = uhd.rfnoc.BlockID(0, "Replay", args.replay_id)
-    if graph.has_block(replay_ctrl_id) == False:
-        print('Unable to find block "' + replay_ctrl_id + '"')
+    close_usrp_session = usrp_session_pool is None
+    if close_usrp_session:
+        usrp_session_pool = UsrpSessionPool()
+    tx_session = usrp_session_pool.get_rfnoc_graph_session(args.args)
+    if not tx_session.setup_replay_graph(
+        args.radio_id, args.radio_chan, args.replay_id, args.replay_chan, args.duc_id, args.duc_chan
+    ):
+        # release the RX threads waiting for this TX
+        variation_sync.cancel()
         return
-    replay_ctrl = uhd.rfnoc.ReplayBlockControl(graph.get_block(replay_ctrl_id))
-
-    # Check for a DUC connected to the radio
-    duc_ctrl_id = uhd.rfnoc.BlockID(0, "DUC", args.duc_id)
-    duc_ctrl = uhd.rfnoc.DucBlockControl(graph.get_block(duc_ctrl_id))
-
-    # Connect replay to radio
-    uhd.rfnoc.connect_through_blocks(
-        graph, replay_ctrl_id, args.replay_chan, radio_ctrl_id, args.radio_chan, False
-    )
-    # Connect DUC to radio
-    graph.connect(duc_ctrl_id, args.duc_chan, radio_ctrl_id, args.radio_chan, False)
-
-    print(f"Using Radio Block: {radio_ctrl_id}, channel {args.radio_chan}")
-    print(f"Using Replay Block: {replay_ctrl_id}, channel {args.replay_chan}")
-    print(f"Using DUC Block: {duc_ctrl_id}, channel {args.duc_chan}")
-    print("")
+    graph = tx_session.graph
+    radio_ctrl = tx_session.radio_ctrl
+    replay_ctrl = tx_session.replay_ctrl
+    duc_ctrl = tx_session.duc_ctrl
+    tx_streamer = tx_session.tx_streamer
 
     # ************************************************************************
-    # * Set up streamer to Replay block and commit graph
+    # * Set up streamer to Replay block
     # ************************************************************************
-    replay_ctrl.set_play_type("sc16", 0)
-    replay_ctrl.set_record_type("sc16", 0)
-    tx_md = uhd.types.TXMetadata()
-    cpu_format = "fc32"
-    wire_format = "sc16"
     num_ports = 1
 
-    print("Setting up graph...")
-    stream_args = uhd.usrp.StreamArgs(cpu_format, wire_format)
-    tx_streamer = graph.create_tx_streamer(num_ports, stream_args)
-    graph.connect(tx_streamer, 0, replay_ctrl.get_unique_id(), args.replay_chan)
-    graph.commit()
-
     # ************************************************************************
     # * Set up radio
     # ************************************************************************
@@ -123,16 +175,16 @@ def rf_replay_data_transmitter(args):
     # Set clock reference
     num_mboards = graph.get_num_mboards()
     print(f"Number of mboards: {num_mboards}")
-    graph.get_mb_controller(0).set_clock_source(args.clock_reference)
+    tx_session.set_clock_source(args.clock_reference)
 
-    # Set the center frequency
+    # Get the center frequency of radio and DUC
     print(f"Requesting TX Freq: {(args.freq / 1e6)} MHz...")
     if str2bool(args.enable_lo_offset):
         if abs(args.lo_offset) > args.bandwidth / 2 and abs(args.lo_offset) < (
             (args.max_RF_bandwidth - args.bandwidth) / 2
         ):
-            radio_ctrl.set_tx_frequency(args.freq + args.lo_offset, args.radio_chan)
-            duc_ctrl.set_freq(-args.lo_offset, args.duc_chan)
+            radio_freq = args.freq + args.lo_offset
+            duc_freq = -args.lo_offset
         else:
             raise Exception(
                 "ERROR: The absolute value of LO Frequency offset is:",
@@ -143,39 +195,46 @@ def rf_replay_data_transmitter(args):
                 (args.max_RF_bandwidth - args.bandwidth) / 2,
             )
     else:
-        radio_ctrl.set_tx_frequency(args.freq, args.radio_chan)
+        radio_freq = args.freq
+        duc_freq = 0.0
+    print(f"Requesting TX Rate: {(args.rate / 1e6) } Msps...")
+    print(f"Requesting TX Gain: {args.gain} dB...")
+    print(f"Requesting TX Bandwidth: {(args.bandwidth / 1e6)} MHz...")
+    print(f"Requesting TX Antenna: {(args.antenna)}")
+
+    # Set center frequency, sample rate, RF gain, analog front-end filter bandwidth and antenna
+    # Only the settings that changed compared to the previous variation are applied
+    is_radio_config_changed = tx_session.configure_tx(
+        args.radio_chan,
+        args.duc_chan,
+        radio_freq,
+        duc_freq,
+        args.rate,
+        args.gain,
+        args.antenna,
+        args.bandwidth if not isX4xx else None,
+    )
+
     coerced_tx_freq = radio_ctrl.get_tx_frequency(args.radio_chan)
     print(f"Actual TX Freq: {coerced_tx_freq/ 1e6}  MHz...")
     print(f"** TX Carrier Frequency Offset: {coerced_tx_freq - args.freq}  Hz...")
 
-    # Set the sample rate
-    print(f"Requesting TX Rate: {(args.rate / 1e6) } Msps...")
-    duc_ctrl.set_input_rate(args.rate, args.duc_chan)
     coerced_tx_rate = duc_ctrl.get_input_rate(args.duc_chan)
     print(f"Actual TX Rate: {(coerced_tx_rate / 1e6)} Msps...")
     print(f"** TX Sampling Rate Offset: {coerced_tx_rate - args.rate}  Sample per second...")
 
-    # Set the RF gain
-    print(f"Requesting TX Gain: {args.gain} dB...")
-    radio_ctrl.set_tx_gain(args.gain, args.radio_chan)
     coerced_tx_gain = radio_ctrl.get_tx_gain(args.radio_chan)
     print(f"Actual TX Gain: {coerced_tx_gain} dB...")
 
-    # Set the analog front-end filter bandwidth
-    print(f"Requesting TX Bandwidth: {(args.bandwidth / 1e6)} MHz...")
-    if not isX4xx:
-        radio_ctrl.set_tx_bandwidth(args.bandwidth, args.radio_chan)
     coerced_tx_bandwidth = radio_ctrl.get_tx_bandwidth(args.radio_chan)
     print(f"Actual TX Bandwidth: {coerced_tx_bandwidth / 1e6} MHz...")
     print("Note: Not all doughterboards support variable analog bandwidth")
 
-    # Set the antenna
-    print(f"Requesting TX Antenna: {(args.antenna)}")
-    radio_ctrl.set_tx_antenna(args.antenna, args.radio_chan)
     print(f"Actual TX Antenna: {radio_ctrl.get_tx_antenna(args.radio_chan)}")
 
-    # Allow for some setup time
-    time.sleep(100e-3)
+    # Allow for some setup time if radio config is changed
+    if is_radio_config_changed:
+        time.sleep(100e-3)
 
     # ************************************************************************
     # * Read the data to replay
@@ -190,22 +249,14 @@ def rf_replay_data_transmitter(args):
     sample_size = 4
 
     # Read waveform based on waveform format
+    # The waveform file is read only once, then it is taken from the waveform cache
+    tx_data_complex, waveform_properties = waveform_cache.get_waveform(
+        args.waveform_path, args.waveform_file_name, args.waveform_format
+    )
     if args.waveform_format == "tdms":  # args.file.endswith(".tdms"):
-        tx_data_complex, waveform_IQ_rate = read_waveform_data_interface.read_waveform_data_tdms(
-            args.waveform_path, args.waveform_file_name
-        )
+        waveform_IQ_rate = waveform_properties["waveform_IQ_rate"]
         if args.rate != waveform_IQ_rate:
             print("Note:The IQ Rate based on TDMS Waveform property should be: ", waveform_IQ_rate)
-    elif args.waveform_format == "matlab_ieee":
-        tx_data_complex = read_waveform_data_interface.read_waveform_data_matlab_ieee(
-            args.waveform_path, args.waveform_file_name
-        )
-    elif args.waveform_format == "matlab":
-        tx_data_complex = read_waveform_data_interface.read_waveform_data_matlab(
-            args.waveform_path, args.waveform_file_name
-        )
-    else:
-        raise Exception("ERROR: Unknown or not supported tx waveform format.")
 
     # Get the file size
     file_size = len(tx_data_complex) * sample_size
@@ -216,102 +267,78 @@ def rf_replay_data_transmitter(args):
     print("Max number of samples: ", tx_streamer.get_max_num_samps())
     print("Samples to replay: ", samples_to_replay)
 
-    # Read data into np buffer, rounded down to number of words
-    tx_data = np.tile(np.array(tx_data_complex, dtype=np.complex64), (num_ports, 1))
-
     # ************************************************************************
-    # * Configure replay block
+    # * Configure replay block and upload the waveform
     # ***********************************************************************
-    # Configure a buffer in the on-board memory at address 0 that's equal in
-    # size to the file we want to play back (rounded down to a multiple of
-    # 64-bit words). Note that it is allowed to playback a different size or
-    # location from what was recorded.
-    print("")
-    print("Configuring replay block....")
-
-    replay_buff_addr = 0
+    # Get a buffer in the on-board memory that's equal in size to the file we want to play back.
+    # Several waveforms are kept in the on-board memory, each at its own word-aligned buffer.
+    # The waveform is uploaded only if it is not in the on-board memory already,
+    # i.e. it is not uploaded again if only the frequency or gain is changed.
     replay_buff_size = int(samples_to_replay * sample_size)
-    replay_ctrl.record(replay_buff_addr, replay_buff_size, args.replay_chan)
-
-    # Display replay configuration
-    print(
-        f"Replay file size:      {replay_buff_size} bytes ({ words_to_replay} qwords, {samples_to_replay} samples)"
+    content_hash = waveform_properties["content_hash"]
+    replay_memory_allocator = tx_session.get_replay_memory_allocator()
+    replay_buff_addr, is_waveform_loaded = replay_memory_allocator.load(
+        content_hash,
+        replay_buff_size,
+        # Read data into np buffer, rounded down to number of words
+        lambda addr: upload_waveform_to_replay_memory(
+            replay_ctrl,
+            tx_streamer,
+            np.tile(tx_data_complex, (num_ports, 1)),
+            addr,
+            replay_buff_size,
+            args.replay_chan,
+        ),
     )
-    print(f"Record base address:0x {replay_ctrl.get_record_offset(args.replay_chan)}")
-    print(f"Record buffer size:    {replay_ctrl.get_record_size(args.replay_chan)}  bytes")
-    print(f"Record fullness:       {replay_ctrl.get_record_fullness(args.replay_chan)} bytes")
-
-    # Restart record buffer repeatedly until no new data appears on the Replay
-    # block's input. This will flush any data that was buffered on the input.
-    print("Emptying record buffer...")
-    fullness = 1
-    while fullness > 0:
-        replay_ctrl.record_restart(args.replay_chan)
-        # Make sure the record buffer doesn't start to fill again
-        start_time = time.time()
-        seconds_elapsed = 0
-        while seconds_elapsed < 0.250:
-            fullness = replay_ctrl.get_record_fullness(args.replay_chan)
-            end_time = time.time()
-            seconds_elapsed = end_time - start_time
-            if fullness != 0:
-                break
-
-    print(f"Record fullness:     {replay_ctrl.get_record_fullness(args.replay_chan)}  bytes")
-
-    # ************************************************************************
-    # * Send data to replay (== record the data)
-    # ************************************************************************
-    print("")
-    print("Sending data to be recorded...")
-
-    tx_md.start_of_burst = True
-    tx_md.end_of_burst = True
-
-    # We use a very big timeout here, any network buffering issue etc. is not
-    # a problem for this application, and we want to upload all the data in one
-    # send() call.
-    # num_tx_samps = tx_streamer.send(tx_data, samples_to_replay, tx_md, 5.0)
-    # Note: if samples_to_replay is used in the above function, we got error
-    print(tx_data.size)
-    num_tx_samps = tx_streamer.send(tx_data, tx_md, 5.0)
-    if num_tx_samps != samples_to_replay:
-        print(f"ERROR: Unable to send {samples_to_replay} samples (sent {num_tx_samps} )")
-
-    # ************************************************************************
-    # * Wait for data to be stored in on-board memory
-    # ************************************************************************
-    print("Waiting for recording to complete...")
-    while replay_ctrl.get_record_fullness(args.replay_chan) < replay_buff_size:
-        print(f"Record fullness: {replay_ctrl.get_record_fullness(args.replay_chan)}")
-        time.sleep(0.05)  # sleep for 50ms
-
-    print(f"Record fullness: {replay_ctrl.get_record_fullness(args.replay_chan)} bytes")
-
-    # ************************************************************************
-    # * Start replay of data
-    # ***********************************************************************
-    print("")
-    print("Starting Replay of Data ...")
-
-    # Replay the entire buffer over and over
-    repeat = True
-    print(f"Issuing replay command for {samples_to_replay} samples in continuous mode...")
-    time_spec = uhd.types.TimeSpec(0.0)
-    replay_ctrl.play(replay_buff_addr, replay_buff_size, args.replay_chan, time_spec, repeat)
+    if is_waveform_loaded:
+        print("")
+        print(f"Waveform is already in replay memory at address: {replay_buff_addr}, skip uploading.")
+    print(f"Replay memory usage: {replay_memory_allocator.get_stats()}")
+
+    # The waveform buffer is in use until the replay is stopped, it is released also if the replay fails,
+    # else it cannot be evicted for the lifetime of the pooled session
+    try:
+        # ************************************************************************
+        # * Start replay of data
+        # ***********************************************************************
+        print("")
+        print("Starting Replay of Data ...")
+
+        # Replay the entire buffer over and over
+        repeat = True
+        print(f"Issuing replay command for {samples_to_replay} samples in continuous mode...")
+        time_spec = uhd.types.TimeSpec(0.0)
+        # Timed start: wait until all TX and RX devices are configured and play at the common start time
+        is_started = True
+        if variation_sync.timed_start is not None:
+            start_time = variation_sync.wait_for_timed_start(tx_session)
+            is_started = start_time is not None
+            if is_started:
+                print(f"Timed start at device time: {start_time} s")
+                time_spec = uhd.types.TimeSpec(start_time)
+        if not is_started:
+            print("Timed start is cancelled, skip replay.")
+        else:
+            replay_ctrl.play(replay_buff_addr, replay_buff_size, args.replay_chan, time_spec, repeat)
 
-    # Send a command to start RX data acquisition
-    sync_settings.start_rx_data_acquisition_called = True
-    while sync_settings.stop_tx_signal_called == False:
-        time.sleep(0.05)  # sleep for 50ms
+            # Send a command to start RX data acquisition
+            variation_sync.set_tx_ready()
+            # Wait until RX data acquisition is done or this TX is stopped
+            variation_sync.wait_for_stop_tx_signal(tx_idx)
 
-    print("Stopping replay...")
-    replay_ctrl.stop(args.replay_chan)
+            print("Stopping replay...")
+            replay_ctrl.stop(args.replay_chan)
+    finally:
+        replay_memory_allocator.release(content_hash)
 
     # Stop the mmwave devices if exist
     if args.enable_mmwave:
         run_mmWave_device.deinit_mmwave_device(mmwave_up_down_converter_parameters.serial_number)
         run_mmWave_device.deinit_mmwave_device(mmwave_antenna_array_parameters.serial_number)
 
-    print("Letting device settle...")
-    time.sleep(0.05)  # sleep for 50ms
+    # Close RFNoC graph session if it is not managed by a session pool of the caller
+    # The device settles only after closing, a pooled session is reused by the next variation without delay
+    if close_usrp_session:
+        usrp_session_pool.close_all()
+        print("Letting device settle...")
+        time.sleep(0.05)  # sleep for 50ms
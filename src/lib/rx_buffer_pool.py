@@ -0,0 +1,168 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+RX Buffer Pool
+"""
+# Description:
+#   Preallocated pool of reusable RX record buffers.
+#   The buffers are allocated once in one page-aligned memory region and all pages are touched,
+#   so there is no memory allocation and no page fault per record. Optionally the memory is locked (mlock)
+#   to avoid paging during long campaigns.
+#   The recorder acquires a free buffer per record and the data writer releases it after writing.
+#   Metrics:
+#       -   hits: a free buffer is available when it is requested
+#       -   misses: the recorder waits until the data writer releases a buffer
+#       -   peak buffers in use and peak RSS of the process
+#
+import ctypes
+import ctypes.util
+import mmap
+import queue
+import threading
+import numpy as np
+
+# To print colours
+from termcolor import colored
+
+# resource is not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Get peak resident memory of the process in bytes, None if unknown
+def get_peak_rss_nbytes():
+    if resource is None:
+        return None
+    # ru_maxrss is given in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Define RX buffer pool
+class RxBufferPool:
+    """RX buffer pool class"""
+
+    def __init__(self, num_buffers, num_channels, num_samps, dtype=np.complex64, lock_memory=False):
+        if num_buffers < 1:
+            raise Exception("ERROR: Number of RX buffers should be at least one", num_buffers)
+        self.num_buffers = num_buffers
+        self.shape = (num_channels, num_samps)
+        self.dtype = np.dtype(dtype)
+        self.buffer_nbytes = num_channels * num_samps * self.dtype.itemsize
+        # each buffer starts at a page boundary
+        self.buffer_stride = -(-self.buffer_nbytes // mmap.PAGESIZE) * mmap.PAGESIZE
+        self.memory = mmap.mmap(-1, max(self.buffer_stride * num_buffers, mmap.PAGESIZE))
+        self.buffers = [
+            np.frombuffer(
+                self.memory,
+                dtype=self.dtype,
+                count=num_channels * num_samps,
+                offset=idx * self.buffer_stride,
+            ).reshape(self.shape)
+            for idx in range(num_buffers)
+        ]
+        # touch all pages once, to avoid page faults during data acquisition
+        for rx_data in self.buffers:
+            rx_data.fill(0)
+
+        self.is_memory_locked = False
+        if lock_memory:
+            self.is_memory_locked = self.lock_memory()
+
+        self.free_buffers = queue.Queue()
+        for idx in range(num_buffers):
+            self.free_buffers.put(idx)
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+
+    # Lock the memory of the pool to avoid paging, needs the proper memlock limit (ulimit -l)
+    def lock_memory(self):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            print(colored("Warning: Locking RX buffer memory is not supported on this platform", "red"))
+            return False
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        address = self.buffers[0].ctypes.data
+        if libc.mlock(ctypes.c_void_p(address), ctypes.c_size_t(len(self.memory))) != 0:
+            print(
+                colored("Warning: Locking RX buffer memory failed, errno:", "red"),
+                ctypes.get_errno(),
+            )
+            return False
+        return True
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.hits = 0
+            self.misses = 0
+            self.num_in_use = self.num_buffers - self.free_buffers.qsize()
+            self.peak_num_in_use = self.num_in_use
+
+    # Get a free buffer, wait until a buffer is released if all buffers are in use
+    def acquire(self):
+        try:
+            buffer_idx = self.free_buffers.get_nowait()
+            is_hit = True
+        except queue.Empty:
+            buffer_idx = self.free_buffers.get()
+            is_hit = False
+        with self.stats_lock:
+            if is_hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.num_in_use += 1
+            self.peak_num_in_use = max(self.peak_num_in_use, self.num_in_use)
+        return buffer_idx, self.buffers[buffer_idx]
+
+    def release(self, buffer_idx):
+        with self.stats_lock:
+            self.num_in_use -= 1
+        self.free_buffers.put(buffer_idx)
+
+    def is_compatible(self, num_buffers, num_channels, num_samps, dtype=np.complex64, lock_memory=False):
+        return (
+            self.num_buffers == num_buffers
+            and self.shape == (num_channels, num_samps)
+            and self.dtype == np.dtype(dtype)
+            and (self.is_memory_locked or not lock_memory)
+        )
+
+    def get_stats(self):
+        with self.stats_lock:
+            return {
+                "num_buffers": self.num_buffers,
+                "allocated_nbytes": len(self.memory),
+                "is_memory_locked": self.is_memory_locked,
+                "hits": self.hits,
+                "misses": self.misses,
+                "peak_num_in_use": self.peak_num_in_use,
+                "peak_in_use_nbytes": self.peak_num_in_use * self.buffer_nbytes,
+                "peak_rss_nbytes": get_peak_rss_nbytes(),
+            }
+
+    def print_stats(self):
+        stats = self.get_stats()
+        print(
+            "RX buffer pool: hits",
+            colored(stats["hits"], "green"),
+            ", misses",
+            colored(stats["misses"], "red" if stats["misses"] else "green"),
+            ", peak buffers in use",
+            colored(f"{stats['peak_num_in_use']}/{stats['num_buffers']}", "yellow"),
+            f"({stats['peak_in_use_nbytes'] / 1e6} MB)",
+        )
+        if stats["peak_rss_nbytes"] is not None:
+            print("Peak process memory:", colored(round(stats["peak_rss_nbytes"] / 1e6, 3), "yellow"), "MB")
+
+    def close(self):
+        if self.is_memory_locked:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"))
+            libc.munlock(ctypes.c_void_p(self.buffers[0].ctypes.data), ctypes.c_size_t(len(self.memory)))
+            self.is_memory_locked = False
+        # the memory is freed when the last view of the buffers is released
+        self.buffers = []
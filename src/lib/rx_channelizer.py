@@ -0,0 +1,161 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+RX Channelizer
+"""
+# Description:
+#   Split one wideband RX record into one narrowband stream per emitter, i.e. in the multi TX setups where one
+#   receiver sees several emitters at different frequencies. The channels are given by the TX configs:
+#       -   the record is shifted by the frequency offset of the TX to the RX center frequency
+#       -   it is filtered to the bandwidth of the TX waveform config and decimated by the largest integer factor
+#           that keeps this bandwidth with the given oversampling (polyphase FIR filter, scipy resample_poly)
+#       -   if the bandwidth does not allow decimation, it is only filtered: the stopband starts at the oversampled
+#           bandwidth, so the other emitters are removed at the RX rate
+#   The emitters have arbitrary frequencies and bandwidths, so each channel has its own mixer and filter instead
+#   of a uniform filter bank. The mixer and filter are vectorized over all samples and channels of the record,
+#   the filter design is cached and shared with the RX decimator.
+#   Each narrowband stream is written to its own SigMF files, annotated with its transmitter ID. It runs in the
+#   RX writer workers, so the acquisition loop is not delayed.
+#
+import copy
+import functools
+import numpy as np
+from scipy import signal
+
+# To print colours
+from termcolor import colored
+
+from lib import write_rx_recorded_data_in_sigmf
+from lib.rx_decimator import design_decimation_filter, DECIMATION_FILTER_ATTENUATION_DB
+from lib.rx_sample_format import sc16_to_complex64, complex64_to_sc16
+
+RX_CHANNELIZER_MODES = ["none", "per_emitter"]
+
+
+# Design low pass filter of a channel without decimation, the filter is cached
+# Passband: signal bandwidth, stopband: starts at the given frequency, at most the Nyquist frequency
+@functools.lru_cache(maxsize=32)
+def design_channel_filter(in_rate, bandwidth, stopband_freq):
+    stopband_freq = min(stopband_freq, in_rate / 2)
+    transition_width = stopband_freq - bandwidth / 2
+    if transition_width <= 0:
+        raise Exception("ERROR: Signal bandwidth of the channel should be below the RX rate", in_rate, bandwidth)
+    num_taps, beta = signal.kaiserord(DECIMATION_FILTER_ATTENUATION_DB, transition_width / (in_rate / 2))
+    # odd number of taps, so the filtered record is aligned with the received record
+    num_taps |= 1
+    return signal.firwin(num_taps, bandwidth / 2 + transition_width / 2, window=("kaiser", beta), fs=in_rate)
+
+
+# Define RX channelizer
+class RxChannelizer:
+    """RX channelizer class"""
+
+    def __init__(self, in_rate, rx_freq, txs_args, oversampling=1.25):
+        if oversampling <= 1:
+            raise Exception("ERROR: Oversampling of RX channelizer should be larger than one", oversampling)
+        self.in_rate = in_rate
+        self.channels = []
+        for tx_idx, tx_args in enumerate(txs_args):
+            # signal bandwidth of the waveform if given, else the TX bandwidth
+            bandwidth = tx_args.waveform_config.get("bandwidth", tx_args.bandwidth)
+            freq_offset = tx_args.freq - rx_freq
+            if bandwidth >= in_rate:
+                print(colored(f"Warning: Bandwidth of TX {tx_idx} is not below RX rate, it is skipped", "yellow"))
+                continue
+            if abs(freq_offset) + bandwidth / 2 > in_rate / 2:
+                print(colored(f"Warning: Signal of TX {tx_idx} is not fully in the RX band", "yellow"))
+            decimation_factor = max(int(in_rate // (bandwidth * oversampling)), 1)
+            if decimation_factor > 1:
+                filter_taps = design_decimation_filter(in_rate, in_rate / decimation_factor, bandwidth)
+            else:
+                filter_taps = design_channel_filter(in_rate, bandwidth, bandwidth * oversampling / 2)
+            self.channels.append(
+                {
+                    "transmitter_id": tx_idx,
+                    "freq_offset": freq_offset,
+                    "bandwidth": bandwidth,
+                    "decimation_factor": decimation_factor,
+                    "filter_taps": filter_taps,
+                }
+            )
+        # mixer of each channel, it is computed once for the largest record and shared by shorter records
+        self.mixers = [np.empty(0, dtype=np.complex64) for channel in self.channels]
+
+    # Get mixer that shifts the channel to zero frequency
+    def get_mixer(self, channel_idx, num_samps):
+        mixer = self.mixers[channel_idx]
+        if len(mixer) < num_samps:
+            phase_increment = -2 * np.pi * self.channels[channel_idx]["freq_offset"] / self.in_rate
+            mixer = np.exp(1j * phase_increment * np.arange(num_samps)).astype(np.complex64)
+            self.mixers[channel_idx] = mixer
+        return mixer[:num_samps]
+
+    # Split record of shape (channels, samples) into one record per emitter, the data type is kept
+    def channelize(self, rx_data):
+        is_sc16 = rx_data.dtype.fields is not None
+        if is_sc16:
+            rx_data = sc16_to_complex64(rx_data, 1.0)
+        channels_data = []
+        for channel_idx, channel in enumerate(self.channels):
+            mixed_data = rx_data * self.get_mixer(channel_idx, rx_data.shape[-1])
+            if channel["decimation_factor"] > 1:
+                channel_data = signal.resample_poly(
+                    mixed_data, 1, channel["decimation_factor"], axis=-1, window=channel["filter_taps"]
+                )
+            else:
+                # resample_poly does not filter without rate change, the channel filter removes the other emitters
+                channel_data = signal.fftconvolve(
+                    mixed_data, channel["filter_taps"][np.newaxis, :], mode="same", axes=-1
+                )
+            channel_data = channel_data.astype(np.complex64)
+            if is_sc16:
+                channel_data = complex64_to_sc16(channel_data, 1.0)
+            channels_data.append(channel_data)
+        return channels_data
+
+    # Get write function that writes the record of each emitter in addition to the wideband record
+    # Same arguments as the write function, the emitter records are written in SigMF format each to its own files
+    def wrap_write_function(self, write_function, keep_wideband=True):
+        def write_channelized_rx_data(
+            rx_data, rx_args, txs_args, general_config, idx, record_info=None, record_time=None
+        ):
+            if keep_wideband:
+                write_function(rx_data, rx_args, txs_args, general_config, idx, record_info, record_time)
+            for channel, channel_data in zip(self.channels, self.channelize(rx_data)):
+                transmitter_id = channel["transmitter_id"]
+                channel_rx_args = copy.copy(rx_args)
+                channel_rx_args.coerced_rx_freq = rx_args.coerced_rx_freq + channel["freq_offset"]
+                channel_rx_args.decimation_factor = channel["decimation_factor"]
+                channel_rx_args.captured_data_file_name = f"{rx_args.captured_data_file_name}tx{transmitter_id}-"
+                # the trigger annotations are detected on the wideband record
+                channel_record_info = {
+                    key: value for key, value in (record_info or {}).items() if key != "trigger_annotations"
+                }
+                channel_record_info["transmitter_id"] = str(transmitter_id)
+                write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf(
+                    channel_data,
+                    channel_rx_args,
+                    [txs_args[transmitter_id]],
+                    general_config,
+                    idx,
+                    channel_record_info,
+                    record_time,
+                )
+
+        return write_channelized_rx_data
+
+
+# Get RX channelizer of the RX channelizer mode given in general config
+# Return None if the channelizer is disabled or there is no TX
+def get_rx_channelizer(general_config, rx_rate, rx_freq, txs_args):
+    rx_channelizer_mode = general_config.get("rx_channelizer_mode", "none")
+    if rx_channelizer_mode not in RX_CHANNELIZER_MODES:
+        raise Exception("ERROR: Unknown RX channelizer mode", rx_channelizer_mode)
+    if rx_channelizer_mode == "none" or not txs_args:
+        return None
+    return RxChannelizer(
+        rx_rate, rx_freq, txs_args, float(general_config.get("rx_channelizer_oversampling", 1.25))
+    )
@@ -0,0 +1,127 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+RX Continuous Streamer
+"""
+# Description:
+#   Stream RX data continuously into preallocated record buffers of the RX buffer pool.
+#   A single continuous stream command is issued per variation and the records are carved out of
+#   the stream into the given record buffers. There is no re-tuning, no stream command and
+#   no memory allocation per record. Overflow and late counters are reported per record.
+#
+# Pre-requests: Install UHD with Python API enabled
+#
+import numpy as np
+import uhd
+
+
+# Get C-contiguous view of the first given number of samples per channel of the scratch buffer
+def get_contiguous_buffer(scratch_buffer, num_samps):
+    num_channels = scratch_buffer.shape[0]
+    return scratch_buffer.reshape(-1)[: num_channels * num_samps].reshape(num_channels, num_samps)
+
+
+# Receive samples into the record buffer from the given sample index on
+# UHD receives into C-contiguous buffers only, else it fills a temporary copy. The rest of a multi-channel record
+# is not contiguous, so it is received into the scratch buffer and copied into the record buffer.
+def recv_into_record(rx_streamer, rx_data, recv_samps, rx_metadata, timeout, scratch_buffer=None):
+    rx_data_left = rx_data[:, recv_samps:]
+    if rx_data_left.flags.c_contiguous:
+        return rx_streamer.recv(rx_data_left, rx_metadata, timeout)
+    if scratch_buffer is None:
+        scratch_buffer = np.empty((rx_data.shape[0], rx_streamer.get_max_num_samps()), dtype=rx_data.dtype)
+    recv_buffer = get_contiguous_buffer(scratch_buffer, min(scratch_buffer.shape[-1], rx_data_left.shape[-1]))
+    samps = rx_streamer.recv(recv_buffer, rx_metadata, timeout)
+    rx_data[:, recv_samps : recv_samps + samps] = recv_buffer[:, :samps]
+    return samps
+
+
+# Define continuous RX streamer
+class ContinuousRxStreamer:
+    """Continuous RX streamer class"""
+
+    def __init__(self, usrp, rx_streamer, channels, timeout=1.0, dtype=np.complex64):
+        self.usrp = usrp
+        self.rx_streamer = rx_streamer
+        self.channels = channels
+        self.timeout = timeout
+        self.rx_metadata = uhd.types.RXMetadata()
+        # scratch buffer to drop samples, i.e. during dwell time
+        self.scratch_buffer = np.empty(
+            (len(channels), rx_streamer.get_max_num_samps()), dtype=dtype
+        )
+        self.is_streaming = False
+
+    # Issue one continuous stream command
+    # If a start time (device time) is given, the stream starts at this time, i.e. for timed start
+    def start(self, start_time=None):
+        stream_cmd = uhd.types.StreamCMD(uhd.types.StreamMode.start_cont)
+        # Multiple channels should be started at the same time
+        stream_cmd.stream_now = len(self.channels) == 1 and start_time is None
+        if start_time is not None:
+            stream_cmd.time_spec = uhd.types.TimeSpec(start_time)
+        elif not stream_cmd.stream_now:
+            stream_cmd.time_spec = uhd.types.TimeSpec(
+                self.usrp.get_time_now().get_real_secs() + 0.05
+            )
+        self.rx_streamer.issue_stream_cmd(stream_cmd)
+        self.is_streaming = True
+
+    # Stop streaming and flush the remaining samples
+    def stop(self):
+        if not self.is_streaming:
+            return
+        stream_cmd = uhd.types.StreamCMD(uhd.types.StreamMode.stop_cont)
+        self.rx_streamer.issue_stream_cmd(stream_cmd)
+        while self.rx_streamer.recv(self.scratch_buffer, self.rx_metadata, 0.1):
+            pass
+        self.is_streaming = False
+
+    # Fill given record buffer from the stream
+    def recv_record(self, rx_data):
+        num_samps = rx_data.shape[-1]
+        record_info = {
+            "rx_streaming_mode": "continuous",
+            "rx_overflow_count": 0,
+            "rx_late_count": 0,
+        }
+        recv_samps = 0
+        while recv_samps < num_samps:
+            samps = recv_into_record(
+                self.rx_streamer, rx_data, recv_samps, self.rx_metadata, self.timeout, self.scratch_buffer
+            )
+            error_code = self.rx_metadata.error_code
+            if error_code == uhd.types.RXMetadataErrorCode.overflow:
+                record_info["rx_overflow_count"] += 1
+            elif error_code == uhd.types.RXMetadataErrorCode.late:
+                record_info["rx_late_count"] += 1
+            elif error_code == uhd.types.RXMetadataErrorCode.timeout:
+                print(self.rx_metadata.strerror())
+                break
+            elif error_code != uhd.types.RXMetadataErrorCode.none:
+                print(self.rx_metadata.strerror())
+            # get time stamp of first sample of the record
+            if recv_samps == 0 and samps and self.rx_metadata.has_time_spec:
+                record_info["rx_time_s"] = self.rx_metadata.time_spec.get_real_secs()
+            recv_samps += samps
+
+        record_info["rx_num_samps"] = recv_samps
+        return record_info
+
+    # Drop given number of samples from the stream, i.e. during dwell time
+    def skip_samps(self, num_samps):
+        max_num_samps = self.scratch_buffer.shape[-1]
+        skipped_samps = 0
+        while skipped_samps < num_samps:
+            samps = self.rx_streamer.recv(
+                get_contiguous_buffer(self.scratch_buffer, min(max_num_samps, num_samps - skipped_samps)),
+                self.rx_metadata,
+                self.timeout,
+            )
+            if self.rx_metadata.error_code == uhd.types.RXMetadataErrorCode.timeout:
+                break
+            skipped_samps += samps
+        return skipped_samps
@@ -0,0 +1,178 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+RX Data Compression
+"""
+# Description:
+#   Block compression of the RX recorded data. The raw data of a record is split into fixed-size chunks and
+#   each chunk is compressed independently, the file offset of each chunk is given by the chunk offset index
+#   in the metadata. Any sample range is read by decompressing only the chunks it covers.
+#   Supported codecs:
+#       -   zstd: needs the python package zstandard
+#       -   lz4: needs the python package lz4
+#       -   zlib: part of python, used if the selected codec is not installed
+#   The chunks of a record are compressed in parallel by a process-wide thread pool, the codecs release the
+#   GIL while compressing. It runs in the RX writer workers, so the acquisition loop is not delayed.
+#
+import os
+import time
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# To print colours
+from termcolor import colored
+
+# Optional codecs
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+# Extension of compressed data files, the data file is not a raw SigMF dataset
+COMPRESSED_DATA_FILE_EXTENSION = ".sigmf-cdata"
+RX_DATA_COMPRESSION_CODECS = ["none", "zstd", "lz4", "zlib"]
+
+
+# Check if the given codec is installed
+def is_codec_available(codec):
+    if codec == "zstd":
+        return zstandard is not None
+    if codec == "lz4":
+        return lz4 is not None
+    return codec == "zlib"
+
+
+# Compress one chunk with the given codec
+def compress_chunk(codec, level, chunk):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(chunk)
+    if codec == "lz4":
+        return lz4.frame.compress(chunk, compression_level=level)
+    if codec == "zlib":
+        return zlib.compress(chunk, level)
+    raise Exception("ERROR: Unknown RX data compression codec", codec)
+
+
+# Decompress one chunk with the given codec
+def decompress_chunk(codec, chunk):
+    if not is_codec_available(codec):
+        raise Exception("ERROR: RX data compression codec is not installed", codec)
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(chunk)
+    if codec == "lz4":
+        return lz4.frame.decompress(chunk)
+    return zlib.decompress(chunk)
+
+
+# Define chunk compressor
+class ChunkCompressor:
+    """Chunk compressor class"""
+
+    def __init__(self, codec="zstd", level=1, chunk_nbytes=1024 * 1024, num_workers=0):
+        if codec not in RX_DATA_COMPRESSION_CODECS[1:]:
+            raise Exception("ERROR: Unknown RX data compression codec", codec)
+        if not is_codec_available(codec):
+            print(colored(f"Warning: RX data compression codec {codec} is not installed, zlib is used", "yellow"))
+            codec = "zlib"
+        if chunk_nbytes < 1:
+            raise Exception("ERROR: Chunk size of RX data compression should be positive", chunk_nbytes)
+        self.codec = codec
+        self.level = level
+        self.chunk_nbytes = chunk_nbytes
+        self.num_workers = num_workers if num_workers > 0 else os.cpu_count() or 1
+        self.executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="rx_data_compression")
+
+    # Get global compression info of SigMF metadata, ratio and throughput (raw data) of the given sizes and time
+    def get_compression_info(self, raw_nbytes, compressed_nbytes, compression_time_s):
+        return {
+            "codec": self.codec,
+            "level": self.level,
+            "chunk_nbytes": self.chunk_nbytes,
+            "compression_ratio": raw_nbytes / max(compressed_nbytes, 1),
+            "compression_throughput_mbps": raw_nbytes / 1e6 / max(compression_time_s, 1e-9),
+        }
+
+    # Compress the given record into chunks
+    # Return the compressed chunks and the raw size, compressed size and compression time of the record
+    def compress_record(self, rx_data):
+        start_time = time.perf_counter()
+        raw_data = memoryview(np.ascontiguousarray(rx_data).reshape(-1).view(np.uint8))
+        chunks = list(
+            self.executor.map(
+                lambda chunk_start: compress_chunk(
+                    self.codec, self.level, raw_data[chunk_start : chunk_start + self.chunk_nbytes]
+                ),
+                range(0, len(raw_data), self.chunk_nbytes),
+            )
+        )
+        return chunks, {
+            "raw_nbytes": len(raw_data),
+            "compressed_nbytes": sum(len(chunk) for chunk in chunks),
+            "compression_time_s": time.perf_counter() - start_time,
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+# Process-wide chunk compressors, one per compression setting
+chunk_compressors = {}
+chunk_compressors_lock = threading.Lock()
+
+
+# Get chunk compressor of the RX data compression given in general config, None if compression is disabled
+def get_chunk_compressor(general_config):
+    codec = general_config.get("rx_data_compression", "none")
+    if codec not in RX_DATA_COMPRESSION_CODECS:
+        raise Exception("ERROR: Unknown RX data compression codec", codec)
+    if codec == "none":
+        return None
+    compressor_key = (
+        codec,
+        int(general_config.get("rx_compression_level", 1)),
+        int(general_config.get("rx_compression_chunk_size_kb", 1024)) * 1024,
+        int(general_config.get("rx_compression_num_workers", 0)),
+    )
+    with chunk_compressors_lock:
+        if compressor_key not in chunk_compressors:
+            chunk_compressors[compressor_key] = ChunkCompressor(*compressor_key)
+        return chunk_compressors[compressor_key]
+
+
+# Write compressed chunks to the given file at its current position
+# Return the chunk offset index: file offset of each chunk and the end offset of the last chunk
+def write_chunks(data_file, chunks):
+    chunk_offsets = [data_file.tell()]
+    for chunk in chunks:
+        data_file.write(chunk)
+        chunk_offsets.append(chunk_offsets[-1] + len(chunk))
+    return chunk_offsets
+
+
+# Read the given byte range of a compressed record, only the chunks of this range are decompressed
+def read_compressed_bytes(data_file, codec, chunk_nbytes, chunk_offsets, byte_start, nbytes):
+    if nbytes <= 0:
+        return b""
+    first_chunk = byte_start // chunk_nbytes
+    last_chunk = (byte_start + nbytes - 1) // chunk_nbytes
+    base_offset = chunk_offsets[first_chunk]
+    data_file.seek(base_offset)
+    compressed_data = data_file.read(chunk_offsets[last_chunk + 1] - base_offset)
+    raw_data = b"".join(
+        decompress_chunk(
+            codec,
+            compressed_data[chunk_offsets[chunk_idx] - base_offset : chunk_offsets[chunk_idx + 1] - base_offset],
+        )
+        for chunk_idx in range(first_chunk, last_chunk + 1)
+    )
+    offset = byte_start - first_chunk * chunk_nbytes
+    return raw_data[offset : offset + nbytes]
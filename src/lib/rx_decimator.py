@@ -0,0 +1,120 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+RX Decimator
+"""
+# Description:
+#   Bandwidth-matched decimation of the RX recorded data on the host, between data acquisition and writing.
+#   The RX rate is often far above the bandwidth of the emitters, i.e. the max TX rate or a rate that fits the
+#   master clock rate. The occupied bandwidth is given by the TX signals around the RX center frequency:
+#   bandwidth of the TX waveform config and offset of the TX frequency. Each record is decimated by the largest
+#   integer factor that keeps the occupied bandwidth with the given oversampling.
+#   The decimation is a polyphase FIR filter (scipy resample_poly), vectorized over all channels of the record.
+#   The filter is designed once per (input rate, output rate, bandwidth) and cached.
+#   The decimation runs in the RX writer workers, so the acquisition loop is not delayed.
+#
+import functools
+import numpy as np
+from scipy import signal
+
+from lib.rx_sample_format import sc16_to_complex64, complex64_to_sc16
+
+# Stopband attenuation of the decimation filter in dB
+DECIMATION_FILTER_ATTENUATION_DB = 60
+RX_DECIMATION_MODES = ["none", "signal_bandwidth"]
+
+
+# Design low pass filter of the decimation, the filter is cached
+# Passband: occupied bandwidth, stopband: starts where the output rate aliases into the passband
+@functools.lru_cache(maxsize=32)
+def design_decimation_filter(in_rate, out_rate, bandwidth):
+    transition_width = out_rate - bandwidth
+    if transition_width <= 0:
+        raise Exception("ERROR: Decimated rate should be larger than the signal bandwidth", out_rate, bandwidth)
+    num_taps, beta = signal.kaiserord(DECIMATION_FILTER_ATTENUATION_DB, transition_width / (in_rate / 2))
+    # odd number of taps, so the group delay is an integer number of samples
+    num_taps |= 1
+    return signal.firwin(num_taps, out_rate / 2, window=("kaiser", beta), fs=in_rate)
+
+
+# Get occupied bandwidth of all TX signals around the RX center frequency
+def get_occupied_bandwidth(rx_freq, txs_args):
+    occupied_bandwidth = 0.0
+    for tx_args in txs_args:
+        # signal bandwidth of the waveform if given, else the TX bandwidth
+        bandwidth = tx_args.waveform_config.get("bandwidth", tx_args.bandwidth)
+        occupied_bandwidth = max(occupied_bandwidth, 2 * abs(tx_args.freq - rx_freq) + bandwidth)
+    return occupied_bandwidth
+
+
+# Define RX decimator
+class RxDecimator:
+    """RX decimator class"""
+
+    def __init__(self, in_rate, decimation_factor, bandwidth):
+        if decimation_factor < 1:
+            raise Exception("ERROR: Decimation factor should be positive", decimation_factor)
+        self.in_rate = in_rate
+        self.decimation_factor = decimation_factor
+        self.out_rate = in_rate / decimation_factor
+        self.bandwidth = bandwidth
+        self.filter_taps = design_decimation_filter(in_rate, self.out_rate, bandwidth)
+
+    # Get number of samples of the decimated record
+    def get_num_out_samps(self, num_samps):
+        return -(-num_samps // self.decimation_factor)
+
+    # Decimate record of shape (channels, samples), the data type is kept
+    def decimate(self, rx_data):
+        is_sc16 = rx_data.dtype.fields is not None
+        if is_sc16:
+            rx_data = sc16_to_complex64(rx_data, 1.0)
+        rx_data_decimated = signal.resample_poly(
+            rx_data, 1, self.decimation_factor, axis=-1, window=self.filter_taps
+        ).astype(np.complex64)
+        if is_sc16:
+            rx_data_decimated = complex64_to_sc16(rx_data_decimated, 1.0)
+        return rx_data_decimated
+
+    # Get write function that decimates the record before it is written, same arguments as the write function
+    # The sample positions of the trigger annotations are given in decimated samples
+    def wrap_write_function(self, write_function):
+        def write_decimated_rx_data(
+            rx_data, rx_args, txs_args, general_config, idx, record_info=None, record_time=None
+        ):
+            if record_info and "trigger_annotations" in record_info:
+                record_info = dict(record_info)
+                record_info["trigger_annotations"] = [
+                    dict(
+                        trigger_annotation,
+                        sample_start=trigger_annotation["sample_start"] // self.decimation_factor,
+                        sample_count=self.get_num_out_samps(trigger_annotation["sample_count"]),
+                    )
+                    for trigger_annotation in record_info["trigger_annotations"]
+                ]
+            write_function(
+                self.decimate(rx_data), rx_args, txs_args, general_config, idx, record_info, record_time
+            )
+
+        return write_decimated_rx_data
+
+
+# Get RX decimator of the RX decimation mode given in general config
+# Return None if the decimation is disabled or the RX rate is too low to decimate
+def get_rx_decimator(general_config, rx_rate, rx_freq, txs_args):
+    rx_decimation_mode = general_config.get("rx_decimation_mode", "none")
+    if rx_decimation_mode not in RX_DECIMATION_MODES:
+        raise Exception("ERROR: Unknown RX decimation mode", rx_decimation_mode)
+    if rx_decimation_mode == "none" or not txs_args:
+        return None
+    bandwidth = get_occupied_bandwidth(rx_freq, txs_args)
+    oversampling = float(general_config.get("rx_decimation_oversampling", 1.25))
+    if oversampling <= 1:
+        raise Exception("ERROR: Oversampling of RX decimation should be larger than one", oversampling)
+    decimation_factor = int(rx_rate // (bandwidth * oversampling)) if bandwidth > 0 else 1
+    if decimation_factor < 2:
+        return None
+    return RxDecimator(rx_rate, decimation_factor, bandwidth)
@@ -0,0 +1,55 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+RX Sample Format
+"""
+# Description:
+#   Host sample formats of RX data acquisition (UHD CPU format) and their SigMF data types:
+#       -   fc32: complex float32, 8 bytes per sample, written as cf32_le
+#       -   sc16: complex int16, 4 bytes per sample, written as ci16_le
+#   With sc16, the samples are received and written the same way as the radio delivers them (wire format sc16),
+#   there is no conversion to float on the host. The RX buffers, the disk bandwidth and the file size are halved.
+#   UHD converts sc16 to fc32 with the scale factor 1/32767, this factor is written to the metadata, so the
+#   reader gets the same float values (full scale) as recorded with fc32.
+#
+import numpy as np
+
+# Complex int16 sample, the same memory layout as UHD sc16 and SigMF ci16_le
+SC16_DTYPE = np.dtype([("re", "<i2"), ("im", "<i2")])
+# Scale factor of UHD to convert sc16 to fc32
+SC16_SCALE_FACTOR = 1.0 / 32767
+# Key of the scale factor in the global SigMF metadata, float sample = integer sample * scale factor
+SAMPLE_SCALE_FACTOR_KEY = "sample_scale_factor"
+
+# RX sample formats: numpy data type, SigMF data type and scale factor to full scale
+RX_SAMPLE_FORMATS = {
+    "fc32": {"dtype": np.dtype(np.complex64), "sigmf_datatype": "cf32_le", "scale_factor": 1.0},
+    "sc16": {"dtype": SC16_DTYPE, "sigmf_datatype": "ci16_le", "scale_factor": SC16_SCALE_FACTOR},
+}
+
+
+# Get RX sample format of given CPU format
+def get_rx_sample_format(cpu_format):
+    if cpu_format not in RX_SAMPLE_FORMATS:
+        raise Exception("ERROR: Unknown RX sample format", cpu_format)
+    return RX_SAMPLE_FORMATS[cpu_format]
+
+
+# Convert complex int16 samples to complex64, the integer samples are multiplied by the scale factor
+def sc16_to_complex64(rx_data, scale_factor=SC16_SCALE_FACTOR):
+    rx_data_complex = np.empty(rx_data.shape, dtype=np.complex64)
+    rx_data_complex.real = rx_data["re"]
+    rx_data_complex.imag = rx_data["im"]
+    rx_data_complex *= np.float32(scale_factor)
+    return rx_data_complex
+
+
+# Convert complex64 samples to complex int16 with the same rounding and clipping as UHD
+def complex64_to_sc16(rx_data, scale_factor=SC16_SCALE_FACTOR):
+    rx_data_sc16 = np.empty(rx_data.shape, dtype=SC16_DTYPE)
+    rx_data_sc16["re"] = np.clip(np.rint(rx_data.real / scale_factor), -32768, 32767)
+    rx_data_sc16["im"] = np.clip(np.rint(rx_data.imag / scale_factor), -32768, 32767)
+    return rx_data_sc16
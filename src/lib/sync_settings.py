@@ -7,19 +7,133 @@
 TX and Rx Data Acquisition Sync
 """
 # Description:
-#   define global variables to sync between Tx and Rx start and stop execution
+#   Sync between Tx and Rx start and stop execution.
+#   A sync object is created per variation and given to all TX and RX threads of this variation.
+#   The threads wait on a condition variable instead of polling global flags, so a handshake is done
+#   as soon as the state is changed. It supports:
+#       -   RX start trigger: start RX data acquisition if any TX or if all TXs are ready (on the air)
+#       -   TX stop: stop all TXs if all RXs are done, or stop a single TX
+#       -   timeouts and cancellation, i.e. if a TX or RX thread fails, all waiting threads are released
+#       -   optional hardware-timed start of all TX and RX devices at a common time, see timed_start
+#   The global flag to stop the RX data acquisition from outside the API is kept.
 #
+import threading
 
+# RX start trigger options
+RX_START_TRIGGERS = ["any_tx_ready", "all_txs_ready"]
 
-def init():
-    # start Rx data acquisition if TX signal is on the air
-    global start_rx_data_acquisition_called
-    start_rx_data_acquisition_called = False
-
-    # stop TX data transmission if RX data acquisition is done
-    global stop_tx_signal_called
-    stop_tx_signal_called = False
 
+def init():
     # stop API external
     global external_stop_rx_data_acquisition_called
     external_stop_rx_data_acquisition_called = False
+
+
+# Define sync of TX and RX threads of one variation
+class VariationSync:
+    """Variation sync class"""
+
+    def __init__(self, num_txs=0, num_rxs=0, rx_start_trigger="any_tx_ready", timed_start=None):
+        if rx_start_trigger not in RX_START_TRIGGERS:
+            raise Exception("ERROR: Unknown RX start trigger", rx_start_trigger)
+        self.num_txs = num_txs
+        self.num_rxs = num_rxs
+        self.rx_start_trigger = rx_start_trigger
+        self.condition = threading.Condition()
+        self.num_ready_txs = 0
+        self.num_done_rxs = 0
+        # start Rx data acquisition if TX signal is on the air, no trigger required if there is no TX
+        self.start_rx_data_acquisition_called = num_txs == 0
+        # stop TX data transmission if RX data acquisition is done
+        self.stop_tx_signal_called = False
+        self.stopped_txs = set()
+        self.cancelled = False
+        # hardware-timed start of all TX and RX devices, None: start immediately
+        self.timed_start = timed_start
+
+    # TX signal is on the air
+    def set_tx_ready(self):
+        with self.condition:
+            self.num_ready_txs += 1
+            if self.rx_start_trigger == "any_tx_ready" or self.num_ready_txs >= self.num_txs:
+                self.start_rx_data_acquisition_called = True
+                self.condition.notify_all()
+
+    # Start RX data acquisition without waiting for the TXs
+    def start_rx_data_acquisition(self):
+        with self.condition:
+            self.start_rx_data_acquisition_called = True
+            self.condition.notify_all()
+
+    # Wait until RX data acquisition can start
+    # Return False if the variation is cancelled or the timeout is expired
+    def wait_for_start_rx_data_acquisition(self, timeout=None):
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.start_rx_data_acquisition_called or self.cancelled, timeout
+            )
+            return self.start_rx_data_acquisition_called and not self.cancelled
+
+    # RX data acquisition is done, stop TX data transmission if all RXs are done
+    def set_rx_done(self):
+        with self.condition:
+            self.num_done_rxs += 1
+            if self.num_done_rxs >= self.num_rxs:
+                self.stop_tx_signal_called = True
+                self.condition.notify_all()
+
+    # Stop the given TX, or all TXs if no TX index is given
+    def stop_tx_signal(self, tx_idx=None):
+        with self.condition:
+            if tx_idx is None:
+                self.stop_tx_signal_called = True
+            else:
+                self.stopped_txs.add(tx_idx)
+            self.condition.notify_all()
+
+    def is_tx_stop_called(self, tx_idx=None):
+        return self.stop_tx_signal_called or self.cancelled or tx_idx in self.stopped_txs
+
+    # Wait until the given TX should stop data transmission
+    # Return False if the timeout is expired
+    def wait_for_stop_tx_signal(self, tx_idx=None, timeout=None):
+        with self.condition:
+            return self.condition.wait_for(lambda: self.is_tx_stop_called(tx_idx), timeout)
+
+    # Wait until all TX and RX devices are configured and get the common start time in seconds (device time)
+    # Return None if the variation is cancelled or the timeout is expired
+    def wait_for_timed_start(self, session, timeout=None):
+        if self.cancelled:
+            return None
+        return self.timed_start.wait_for_start_time(session, timeout)
+
+    # Cancel the variation, all waiting TX and RX threads are released
+    def cancel(self):
+        with self.condition:
+            self.cancelled = True
+            self.condition.notify_all()
+        if self.timed_start is not None:
+            self.timed_start.abort()
+
+    def is_cancelled(self):
+        return self.cancelled
+
+    def get_status(self):
+        with self.condition:
+            return {
+                "start_rx_data_acquisition_called": self.start_rx_data_acquisition_called,
+                "stop_tx_signal_called": self.stop_tx_signal_called,
+                "num_ready_txs": self.num_ready_txs,
+                "num_done_rxs": self.num_done_rxs,
+                "cancelled": self.cancelled,
+            }
+
+
+# Run the TX or RX function of a variation, cancel the variation if it fails
+# so other threads of this variation do not wait forever
+def run_with_variation_sync(variation_sync, target, *args, **kwargs):
+    try:
+        target(*args, variation_sync=variation_sync, **kwargs)
+    except BaseException:
+        variation_sync.cancel()
+        raise
@@ -0,0 +1,94 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Timed Start
+"""
+# Description:
+#   Hardware-timed synchronous start of TX waveform playback and RX data acquisition across several USRPs.
+#   The device time of all USRPs is aligned once per session:
+#       -   pps: the time is set to zero at the same PPS edge on all devices, needs a shared PPS and reference
+#           (clock reference: external or gpsdo)
+#       -   host: the time is set to zero from the host on each device, the devices are aligned within host jitter
+#   Per variation, all TX and RX threads wait until all devices are configured, then a common start time
+#   in the future is scheduled. The replay block starts playing and the RX stream starts at this time,
+#   so the start is not delayed by host thread jitter.
+#
+# Pre-requests: Install UHD with Python API enabled
+#
+import time
+import threading
+import uhd
+
+# Device time sources to align the device time
+DEVICE_TIME_SOURCES = ["pps", "host"]
+# Period of PPS signal in seconds
+PPS_PERIOD_S = 1.0
+
+
+# Align device time of all given timekeepers, the device time is set to zero
+def align_device_time(timekeepers, device_time_source):
+    if device_time_source == "pps":
+        # wait for a PPS edge, then set the time at the next PPS edge on all devices
+        # so all devices are set at the same edge
+        last_pps_time = timekeepers[0].get_time_last_pps().get_real_secs()
+        start_time = time.time()
+        while timekeepers[0].get_time_last_pps().get_real_secs() == last_pps_time:
+            if time.time() - start_time > 1.1 * PPS_PERIOD_S:
+                raise Exception("ERROR: No PPS signal is detected to align the device time")
+            time.sleep(0.01 * PPS_PERIOD_S)
+        for timekeeper in timekeepers:
+            timekeeper.set_time_next_pps(uhd.types.TimeSpec(0.0))
+        # wait until the time is set at the next PPS edge
+        time.sleep(1.1 * PPS_PERIOD_S)
+    elif device_time_source == "host":
+        for timekeeper in timekeepers:
+            timekeeper.set_time_now(uhd.types.TimeSpec(0.0))
+    else:
+        raise Exception("ERROR: Unknown device time source", device_time_source)
+
+
+# Define timed start of TX and RX devices of one variation
+class TimedStart:
+    """Timed start class"""
+
+    def __init__(self, num_devices, start_delay, device_time_source="pps"):
+        if device_time_source not in DEVICE_TIME_SOURCES:
+            raise Exception("ERROR: Unknown device time source", device_time_source)
+        self.start_delay = start_delay
+        self.device_time_source = device_time_source
+        self.sessions = []
+        self.lock = threading.Lock()
+        # the start time is scheduled by the last device that is ready
+        self.barrier = threading.Barrier(num_devices, action=self.schedule_start_time)
+        self.start_time = None
+
+    # Align the device time if a session is not aligned yet, i.e. a new or reopened session,
+    # then schedule the start time in the future of all devices
+    def schedule_start_time(self):
+        if not all(session.is_time_aligned for session in self.sessions):
+            align_device_time(
+                [session.get_timekeeper() for session in self.sessions], self.device_time_source
+            )
+            for session in self.sessions:
+                session.is_time_aligned = True
+        time_now = max(
+            session.get_timekeeper().get_time_now().get_real_secs() for session in self.sessions
+        )
+        self.start_time = time_now + self.start_delay
+
+    # Wait until all devices are ready and get the common start time in seconds (device time)
+    # Return None if the timed start is aborted or the timeout is expired
+    def wait_for_start_time(self, session, timeout=None):
+        with self.lock:
+            self.sessions.append(session)
+        try:
+            self.barrier.wait(timeout)
+        except threading.BrokenBarrierError:
+            return None
+        return self.start_time
+
+    def abort(self):
+        self.barrier.abort()
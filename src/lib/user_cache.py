@@ -0,0 +1,22 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+User Cache
+"""
+# Description:
+#   Folder of the caches of the API in the user cache folder (XDG_CACHE_HOME or ~/.cache), outside of the
+#   source tree, i.e. the parsed config cache and the waveform config index.
+#
+import os
+
+# Folder of the API in the user cache folder
+USER_CACHE_DIR_NAME = "rf_data_recording_api"
+
+
+# Get folder of the given cache of the API in the user cache folder
+def get_user_cache_dir(cache_name: str):
+    user_cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(user_cache_dir, USER_CACHE_DIR_NAME, cache_name)
@@ -0,0 +1,384 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+USRP Session Pool
+"""
+# Description:
+#   Keep the USRP sessions open across all variations of the API execution.
+#   Each device is opened once and its session is reused by all variations. Only the RF settings
+#   (frequency, gain, rate, antenna, ...) that changed compared to the previous variation are applied.
+#   A device is reopened only if the session type (MultiUSRP or RFNoC graph) or the device args
+#   (i.e. master clock rate) changed, since the master clock rate cannot be changed after opening the session.
+#
+# Pre-requests: Install UHD with Python API enabled
+#
+import threading
+import numpy as np
+import uhd
+from lib.rx_buffer_pool import RxBufferPool
+from lib.replay_memory_allocator import ReplayMemoryAllocator
+from lib.rx_continuous_streamer import recv_into_record
+
+
+# Get the device key from device args
+# The master clock rate is derived per variation, so it is not part of the device identity
+def get_device_key(args):
+    args_list = [
+        arg.strip()
+        for arg in args.split(",")
+        if arg.strip() and not arg.strip().startswith("master_clock_rate=")
+    ]
+    return ",".join(sorted(args_list))
+
+
+# Define base class of USRP session
+class UsrpSession:
+    """USRP session base class"""
+
+    def __init__(self, args):
+        self.args = args
+        self.clock_source = None
+        # last applied settings per channel, used to apply only the changed settings
+        self.applied_settings = {}
+        # device time is aligned to the other devices for timed start, see timed_start
+        self.is_time_aligned = False
+
+    # Apply setting only if it is changed compared to the last applied value
+    def set_if_changed(self, channel, name, value, setter):
+        channel_settings = self.applied_settings.setdefault(channel, {})
+        if name in channel_settings and channel_settings[name] == value:
+            return False
+        setter(value)
+        channel_settings[name] = value
+        return True
+
+    def close(self):
+        self.applied_settings = {}
+
+
+# Define MultiUSRP session: used for RX data acquisition and to get the HW info
+class MultiUsrpSession(UsrpSession):
+    """MultiUSRP session class"""
+
+    def __init__(self, args):
+        super().__init__(args)
+        self.usrp = uhd.usrp.MultiUSRP(args)
+        # rx streamers per (channels, cpu format, wire format)
+        self.rx_streamers = {}
+        self.rx_buffer_pool = None
+
+    def set_clock_source(self, clock_source):
+        if self.clock_source != clock_source:
+            self.usrp.set_clock_source(clock_source)
+            self.clock_source = clock_source
+
+    # Get device time control, MultiUSRP supports get/set time itself
+    def get_timekeeper(self):
+        return self.usrp
+
+    def get_rx_stream(self, channels, cpu_format="fc32", wire_format="sc16"):
+        streamer_key = (tuple(channels), cpu_format, wire_format)
+        if streamer_key not in self.rx_streamers:
+            st_args = uhd.usrp.StreamArgs(cpu_format, wire_format)
+            st_args.channels = list(channels)
+            self.rx_streamers[streamer_key] = self.usrp.get_rx_stream(st_args)
+        return self.rx_streamers[streamer_key]
+
+    # Get RX buffer pool, it is reused by all variations with the same record shape
+    def get_rx_buffer_pool(self, num_buffers, num_channels, num_samps, lock_memory=False, dtype=np.complex64):
+        if self.rx_buffer_pool is not None:
+            if self.rx_buffer_pool.is_compatible(
+                num_buffers, num_channels, num_samps, dtype=dtype, lock_memory=lock_memory
+            ):
+                self.rx_buffer_pool.reset_stats()
+                return self.rx_buffer_pool
+            self.rx_buffer_pool.close()
+        self.rx_buffer_pool = RxBufferPool(
+            num_buffers, num_channels, num_samps, dtype=dtype, lock_memory=lock_memory
+        )
+        return self.rx_buffer_pool
+
+    # Configure RX RF chain, only changed settings are applied
+    def configure_rx(self, channels, freq, rate, gain, antenna, bandwidth=None):
+        is_changed = False
+        for chan in channels:
+            is_changed |= self.set_if_changed(
+                chan, "antenna", antenna, lambda value: self.usrp.set_rx_antenna(value, chan)
+            )
+            if bandwidth is not None:
+                is_changed |= self.set_if_changed(
+                    chan, "bandwidth", bandwidth, lambda value: self.usrp.set_rx_bandwidth(value, chan)
+                )
+            is_changed |= self.set_if_changed(
+                chan, "rate", rate, lambda value: self.usrp.set_rx_rate(value, chan)
+            )
+            is_changed |= self.set_if_changed(
+                chan,
+                "freq",
+                freq,
+                lambda value: self.usrp.set_rx_freq(uhd.types.TuneRequest(value), chan),
+            )
+            is_changed |= self.set_if_changed(
+                chan, "gain", gain, lambda value: self.usrp.set_rx_gain(value, chan)
+            )
+        return is_changed
+
+    # Receive given number of samples without re-tuning the RF chain
+    # The samples are received into the given record buffer if any, i.e. from the RX buffer pool
+    # If a start time (device time) is given, the stream starts at this time, i.e. for timed start
+    # The time stamp of the first sample is added to the given record info if any
+    def recv_num_samps(
+        self,
+        rx_streamer,
+        num_samps,
+        channels,
+        rx_data=None,
+        start_time=None,
+        record_info=None,
+        dtype=np.complex64,
+    ):
+        if rx_data is None:
+            rx_data = np.empty((len(channels), num_samps), dtype=dtype)
+        rx_metadata = uhd.types.RXMetadata()
+
+        stream_cmd = uhd.types.StreamCMD(uhd.types.StreamMode.num_done)
+        stream_cmd.num_samps = num_samps
+        # Multiple channels should be started at the same time
+        stream_cmd.stream_now = len(channels) == 1 and start_time is None
+        if start_time is not None:
+            stream_cmd.time_spec = uhd.types.TimeSpec(start_time)
+        elif not stream_cmd.stream_now:
+            stream_cmd.time_spec = uhd.types.TimeSpec(
+                self.usrp.get_time_now().get_real_secs() + 0.05
+            )
+        rx_streamer.issue_stream_cmd(stream_cmd)
+
+        recv_samps = 0
+        while recv_samps < num_samps:
+            samps = recv_into_record(rx_streamer, rx_data, recv_samps, rx_metadata, 1.0)
+            if rx_metadata.error_code != uhd.types.RXMetadataErrorCode.none:
+                print(rx_metadata.strerror())
+                if rx_metadata.error_code == uhd.types.RXMetadataErrorCode.timeout:
+                    break
+            if record_info is not None and recv_samps == 0 and samps and rx_metadata.has_time_spec:
+                record_info["rx_time_s"] = rx_metadata.time_spec.get_real_secs()
+            recv_samps += samps
+
+        return rx_data[:, :recv_samps]
+
+    def close(self):
+        super().close()
+        self.rx_streamers = {}
+        if self.rx_buffer_pool is not None:
+            self.rx_buffer_pool.close()
+            self.rx_buffer_pool = None
+        self.usrp = None
+
+
+# Define RFNoC graph session: used for TX waveform playback via replay block
+class RfnocGraphSession(UsrpSession):
+    """RFNoC graph session class"""
+
+    def __init__(self, args):
+        super().__init__(args)
+        self.graph = uhd.rfnoc.RfnocGraph(args)
+        self.replay_graph_config = None
+        self.radio_ctrl = None
+        self.replay_ctrl = None
+        self.duc_ctrl = None
+        self.tx_streamer = None
+        # waveforms stored in the on-board memory of the replay block
+        self.replay_memory_allocator = None
+
+    # Create block controls, connect Replay -> DUC -> Radio and commit graph
+    # The graph can be committed only once per session, so it is done for the first variation only
+    def setup_replay_graph(self, radio_id, radio_chan, replay_id, replay_chan, duc_id, duc_chan):
+        replay_graph_config = (radio_id, radio_chan, replay_id, replay_chan, duc_id, duc_chan)
+        if self.replay_graph_config is not None:
+            if self.replay_graph_config != replay_graph_config:
+                raise Exception(
+                    "ERROR: RFNoC graph is already committed with a different block config",
+                    self.replay_graph_config,
+                )
+            return True
+
+        # Create handle for radio object
+        available_radios = self.graph.find_blocks("Radio")
+        print("Avaliable radios: ", len(available_radios))
+
+        radio_ctrl_id = uhd.rfnoc.BlockID(0, "Radio", radio_id)
+        radio_ctrl = uhd.rfnoc.RadioControl(self.graph.get_block(radio_ctrl_id))
+
+        # Check if the replay block exists on this device
+        replay_ctrl_id = uhd.rfnoc.BlockID(0, "Replay", replay_id)
+        if self.graph.has_block(replay_ctrl_id) == False:
+            print('Unable to find block "' + replay_ctrl_id.to_string() + '"')
+            return False
+        replay_ctrl = uhd.rfnoc.ReplayBlockControl(self.graph.get_block(replay_ctrl_id))
+
+        # Check for a DUC connected to the radio
+        duc_ctrl_id = uhd.rfnoc.BlockID(0, "DUC", duc_id)
+        duc_ctrl = uhd.rfnoc.DucBlockControl(self.graph.get_block(duc_ctrl_id))
+
+        # Connect replay to radio
+        uhd.rfnoc.connect_through_blocks(
+            self.graph, replay_ctrl_id, replay_chan, radio_ctrl_id, radio_chan, False
+        )
+        # Connect DUC to radio
+        self.graph.connect(duc_ctrl_id, duc_chan, radio_ctrl_id, radio_chan, False)
+
+        print(f"Using Radio Block: {radio_ctrl_id}, channel {radio_chan}")
+        print(f"Using Replay Block: {replay_ctrl_id}, channel {replay_chan}")
+        print(f"Using DUC Block: {duc_ctrl_id}, channel {duc_chan}")
+        print("")
+
+        # Set up streamer to Replay block and commit graph
+        replay_ctrl.set_play_type("sc16", 0)
+        replay_ctrl.set_record_type("sc16", 0)
+        cpu_format = "fc32"
+        wire_format = "sc16"
+        num_ports = 1
+
+        print("Setting up graph...")
+        stream_args = uhd.usrp.StreamArgs(cpu_format, wire_format)
+        tx_streamer = self.graph.create_tx_streamer(num_ports, stream_args)
+        self.graph.connect(tx_streamer, 0, replay_ctrl.get_unique_id(), replay_chan)
+        self.graph.commit()
+
+        self.radio_ctrl = radio_ctrl
+        self.replay_ctrl = replay_ctrl
+        self.duc_ctrl = duc_ctrl
+        self.tx_streamer = tx_streamer
+        self.replay_graph_config = replay_graph_config
+        return True
+
+    # Get allocator of the replay block memory, it is created once the replay graph is set up
+    def get_replay_memory_allocator(self):
+        if self.replay_memory_allocator is None:
+            self.replay_memory_allocator = ReplayMemoryAllocator(
+                self.replay_ctrl.get_mem_size(), self.replay_ctrl.get_word_size()
+            )
+        return self.replay_memory_allocator
+
+    # Get device time control of the first motherboard
+    def get_timekeeper(self):
+        return self.graph.get_mb_controller(0).get_timekeeper(0)
+
+    def set_clock_source(self, clock_source):
+        if self.clock_source != clock_source:
+            self.graph.get_mb_controller(0).set_clock_source(clock_source)
+            self.clock_source = clock_source
+
+    # Configure TX RF chain, only changed settings are applied
+    def configure_tx(
+        self, radio_chan, duc_chan, radio_freq, duc_freq, rate, gain, antenna, bandwidth=None
+    ):
+        radio_ctrl = self.radio_ctrl
+        duc_ctrl = self.duc_ctrl
+        is_changed = False
+        is_changed |= self.set_if_changed(
+            radio_chan,
+            "radio_freq",
+            radio_freq,
+            lambda value: radio_ctrl.set_tx_frequency(value, radio_chan),
+        )
+        is_changed |= self.set_if_changed(
+            ("duc", duc_chan),
+            "duc_freq",
+            duc_freq,
+            lambda value: duc_ctrl.set_freq(value, duc_chan),
+        )
+        is_changed |= self.set_if_changed(
+            ("duc", duc_chan),
+            "rate",
+            rate,
+            lambda value: duc_ctrl.set_input_rate(value, duc_chan),
+        )
+        is_changed |= self.set_if_changed(
+            radio_chan, "gain", gain, lambda value: radio_ctrl.set_tx_gain(value, radio_chan)
+        )
+        if bandwidth is not None:
+            is_changed |= self.set_if_changed(
+                radio_chan,
+                "bandwidth",
+                bandwidth,
+                lambda value: radio_ctrl.set_tx_bandwidth(value, radio_chan),
+            )
+        is_changed |= self.set_if_changed(
+            radio_chan,
+            "antenna",
+            antenna,
+            lambda value: radio_ctrl.set_tx_antenna(value, radio_chan),
+        )
+        return is_changed
+
+    def close(self):
+        super().close()
+        # streamer and block controls should be released before the graph
+        self.tx_streamer = None
+        self.radio_ctrl = None
+        self.replay_ctrl = None
+        self.duc_ctrl = None
+        self.replay_graph_config = None
+        self.replay_memory_allocator = None
+        self.graph = None
+
+
+# Define USRP session pool
+class UsrpSessionPool:
+    """USRP session pool class: sessions are keyed by device args"""
+
+    def __init__(self):
+        self.sessions = {}
+        self.device_locks = {}
+        self.lock = threading.Lock()
+
+    # Get lock of given device, devices can be opened in parallel by different threads
+    def get_device_lock(self, device_key):
+        with self.lock:
+            if device_key not in self.device_locks:
+                self.device_locks[device_key] = threading.Lock()
+            return self.device_locks[device_key]
+
+    # Get session of the given type, open the device only if it is not opened with the same args
+    def get_session(self, session_class, args):
+        device_key = get_device_key(args)
+        with self.get_device_lock(device_key):
+            session = self.sessions.get(device_key)
+            if session is not None:
+                if isinstance(session, session_class) and session.args == args:
+                    return session
+                # session type or master clock rate changed, reopen the device
+                print("Reopen USRP session with args: ", args)
+                session.close()
+                del self.sessions[device_key]
+            print("Open USRP session with args: ", args)
+            session = session_class(args)
+            self.sessions[device_key] = session
+            return session
+
+    def get_multi_usrp_session(self, args):
+        return self.get_session(MultiUsrpSession, args)
+
+    def get_rfnoc_graph_session(self, args):
+        return self.get_session(RfnocGraphSession, args)
+
+    # Close session of given device
+    def close_session(self, args):
+        device_key = get_device_key(args)
+        with self.get_device_lock(device_key):
+            session = self.sessions.pop(device_key, None)
+            if session is not None:
+                session.close()
+
+    # Close all sessions, called at the end of the API execution
+    def close_all(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions = {}
+        for session in sessions:
+            session.close()
+        print("Closed all USRP sessions: ", len(sessions))
@@ -0,0 +1,96 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Variation Pipeline
+"""
+# Description:
+#   Prepare the next variations on a background thread while the current variation is recording.
+#   The preparation of a variation does not access the devices: create the TX and RX configs, read the
+#   waveform config, load the waveform into the waveform cache, update the rates and calculate the
+#   master clock rate. Only the device configuration (retune) and the data acquisition remain on the
+#   critical path of each variation.
+#   The variations are given in order, the prepared variations are returned in the same order.
+#   Pipeline depth: number of variations prepared in advance, 0: prepare each variation when it is executed
+#
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# To print colours
+from termcolor import colored
+
+
+# Define variation pipeline
+class VariationPipeline:
+    """Variation pipeline class"""
+
+    def __init__(self, prepare_function, pipeline_depth=1):
+        if pipeline_depth < 0:
+            raise Exception("ERROR: Variation pipeline depth should not be negative", pipeline_depth)
+        self.prepare_function = prepare_function
+        self.pipeline_depth = pipeline_depth
+        # stats in seconds
+        self.prepare_time_s = 0.0
+        self.wait_time_s = 0.0
+        self.num_variations = 0
+
+    # Prepare a variation and measure the preparation time
+    def prepare(self, iteration_config):
+        start_time = time.perf_counter()
+        prepared_variation = self.prepare_function(iteration_config)
+        self.prepare_time_s += time.perf_counter() - start_time
+        return prepared_variation
+
+    # Get each variation with its prepared data, the next variations are prepared in background
+    def run(self, variations):
+        if self.pipeline_depth == 0:
+            for iteration_config in variations:
+                start_time = time.perf_counter()
+                prepared_variation = self.prepare(iteration_config)
+                self.wait_time_s += time.perf_counter() - start_time
+                self.num_variations += 1
+                yield iteration_config, prepared_variation
+            return
+
+        variations_iter = iter(variations)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="variation_prepare")
+
+        # keep the given number of variations in preparation
+        def fill_pipeline():
+            while len(pending) < self.pipeline_depth:
+                iteration_config = next(variations_iter, None)
+                if iteration_config is None:
+                    break
+                pending.append((iteration_config, executor.submit(self.prepare, iteration_config)))
+
+        try:
+            fill_pipeline()
+            while pending:
+                iteration_config, future = pending.popleft()
+                start_time = time.perf_counter()
+                prepared_variation = future.result()
+                self.wait_time_s += time.perf_counter() - start_time
+                # prepare the next variations while this one is executed
+                fill_pipeline()
+                self.num_variations += 1
+                yield iteration_config, prepared_variation
+        finally:
+            # the pending preparations are dropped if the execution is stopped
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def print_stats(self):
+        print(
+            "Variation pipeline: depth",
+            self.pipeline_depth,
+            ", prepared variations",
+            self.num_variations,
+            ", preparation time",
+            colored(round(self.prepare_time_s, 3), "yellow"),
+            "s, waiting time on critical path",
+            colored(round(self.wait_time_s, 3), "yellow"),
+            "s",
+        )
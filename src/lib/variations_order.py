@@ -0,0 +1,148 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Variations Order
+"""
+# Description:
+#   Reorder the variations of a sweep to reduce the time spent for expensive transitions between two
+#   consecutive variations, i.e. LO retune and PLL settling, master clock rate change, mmWave beamformer
+#   reconfiguration or waveform upload. Each parameter has a transition cost given by the cost model.
+#   The variations are ordered:
+#       -   by nesting the parameters from the most expensive (changes slowest) to the cheapest (changes fastest)
+#       -   in reflected mixed-radix Gray code order, so exactly one parameter changes between two consecutive
+#           variations and there is no jump back to the first value of a parameter
+#   For a cross product with a constant transition cost per parameter, this order has the minimum total
+#   transition cost over all nesting orders. The order is lazy as well, a variation is computed on demand.
+#   The index of each variation in the cross product (config order) is kept, so it is recorded in the metadata.
+#
+
+# Transition cost of a parameter, the parameter name is matched by the longest suffix
+# Parameters that are not in the cost model have the default cost
+DEFAULT_RETUNE_COST_MODEL = {
+    "default": 1,
+    "gain": 1,
+    "antenna": 2,
+    # waveform upload to the replay memory
+    "waveform_file_name": 5,
+    "waveform_path": 5,
+    # LO retune and PLL settling
+    "freq": 10,
+    "lo_offset": 10,
+    "enable_lo_offset": 10,
+    # may change the master clock rate, the session is reopened
+    "rate": 20,
+    "clock_reference": 50,
+    # mmWave beamformer and up down converter reconfiguration
+    "beamformer_config_mode": 10,
+    "beam_gain_db": 10,
+    "beam_angle_elevation_deg": 10,
+    "beam_angle_azimuth_deg": 10,
+    "rf_frequency": 20,
+    "if_frequency": 20,
+    "lo_frequency": 20,
+}
+
+
+# Get transition cost of the given parameter
+def get_parameter_cost(parameter, cost_model):
+    matches = [name for name in cost_model if name != "default" and parameter.endswith(name)]
+    if not matches:
+        return cost_model.get("default", 1)
+    return cost_model[max(matches, key=len)]
+
+
+# Get total transition cost of all variations in config order (cross product order)
+# In config order, a parameter changes every time one of the slower parameters changes
+def get_config_order_cost(variations_product, cost_model):
+    total_cost = 0
+    num_prefix_variations = 1
+    for parameter, values in zip(variations_product.columns, variations_product.column_values):
+        num_prefix_variations *= len(values)
+        if len(values) > 1:
+            total_cost += get_parameter_cost(parameter, cost_model) * (num_prefix_variations - 1)
+    return total_cost
+
+
+# Define lazy variation indexes in Gray code order
+class GrayCodeOrderIndexes:
+    """Gray code order indexes class"""
+
+    def __init__(self, column_order, radices, strides, positions=None):
+        # columns from the slowest to the fastest one, with their number of values and cross product stride
+        self.column_order = column_order
+        self.radices = radices
+        self.strides = strides
+        num_variations = 1
+        for radix in radices:
+            num_variations *= radix
+        self.positions = range(num_variations) if positions is None else positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    # Get the variation index in the cross product of the given position in Gray code order
+    def get_product_index(self, position):
+        # mixed-radix digits of the position, the slowest column first
+        digits = []
+        for radix in reversed(self.radices):
+            position, digit = divmod(position, radix)
+            digits.append(digit)
+        digits.reverse()
+        # reflect the digit if the number given by the slower digits is odd
+        product_idx = 0
+        prefix = 0
+        for digit, radix, stride in zip(digits, self.radices, self.strides):
+            value_idx = digit if prefix % 2 == 0 else radix - 1 - digit
+            product_idx += value_idx * stride
+            prefix = prefix * radix + digit
+        return product_idx
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return GrayCodeOrderIndexes(self.column_order, self.radices, self.strides, self.positions[key])
+        return self.get_product_index(self.positions[key])
+
+    def __iter__(self):
+        for position in self.positions:
+            yield self.get_product_index(position)
+
+    # Get total transition cost, exactly one parameter changes between two consecutive variations
+    def get_cost(self, columns, cost_model):
+        total_cost = 0
+        num_prefix_variations = 1
+        for column_idx, radix in zip(self.column_order, self.radices):
+            total_cost += get_parameter_cost(columns[column_idx], cost_model) * num_prefix_variations * (radix - 1)
+            num_prefix_variations *= radix
+        return total_cost
+
+
+# Get cost model, the given costs replace the default costs of the same parameters
+def get_retune_cost_model(user_cost_model=None):
+    cost_model = dict(DEFAULT_RETUNE_COST_MODEL)
+    if user_cost_model:
+        cost_model.update(user_cost_model)
+    return cost_model
+
+
+# Get the variations in order of minimum transition cost, the given variations product is not changed
+def order_variations_by_retune_cost(variations_product, cost_model=DEFAULT_RETUNE_COST_MODEL):
+    if len(variations_product) != variations_product.num_product_variations:
+        raise Exception("ERROR: Only the full variations product can be reordered", len(variations_product))
+    # most expensive parameter first, parameters with a single value never change
+    column_order = sorted(
+        (
+            column_idx
+            for column_idx, values in enumerate(variations_product.column_values)
+            if len(values) > 1
+        ),
+        key=lambda column_idx: -get_parameter_cost(variations_product.columns[column_idx], cost_model),
+    )
+    product_indexes = GrayCodeOrderIndexes(
+        column_order,
+        [len(variations_product.column_values[column_idx]) for column_idx in column_order],
+        [variations_product.strides[column_idx] for column_idx in column_order],
+    )
+    return variations_product.get_view(product_indexes)
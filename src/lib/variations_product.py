@@ -0,0 +1,140 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Variations Product
+"""
+# Description:
+#   Lazy cross product of all parameter variations. Only the list of values of each parameter is stored,
+#   the variations are not materialized. A variation is computed on demand from its index in the cross product
+#   by mixed-radix decoding, so the memory is O(parameters) instead of O(variations).
+#   The order of variations is the same as the order of a cross merge of all parameters, one after the other:
+#   the first parameter changes slowest and the last parameter changes fastest.
+#   It supports:
+#       -   len(), iteration, random access by index and slicing, slices are lazy as well
+#       -   iloc[i] and column access by parameter name, the same way as the former data frame
+#   Each variation is given as pandas Series indexed by parameter name, its name is the variation index
+#   in the cross product.
+#
+import pandas as pd
+
+
+# Define variations product
+class VariationsProduct:
+    """Variations product class"""
+
+    def __init__(self, variations_dict):
+        if not variations_dict:
+            raise Exception("ERROR: No parameter variations are given")
+        self.columns = []
+        self.column_values = []
+        for parameter, values in variations_dict.items():
+            # numpy arrays keep the same value types as the columns of a data frame
+            values = pd.Series(values).to_numpy()
+            if len(values) == 0:
+                raise Exception("ERROR: No values are given for parameter", parameter)
+            self.columns.append(parameter)
+            self.column_values.append(values)
+        self.update_strides()
+        # variation indexes in the cross product, it is a range unless the variations are reordered
+        self.product_indexes = range(self.num_product_variations)
+
+    # Calculate the mixed-radix strides, the last parameter has the stride one
+    def update_strides(self):
+        self.strides = [1] * len(self.column_values)
+        stride = 1
+        for i in range(len(self.column_values) - 1, -1, -1):
+            self.strides[i] = stride
+            stride *= len(self.column_values[i])
+        self.num_product_variations = stride
+
+    def __len__(self):
+        return len(self.product_indexes)
+
+    # Get value index of each parameter of given variation index in the cross product
+    def get_value_indexes(self, product_idx):
+        return [
+            (product_idx // stride) % len(values)
+            for stride, values in zip(self.strides, self.column_values)
+        ]
+
+    # Get variation by its index in the cross product
+    def get_product_variation(self, product_idx):
+        values = [
+            column_values[value_idx]
+            for column_values, value_idx in zip(self.column_values, self.get_value_indexes(product_idx))
+        ]
+        return pd.Series(values, index=self.columns, dtype=object, name=product_idx)
+
+    # Get a lazy copy with the given variation indexes, the parameter values are shared
+    def get_view(self, product_indexes):
+        view = VariationsProduct.__new__(VariationsProduct)
+        view.columns = list(self.columns)
+        view.column_values = list(self.column_values)
+        view.strides = list(self.strides)
+        view.num_product_variations = self.num_product_variations
+        view.product_indexes = product_indexes
+        return view
+
+    def __getitem__(self, key):
+        # parameter name: list of all values of this parameter
+        if isinstance(key, str):
+            return self.column_values[self.columns.index(key)]
+        if isinstance(key, slice):
+            return self.get_view(self.product_indexes[key])
+        return self.get_product_variation(self.product_indexes[key])
+
+    def __iter__(self):
+        for product_idx in self.product_indexes:
+            yield self.get_product_variation(product_idx)
+
+    # The same indexing as the former data frame, variations_product.iloc[i]
+    @property
+    def iloc(self):
+        return self
+
+    # Add a parameter with a single value to all variations, the number of variations is not changed
+    def add_constant_column(self, parameter, value):
+        if parameter in self.columns:
+            raise Exception("ERROR: Parameter is already in the variations product", parameter)
+        self.columns.append(parameter)
+        self.column_values.append(pd.Series([value]).to_numpy())
+        self.update_strides()
+
+    # Replace the list of values of a parameter, the number of values is not changed
+    def set_column_values(self, parameter, values):
+        column_idx = self.columns.index(parameter)
+        values = pd.Series(values).to_numpy()
+        if len(values) != len(self.column_values[column_idx]):
+            raise Exception(
+                "ERROR: The number of values of parameter is changed",
+                parameter,
+                len(values),
+            )
+        self.column_values[column_idx] = values
+
+    # Materialize the given variations as data frame, mainly for printing
+    def to_data_frame(self, product_indexes=None):
+        if product_indexes is None:
+            product_indexes = self.product_indexes
+        return pd.DataFrame(
+            [self.get_product_variation(product_idx) for product_idx in product_indexes],
+            columns=self.columns,
+            index=list(product_indexes),
+        )
+
+    # Print only the first and last variations, like a data frame
+    def __str__(self, num_head_rows=5):
+        num_variations = len(self)
+        if num_variations <= 2 * num_head_rows:
+            data_frame_str = str(self.to_data_frame())
+        else:
+            head = self.to_data_frame(self.product_indexes[:num_head_rows])
+            tail = self.to_data_frame(self.product_indexes[-num_head_rows:])
+            data_frame_str = str(pd.concat([head, tail]))
+        return data_frame_str + f"\n\n[{num_variations} variations x {len(self.columns)} parameters]"
+
+    def __repr__(self):
+        return self.__str__()
@@ -0,0 +1,124 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Waveform Cache
+"""
+# Description:
+#   Process-wide cache of TX waveforms. Each waveform file is read and converted to complex64 once,
+#   then it is shared by all variations and all transmitters.
+#   A waveform is identified by (path, name, format, modification time), so a changed waveform file is read again
+#   and replaces the cached version of the old file.
+#   The least recently used waveforms are evicted if the total size exceeds the cache size.
+#   A content hash is computed once per waveform, so the transmitter can check if the waveform is already
+#   in the replay memory of a device without comparing the waveform data.
+#
+import os
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+
+# To print colours
+from termcolor import colored
+
+from lib import read_waveform_data_interface
+
+# Default cache size in bytes
+DEFAULT_WAVEFORM_CACHE_NBYTES = 1024 * 1024 * 1024
+
+
+# Define waveform cache
+class WaveformCache:
+    """Waveform cache class"""
+
+    def __init__(self, max_nbytes=DEFAULT_WAVEFORM_CACHE_NBYTES):
+        self.max_nbytes = max_nbytes
+        self.waveforms = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+        self.load_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def set_max_nbytes(self, max_nbytes):
+        with self.lock:
+            self.max_nbytes = max_nbytes
+            self.evict()
+
+    # Get waveform data and its properties, read the waveform file only if it is not in cache
+    # The waveform data is shared, it should not be changed by the caller
+    def get_waveform(self, waveform_path, waveform_file_name, waveform_format):
+        waveform_file_path = read_waveform_data_interface.get_waveform_data_file_path(
+            waveform_path, waveform_file_name, waveform_format
+        )
+        if not os.path.exists(waveform_file_path):
+            raise Exception("ERROR: Waveform file is not exist", waveform_file_path)
+        key = (
+            os.path.abspath(waveform_path),
+            waveform_file_name,
+            waveform_format,
+            os.stat(waveform_file_path).st_mtime_ns,
+        )
+        # The same waveform is read only once if it is requested by several transmitters at the same time
+        with self.lock:
+            load_lock = self.load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self.lock:
+                if key in self.waveforms:
+                    self.waveforms.move_to_end(key)
+                    self.hits += 1
+                    self.load_locks.pop(key, None)
+                    return self.waveforms[key]
+                self.misses += 1
+
+            tx_data_complex, waveform_properties = read_waveform_data_interface.read_waveform_data(
+                waveform_path, waveform_file_name, waveform_format
+            )
+            tx_data_complex.flags.writeable = False
+            # content hash of the waveform, used to check if it is already in the replay memory of a device
+            waveform_properties["content_hash"] = hashlib.sha1(tx_data_complex.view(np.uint8)).hexdigest()
+            waveform = (tx_data_complex, waveform_properties)
+
+            with self.lock:
+                # the waveform file is changed, its old version is not used anymore
+                for old_key in [old_key for old_key in self.waveforms if old_key[:3] == key[:3]]:
+                    self.nbytes -= self.waveforms.pop(old_key)[0].nbytes
+                self.waveforms[key] = waveform
+                self.nbytes += tx_data_complex.nbytes
+                self.evict()
+                self.load_locks.pop(key, None)
+            return waveform
+
+    # Evict least recently used waveforms, the last used waveform is kept even if it exceeds the cache size
+    def evict(self):
+        while self.nbytes > self.max_nbytes and len(self.waveforms) > 1:
+            _, (tx_data_complex, _) = self.waveforms.popitem(last=False)
+            self.nbytes -= tx_data_complex.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.waveforms.clear()
+            self.nbytes = 0
+
+    def print_stats(self):
+        with self.lock:
+            print(
+                "Waveform cache: hits",
+                colored(self.hits, "green"),
+                ", misses",
+                colored(self.misses, "yellow"),
+                ", evictions",
+                colored(self.evictions, "yellow"),
+                ", cached waveforms",
+                len(self.waveforms),
+                f"({round(self.nbytes / 1e6, 3)} MB)",
+            )
+
+
+# Process-wide waveform cache
+waveform_cache = WaveformCache()
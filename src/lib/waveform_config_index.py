@@ -0,0 +1,252 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Waveform Config Index
+"""
+# Description:
+#   On-disk index of the waveform configs (RFWS, YAML, CSV), so a waveform config is parsed only once.
+#   Each entry is keyed by waveform (format, path, name) and keeps the modification time and size of all
+#   source files of the config, i.e. the RFWS file and the TDMS file that gives the sample rate, and of
+#   the files used to parse it, i.e. the wireless link parameter map.
+#   If a source file is changed, the entry is invalid and the waveform config is parsed again.
+#   The entry key has the content hash of the parser modules, so a waveform config is parsed again after a code
+#   change. Entries of other parser modules are dropped on load.
+#   Reading a waveform config is a dictionary lookup as long as the waveform files are not changed.
+#   The index is stored as JSON file, numpy scalars are stored with their type, so a waveform config read
+#   from the index is the same as a parsed one.
+#   The index can be built in advance by scanning a waveforms folder, otherwise it is filled on first use.
+#   The index file is stored in the user cache folder, outside of the source tree.
+#
+import os
+import copy
+import json
+import hashlib
+import threading
+import numpy as np
+
+# To print colours
+from termcolor import colored
+
+from lib.user_cache import get_user_cache_dir
+
+# Version of the index file, to be increased if the entries are changed
+WAVEFORM_CONFIG_INDEX_VERSION = 2
+# Modules that parse the waveform configs and encode them in the index
+dir_path = os.path.dirname(__file__)
+WAVEFORM_CONFIG_PARSER_MODULES = [
+    os.path.join(dir_path, module_file)
+    for module_file in [
+        "read_waveform_config_interface.py",
+        "read_waveform_data_interface.py",
+        "data_format_conversion_lib.py",
+        "wireless_link_parameter_map.py",
+        "waveform_config_index.py",
+    ]
+]
+
+
+# Get default index file in the user cache folder
+def get_default_waveform_config_index_file():
+    return os.path.join(get_user_cache_dir("waveform_config_index"), "waveform_config_index.json")
+
+
+# Get content hash of the parser modules
+def get_parser_hash(parser_files):
+    parser_hash = hashlib.sha1()
+    for parser_file in parser_files:
+        parser_hash.update(os.path.basename(parser_file).encode())
+        with open(parser_file, "rb") as file:
+            parser_hash.update(file.read())
+    return parser_hash.hexdigest()[:16]
+
+
+# Get source files of the waveform config of given waveform format
+def get_waveform_config_source_files(waveform_path, waveform_file_name, waveform_format):
+    if waveform_format == "tdms":
+        # RFWS config, the sample rate is given in the TDMS waveform file
+        return [
+            os.path.join(waveform_path, waveform_file_name + ".rfws"),
+            os.path.join(waveform_path, waveform_file_name + ".tdms"),
+        ]
+    elif waveform_format == "matlab":
+        return [os.path.join(waveform_path, waveform_file_name + ".yaml")]
+    elif waveform_format == "matlab_ieee":
+        return [os.path.join(waveform_path, waveform_file_name, "cfg.csv")]
+    else:
+        raise Exception("ERROR: Unsupported waveform format", waveform_format)
+
+
+# Get modification time and size of source files, None if a file does not exist
+def get_source_files_stat(source_files):
+    sources_stat = []
+    for source_file in source_files:
+        try:
+            file_stat = os.stat(source_file)
+        except OSError:
+            return None
+        sources_stat.append([os.path.abspath(source_file), file_stat.st_mtime_ns, file_stat.st_size])
+    return sources_stat
+
+
+# Encode numpy scalars with their type, so they can be restored from JSON
+def encode_value(value):
+    if isinstance(value, dict):
+        return {key: encode_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if isinstance(value, np.generic):
+        return {"__numpy__": value.dtype.str, "value": value.item()}
+    return value
+
+
+def decode_value(value):
+    if isinstance(value, dict):
+        if "__numpy__" in value:
+            return np.dtype(value["__numpy__"]).type(value["value"])
+        return {key: decode_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    return value
+
+
+# Define waveform config index
+class WaveformConfigIndex:
+    """Waveform config index class"""
+
+    # index_file_path: index file, the default index file in the user cache folder if not given
+    # parser_files: modules that parse the waveform configs, the modules of the API if not given
+    def __init__(self, index_file_path=None, parser_files=None):
+        self.index_file_path = index_file_path
+        self.parser_files = WAVEFORM_CONFIG_PARSER_MODULES if parser_files is None else parser_files
+        self.parser_hash = None
+        self.entries = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.is_saving_failed = False
+
+    # Load the index file once, an unreadable or outdated index is rebuilt
+    def load(self):
+        if self.entries is not None:
+            return
+        self.entries = {}
+        if self.index_file_path is None:
+            self.index_file_path = get_default_waveform_config_index_file()
+        self.parser_hash = get_parser_hash(self.parser_files)
+        if not os.path.exists(self.index_file_path):
+            return
+        try:
+            with open(self.index_file_path, "r") as file:
+                index = json.load(file)
+            if index.get("version") == WAVEFORM_CONFIG_INDEX_VERSION:
+                self.entries = {
+                    key: entry
+                    for key, entry in index["waveforms"].items()
+                    if key.startswith(self.parser_hash + ":")
+                }
+        except (OSError, ValueError, KeyError):
+            print(colored("Warning: Waveform config index is not readable, it is rebuilt", "yellow"))
+
+    # Write the index to a temporary file first, so a stopped API run does not leave a broken index
+    def save(self):
+        temp_file_path = self.index_file_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_file_path), exist_ok=True)
+            with open(temp_file_path, "w") as file:
+                json.dump({"version": WAVEFORM_CONFIG_INDEX_VERSION, "waveforms": self.entries}, file)
+            os.replace(temp_file_path, self.index_file_path)
+        except OSError as error:
+            # the index is still used in memory
+            if not self.is_saving_failed:
+                print(colored("Warning: Waveform config index cannot be saved: " + str(error), "yellow"))
+            self.is_saving_failed = True
+
+    # Get waveform config from index, or parse it by the given read function and add it to the index
+    # read_waveform_config: function(waveform_path, waveform_file_name, waveform_format) -> waveform config
+    # dependency_files: other files used to parse the waveform config, i.e. the wireless link parameter map
+    # The returned waveform config is a copy, the caller can change it
+    def get_waveform_config(
+        self,
+        waveform_path,
+        waveform_file_name,
+        waveform_format,
+        read_waveform_config,
+        dependency_files=None,
+        save=True,
+    ):
+        sources_stat = get_source_files_stat(
+            get_waveform_config_source_files(waveform_path, waveform_file_name, waveform_format)
+            + list(dependency_files or [])
+        )
+        with self.lock:
+            self.load()
+            key = (
+                f"{self.parser_hash}:{waveform_format}:"
+                f"{os.path.join(os.path.abspath(waveform_path), waveform_file_name)}"
+            )
+            entry = self.entries.get(key)
+            if sources_stat is not None and entry is not None and entry["sources"] == sources_stat:
+                self.hits += 1
+                return decode_value(entry["waveform_config_src"])
+            self.misses += 1
+
+        # a missing source file is reported by the read function
+        waveform_config_src = read_waveform_config(waveform_path, waveform_file_name, waveform_format)
+        if sources_stat is not None:
+            with self.lock:
+                self.entries[key] = {
+                    "sources": sources_stat,
+                    "waveform_config_src": encode_value(waveform_config_src),
+                }
+                if save:
+                    self.save()
+        return copy.deepcopy(waveform_config_src)
+
+    # Scan a waveforms folder and add the config of each waveform to the index
+    def scan(self, waveforms_dir, read_waveform_config, dependency_files=None):
+        num_waveforms = 0
+        for root, dirs, files in os.walk(waveforms_dir):
+            waveforms = []
+            for file_name in files:
+                name, extension = os.path.splitext(file_name)
+                if extension == ".rfws" and name + ".tdms" in files:
+                    waveforms.append((root, name, "tdms"))
+                elif extension == ".yaml" and name + ".mat" in files:
+                    waveforms.append((root, name, "matlab"))
+            if "cfg.csv" in files and "sbb_str.mat" in files:
+                waveforms.append((os.path.dirname(root), os.path.basename(root), "matlab_ieee"))
+            for waveform_path, waveform_file_name, waveform_format in waveforms:
+                try:
+                    self.get_waveform_config(
+                        waveform_path,
+                        waveform_file_name,
+                        waveform_format,
+                        read_waveform_config,
+                        dependency_files,
+                        save=False,
+                    )
+                    num_waveforms += 1
+                except Exception as error:
+                    print(colored(f"Warning: Waveform config of {waveform_file_name} is skipped: {error}", "yellow"))
+        with self.lock:
+            self.load()
+            self.save()
+        return num_waveforms
+
+    def print_stats(self):
+        with self.lock:
+            print(
+                "Waveform config index: hits",
+                colored(self.hits, "green"),
+                ", misses",
+                colored(self.misses, "yellow"),
+                ", indexed waveforms",
+                len(self.entries or {}),
+            )
+
+
+# Process-wide waveform config index
+waveform_config_index = WaveformConfigIndex()
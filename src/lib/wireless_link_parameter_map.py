@@ -0,0 +1,109 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Wireless Link Parameter Map
+"""
+# Description:
+#   Compiled wireless link parameter map, it is loaded once and shared by all transmitters and variations.
+#   The YAML file is loaded with the C YAML loader if it is available, and it is loaded again only if the
+#   file is changed (modification time).
+#   The parameter pairs are pre-indexed per waveform generator as list of
+#   (waveform generator parameter name, SigMF parameter name, value map), in the order given in the map,
+#   so mapping a waveform config to SigMF format is a single pass over this list with dictionary lookups.
+#
+import os
+import threading
+import yaml
+
+# Use the C YAML loader if PyYAML is built with LibYAML
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+
+# Define compiled wireless link parameter map
+class WirelessLinkParameterMap:
+    """Wireless link parameter map class"""
+
+    def __init__(self, wireless_link_parameter_map_path):
+        self.path = wireless_link_parameter_map_path
+        self.mtime_ns = os.stat(wireless_link_parameter_map_path).st_mtime_ns
+        with open(wireless_link_parameter_map_path, "r") as file:
+            self.wireless_link_parameter_map_dic = yaml.load(file, Loader=YamlLoader)
+        # compiled parameter pairs of each waveform generator, compiled on first use
+        self.parameter_pairs = {}
+        self.lock = threading.Lock()
+
+    # Get standard and generator description of the given waveform generator
+    def get_standard_key(self, waveform_generator):
+        if self.wireless_link_parameter_map_dic["waveform_generator"][waveform_generator] is None:
+            raise Exception(
+                f"Invalid standard key: Name should be corrected or added to wireless_link_parameter_map.yaml, given: ",
+                waveform_generator,
+            )
+        return self.wireless_link_parameter_map_dic["waveform_generator"][waveform_generator]
+
+    # Get waveform generators with RFWS config file, they give the RFWS elements to read
+    def get_rfws_generators(self):
+        return {
+            key: generator
+            for key, generator in self.wireless_link_parameter_map_dic["waveform_generator"].items()
+            if generator is not None and "rfws_factory" in generator
+        }
+
+    # Get parameter pairs of given waveform generator:
+    # list of (waveform generator parameter name, SigMF parameter name, value map or None)
+    def get_parameter_pairs(self, waveform_generator):
+        with self.lock:
+            if waveform_generator in self.parameter_pairs:
+                return self.parameter_pairs[waveform_generator]
+
+        standard_key = self.get_standard_key(waveform_generator)
+        # get parameters map based on standard key
+        if standard_key["standard"] == "802.11":
+            waveform_parameter_map_dic = self.wireless_link_parameter_map_dic["transmitter"]["wifi"]
+        else:
+            waveform_parameter_map_dic = self.wireless_link_parameter_map_dic["transmitter"][
+                standard_key["standard"]
+            ]
+
+        parameter_pairs = []
+        for parameter_pair in waveform_parameter_map_dic:
+            # check if key for chosen simulator even exists
+            generator_parameter = parameter_pair.get(waveform_generator + "_parameter")
+            if generator_parameter is None:
+                continue
+            # only continue with mapping from file if direct equivalent exists
+            if not generator_parameter["name"]:
+                raise Exception(f"Incomplete specification in field '{waveform_generator}_parameter'!")
+            parameter_pairs.append(
+                (
+                    generator_parameter["name"],
+                    parameter_pair["sigmf_parameter_name"],
+                    generator_parameter.get("value_map"),
+                )
+            )
+
+        with self.lock:
+            self.parameter_pairs[waveform_generator] = parameter_pairs
+        return parameter_pairs
+
+
+# Loaded parameter maps by file path
+wireless_link_parameter_maps = {}
+wireless_link_parameter_maps_lock = threading.Lock()
+
+
+# Get compiled wireless link parameter map, the file is loaded again only if it is changed
+def get_wireless_link_parameter_map(wireless_link_parameter_map_path):
+    mtime_ns = os.stat(wireless_link_parameter_map_path).st_mtime_ns
+    with wireless_link_parameter_maps_lock:
+        parameter_map = wireless_link_parameter_maps.get(wireless_link_parameter_map_path)
+        if parameter_map is None or parameter_map.mtime_ns != mtime_ns:
+            parameter_map = WirelessLinkParameterMap(wireless_link_parameter_map_path)
+            wireless_link_parameter_maps[wireless_link_parameter_map_path] = parameter_map
+        return parameter_map
@@ -8,76 +8,160 @@ Save data and meta-data interface - SigMF format
 """
 # Description:
 #   Write data and meta-data to files in SigMF format
+#   If RX data compression is enabled, the data is written to a compressed data file (.sigmf-cdata) in
+#   independently compressed chunks. The chunk offset index of each record is given in its capture segment,
+#   the codec, compression ratio and throughput in the global metadata.
 #
 # To write Data to sigmf file
 # To save to specific path
 import os
+import time
+import threading
 import sigmf
 import datetime as dt
 from sigmf import SigMFFile
 from sigmf.utils import get_data_type_str
 import numpy as np
 from lib import data_format_conversion_lib
+from lib.rx_sample_format import get_rx_sample_format, SAMPLE_SCALE_FACTOR_KEY
+from lib.rx_data_compression import get_chunk_compressor, write_chunks, COMPRESSED_DATA_FILE_EXTENSION
 
 # To use data time
 from datetime import datetime
 
 
-def write_rx_recorded_data_in_sigmf(rx_data, rx_args, txs_args, general_config, idx):
-    # Check the receive target path is valid, else create folder
-    if not os.path.isdir(rx_args.rx_recorded_data_path):
-        print("Create new folder for recorded data: " + str(rx_args.rx_recorded_data_path))
-        os.makedirs(rx_args.rx_recorded_data_path)
+# Direct I/O needs the buffer address, file offset and write size aligned to the storage block size
+DIRECT_IO_ALIGNMENT = 4096
 
-    # Write recorded data to file
+
+# Get file name of the recorded data without extension
+def get_rx_data_file_name(rx_args, txs_args, general_config, idx, record_time):
     # Get time stamp
-    print(general_config["use_tx_timestamp"])
     if data_format_conversion_lib.str2bool(general_config["use_tx_timestamp"]):
         prefix_length = len("tx_waveform_")
         time_stamp_milli_sec = txs_args[0].waveform_file_name[prefix_length:]
     else:
-        time_stamp_micro_sec = datetime.now().strftime("%Y_%m_%d-%H_%M_%S_%f")
+        time_stamp_micro_sec = datetime.fromtimestamp(record_time).strftime("%Y_%m_%d-%H_%M_%S_%f")
         time_stamp_milli_sec = time_stamp_micro_sec[:-3]
 
-    rx_data_file_name = rx_args.captured_data_file_name + str(idx) + "-" + time_stamp_milli_sec
-    dataset_filename = rx_data_file_name + ".sigmf-data"
-    dataset_file_path = os.path.join(rx_args.rx_recorded_data_path, dataset_filename)
-    print(dataset_file_path)
-    rx_data.tofile(dataset_file_path)
+    return rx_args.captured_data_file_name + str(idx) + "-" + time_stamp_milli_sec
 
-    # Create sigmf metadata
-    # ----------------------
-    # Add global parameters to SigMF metadata
-    # ----------------------
-    meta = SigMFFile(
-        data_file=dataset_file_path,  # extension is optional
-        global_info={
-            SigMFFile.DATATYPE_KEY: "cf32_le",  # get_data_type_str(rx_data) - 'cf64_le' is not supported yet
-            SigMFFile.SAMPLE_RATE_KEY: rx_args.coerced_rx_rate,  # args.rate,
-            SigMFFile.NUM_CHANNELS_KEY: len(rx_args.channels),
-            SigMFFile.AUTHOR_KEY: general_config["author"],
-            SigMFFile.DESCRIPTION_KEY: general_config["description"],
-            SigMFFile.RECORDER_KEY: "Using NI RF Data Recording API: https://github.com/genesys-neu/ni-rf-data-recording-api",
-            SigMFFile.LICENSE_KEY: "MIT License",
-            SigMFFile.HW_KEY: rx_args.hw_type,
-            # Disable DATASET key to mitigate the warning when read SIGMF data although it is given in the spec.
-            # It seems SIGMF still has bug here
-            # SigMFFile.DATASET_KEY: dataset_filename,
-            SigMFFile.VERSION_KEY: sigmf.__version__,
-        },
-    )
 
-    # ----------------------
-    # Add capture parameters to SigMF metadata
-    # ----------------------
-    meta.add_capture(
-        0,  # Sample Start
-        metadata={
-            SigMFFile.FREQUENCY_KEY: rx_args.coerced_rx_freq,
-            SigMFFile.DATETIME_KEY: dt.datetime.utcnow().isoformat() + "Z",
-        },
-    )
+def get_rx_data_file_path(rx_args, txs_args, general_config, idx, record_time):
+    # Check the receive target path is valid, else create folder
+    if not os.path.isdir(rx_args.rx_recorded_data_path):
+        print("Create new folder for recorded data: " + str(rx_args.rx_recorded_data_path))
+        os.makedirs(rx_args.rx_recorded_data_path, exist_ok=True)
+
+    rx_data_file_name = get_rx_data_file_name(rx_args, txs_args, general_config, idx, record_time)
+    return os.path.join(rx_args.rx_recorded_data_path, rx_data_file_name + ".sigmf-data")
+
+
+# Create the data file of a record with its final size and map it to memory
+# The receiver writes the samples directly to the mapped file, there is no intermediate buffer
+def create_rx_data_memmap(
+    rx_args, txs_args, general_config, idx, record_time, num_channels, num_samps, dtype=np.complex64
+):
+    dataset_file_path = get_rx_data_file_path(rx_args, txs_args, general_config, idx, record_time)
+    file_nbytes = num_channels * num_samps * np.dtype(dtype).itemsize
+    fd = os.open(dataset_file_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # Preallocate the file blocks, fallocate is not available on all platforms
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, file_nbytes)
+        else:
+            os.ftruncate(fd, file_nbytes)
+    finally:
+        os.close(fd)
+    return np.memmap(dataset_file_path, dtype=dtype, mode="r+", shape=(num_channels, num_samps))
+
+
+# Write recorded data to file bypassing the page cache (O_DIRECT)
+# Fall back to buffered write if direct I/O is not supported or the buffer is not aligned
+def write_rx_data_direct(rx_data, dataset_file_path):
+    if (
+        not hasattr(os, "O_DIRECT")
+        or not rx_data.flags.c_contiguous
+        or rx_data.ctypes.data % DIRECT_IO_ALIGNMENT
+    ):
+        rx_data.tofile(dataset_file_path)
+        return
+    data = memoryview(rx_data.reshape(-1).view(np.uint8))
+    aligned_nbytes = len(data) - len(data) % DIRECT_IO_ALIGNMENT
+    try:
+        fd = os.open(dataset_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+    except OSError:
+        # i.e. the file system does not support direct I/O
+        rx_data.tofile(dataset_file_path)
+        return
+    try:
+        written_nbytes = 0
+        while written_nbytes < aligned_nbytes:
+            written_nbytes += os.write(fd, data[written_nbytes:aligned_nbytes])
+    finally:
+        os.close(fd)
+    # Write the unaligned tail with buffered I/O
+    if aligned_nbytes < len(data):
+        with open(dataset_file_path, "r+b") as data_file:
+            data_file.seek(aligned_nbytes)
+            data_file.write(data[aligned_nbytes:])
+
+
+# Get sample rate of the recorded data, the RX rate is divided by the decimation factor of the RX decimator
+def get_recorded_rx_rate(rx_args):
+    return rx_args.coerced_rx_rate / getattr(rx_args, "decimation_factor", 1)
+
+
+# Get global parameters of SigMF metadata
+def get_sigmf_global_info(rx_args, general_config):
+    # The data type is given by the RX sample format: fc32 --> cf32_le, sc16 --> ci16_le
+    rx_sample_format = get_rx_sample_format(general_config.get("rx_sample_format", "fc32"))
+    global_info = {
+        SigMFFile.DATATYPE_KEY: rx_sample_format["sigmf_datatype"],  # 'cf64_le' is not supported yet
+        SigMFFile.SAMPLE_RATE_KEY: get_recorded_rx_rate(rx_args),  # args.rate,
+        SigMFFile.NUM_CHANNELS_KEY: len(rx_args.channels),
+        SigMFFile.AUTHOR_KEY: general_config["author"],
+        SigMFFile.DESCRIPTION_KEY: general_config["description"],
+        SigMFFile.RECORDER_KEY: "Using NI RF Data Recording API: https://github.com/genesys-neu/ni-rf-data-recording-api",
+        SigMFFile.LICENSE_KEY: "MIT License",
+        SigMFFile.HW_KEY: rx_args.hw_type,
+        # Disable DATASET key to mitigate the warning when read SIGMF data although it is given in the spec.
+        # It seems SIGMF still has bug here
+        # SigMFFile.DATASET_KEY: dataset_filename,
+        SigMFFile.VERSION_KEY: sigmf.__version__,
+        # index of the variation in config order, the variations may be recorded in another order
+        "variation_index": rx_args.variation_index,
+    }
+    # Scale factor to get the float samples (full scale) from the integer samples
+    if rx_sample_format["sigmf_datatype"] != "cf32_le":
+        global_info[SAMPLE_SCALE_FACTOR_KEY] = rx_sample_format["scale_factor"]
+    # The recorded data is decimated on the host
+    if getattr(rx_args, "decimation_factor", 1) > 1:
+        global_info["decimation_factor"] = rx_args.decimation_factor
+        global_info["receiver_sample_rate"] = rx_args.coerced_rx_rate
+    return global_info
+
+
+# Get capture parameters of SigMF metadata of one record
+def get_sigmf_capture_info(rx_args, record_info, record_time):
+    capture_info = {
+        SigMFFile.FREQUENCY_KEY: rx_args.coerced_rx_freq,
+        SigMFFile.DATETIME_KEY: dt.datetime.utcfromtimestamp(record_time).isoformat() + "Z",
+    }
+    # add record info given by the recorder, i.e. streaming status of this record
+    # the trigger annotations are written as annotations
+    if record_info:
+        capture_info.update(
+            {key: value for key, value in record_info.items() if key != "trigger_annotations"}
+        )
+    return capture_info
+
 
+# Get annotation parameters of SigMF metadata: signal, TX, channel and RX info
+# The transmitter IDs are the indexes of the given TXs unless other IDs are given, i.e. for a channelized record
+def get_sigmf_annotation_info(rx_args, txs_args, general_config, transmitter_ids=None):
+    if transmitter_ids is None:
+        transmitter_ids = range(len(txs_args))
     # Get tx waveform config
     txs_info = [{} for sub in range(len(txs_args))]
     channel_info = [{} for sub in range(len(txs_args))]
@@ -137,7 +221,7 @@ def write_rx_recorded_data_in_sigmf(rx_data, rx_args, txs_args, general_config,
             signal_emitter["mmwave_up_down_converter"] = mmwave_up_down_converter
 
         txs_info[idx] = {
-            "transmitter_id": str(idx),
+            "transmitter_id": str(transmitter_ids[idx]),
             "signal:detail": {
                 "standard": standard,
                 "generator": signal_detail["generator"],
@@ -148,7 +232,7 @@ def write_rx_recorded_data_in_sigmf(rx_data, rx_args, txs_args, general_config,
 
         # get channel info
         channel_info[idx] = {
-            "transmitter_id": str(idx),
+            "transmitter_id": str(transmitter_ids[idx]),
             "attenuation_db": float(rx_args.channel_attenuation_db),
         }
 
@@ -191,37 +275,253 @@ def write_rx_recorded_data_in_sigmf(rx_data, rx_args, txs_args, general_config,
         rx_info["mmwave_antenna_array"] = mmwave_antenna_array
         rx_info["mmwave_up_down_converter"] = mmwave_up_down_converter
 
+    return {
+        SigMFFile.FLO_KEY: rx_args.coerced_rx_freq
+        - get_recorded_rx_rate(rx_args) / 2,  # args.freq - args.rate / 2,
+        SigMFFile.FHI_KEY: rx_args.coerced_rx_freq
+        + get_recorded_rx_rate(rx_args) / 2,  # args.freq + args.rate / 2,
+        SigMFFile.LABEL_KEY: label,
+        SigMFFile.COMMENT_KEY: general_config["comment"],
+        "num_transmitters": len(txs_args),
+        "system_components:transmitter": txs_info,
+        "system_components:channel": channel_info,
+        "system_components:receiver": rx_info,
+    }
+
+
+def write_rx_recorded_data_in_sigmf(
+    rx_data, rx_args, txs_args, general_config, idx, record_info=None, record_time=None
+):
+    # Use the acquisition time of the record if given, the data can be written later by the writer workers
+    if record_time is None:
+        record_time = time.time()
+
+    # Write recorded data to file
+    # RX data output mode:
+    # buffered: write the data through the page cache
+    # memmap: the data is received into the memory-mapped file, flush it only
+    # direct: write the data bypassing the page cache (O_DIRECT)
+    # compressed: write the compressed chunks to the compressed data file
+    print(general_config["use_tx_timestamp"])
+    dataset_file_path = get_rx_data_file_path(rx_args, txs_args, general_config, idx, record_time)
+    print(dataset_file_path)
+    rx_data_output_mode = general_config.get("rx_data_output_mode", "buffered")
+    chunk_compressor = get_chunk_compressor(general_config)
+    if chunk_compressor is not None:
+        chunks, record_compression_info = chunk_compressor.compress_record(rx_data)
+        with open(os.path.splitext(dataset_file_path)[0] + COMPRESSED_DATA_FILE_EXTENSION, "wb") as data_file:
+            chunk_offsets = write_chunks(data_file, chunks)
+    elif isinstance(rx_data, np.memmap) and os.path.getsize(dataset_file_path) == rx_data.nbytes:
+        rx_data.flush()
+    elif isinstance(rx_data, np.memmap):
+        # short record, i.e. cut by a recv timeout: rewrite the data file with the received samples only
+        np.array(rx_data).tofile(dataset_file_path)
+    elif rx_data_output_mode == "direct":
+        write_rx_data_direct(rx_data, dataset_file_path)
+    else:
+        rx_data.tofile(dataset_file_path)
+
+    # Create sigmf metadata
+    # ----------------------
+    # Add global parameters to SigMF metadata
+    # ----------------------
+    global_info = get_sigmf_global_info(rx_args, general_config)
+    capture_info = get_sigmf_capture_info(rx_args, record_info, record_time)
+    if chunk_compressor is not None:
+        # The compressed data file is not a SigMF dataset, so it is not given to the SigMF metadata
+        global_info["compression"] = chunk_compressor.get_compression_info(**record_compression_info)
+        capture_info["raw_nbytes"] = record_compression_info["raw_nbytes"]
+        capture_info["chunk_offsets"] = chunk_offsets
+        meta = SigMFFile(global_info=global_info)
+    else:
+        meta = SigMFFile(
+            data_file=dataset_file_path,  # extension is optional
+            global_info=global_info,
+        )
+
+    # ----------------------
+    # Add capture parameters to SigMF metadata
+    # ----------------------
+    meta.add_capture(
+        0,  # Sample Start
+        metadata=capture_info,
+    )
+
     # ----------------------
     # Add annotation parameters to SigMF metadata
     # ----------------------
     meta.add_annotation(
         0,  # Sample Start
-        rx_args.num_rx_samps,  # Sample count
-        metadata={
-            SigMFFile.FLO_KEY: rx_args.coerced_rx_freq
-            - rx_args.coerced_rx_rate / 2,  # args.freq - args.rate / 2,
-            SigMFFile.FHI_KEY: rx_args.coerced_rx_freq
-            + rx_args.coerced_rx_rate / 2,  # args.freq + args.rate / 2,
-            SigMFFile.LABEL_KEY: label,
-            SigMFFile.COMMENT_KEY: general_config["comment"],
-            "num_transmitters": len(txs_args),
-            "system_components:transmitter": txs_info,
-            "system_components:channel": channel_info,
-            "system_components:receiver": rx_info,
-        },
+        rx_data.shape[-1],  # Sample count, the record can be trimmed by the energy trigger
+        metadata=get_sigmf_annotation_info(
+            rx_args,
+            txs_args,
+            general_config,
+            # record of one emitter written by the RX channelizer
+            [record_info["transmitter_id"]] if record_info and "transmitter_id" in record_info else None,
+        ),
     )
+    # Add signal bursts detected by the energy trigger
+    if record_info:
+        for trigger_annotation in record_info.get("trigger_annotations", []):
+            meta.add_annotation(
+                trigger_annotation["sample_start"],
+                trigger_annotation["sample_count"],
+                metadata=trigger_annotation["metadata"],
+            )
 
     # Check for mistakes
     meta.validate()
 
     ## Write Meta Data to file
-    dataset_meta_filename = rx_data_file_name + ".sigmf-meta"
-    dataset_meta_file_path = os.path.join(rx_args.rx_recorded_data_path, dataset_meta_filename)
+    dataset_meta_file_path = os.path.splitext(dataset_file_path)[0] + ".sigmf-meta"
     meta.tofile(dataset_meta_file_path)  # extension is optional
 
     print(dataset_meta_file_path)
 
 
+# Define SigMF archive writer: all records of a variation are written to one data file
+# Each record is a capture segment with its own sample start and datetime. The records are written at
+# fixed offsets of the preallocated data file, so the writer workers can write them in any order.
+# The meta-data file is written when the archive is closed.
+# If RX data compression is enabled, the compressed records are appended to the compressed data file in the order
+# they are written, the capture segment of each record gives its chunk offsets.
+class RxSigMFArchiveWriter:
+    """RX SigMF archive writer class"""
+
+    def __init__(
+        self, rx_args, txs_args, general_config, nrecords, record_time=None, dtype=np.complex64, num_samps=None
+    ):
+        if record_time is None:
+            record_time = time.time()
+        self.rx_args = rx_args
+        self.txs_args = txs_args
+        self.general_config = general_config
+        self.nrecords = nrecords
+        self.num_channels = len(rx_args.channels)
+        # number of samples of each record, the received samples if the records are not decimated
+        self.num_samps = rx_args.num_rx_samps if num_samps is None else num_samps
+        self.dtype = np.dtype(dtype)
+        self.record_nbytes = self.num_channels * self.num_samps * self.dtype.itemsize
+        self.dataset_file_path = get_rx_data_file_path(
+            rx_args, txs_args, general_config, "archive", record_time
+        )
+        print(self.dataset_file_path)
+        # capture info per record index
+        self.captures = {}
+        self.lock = threading.Lock()
+
+        self.chunk_compressor = get_chunk_compressor(general_config)
+        if self.chunk_compressor is not None:
+            # raw size, compressed size and compression time of all records
+            self.compression_totals = {"raw_nbytes": 0, "compressed_nbytes": 0, "compression_time_s": 0.0}
+            self.data_file = open(
+                os.path.splitext(self.dataset_file_path)[0] + COMPRESSED_DATA_FILE_EXTENSION, "wb"
+            )
+            return
+
+        # Preallocate the data file with the size of all records
+        fd = os.open(self.dataset_file_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, self.record_nbytes * nrecords)
+            else:
+                os.ftruncate(fd, self.record_nbytes * nrecords)
+        finally:
+            os.close(fd)
+        self.data_file = open(self.dataset_file_path, "r+b")
+
+    # Map the region of the given record in the data file, used by the memmap output mode
+    def create_record_memmap(self, idx):
+        if self.chunk_compressor is not None:
+            raise Exception("ERROR: RX data compression is not supported with the memmap output mode")
+        return np.memmap(
+            self.dataset_file_path,
+            dtype=self.dtype,
+            mode="r+",
+            offset=idx * self.record_nbytes,
+            shape=(self.num_channels, self.num_samps),
+        )
+
+    # Write one record, same arguments as write_rx_recorded_data_in_sigmf
+    # Direct I/O is not used here, the records are written through the page cache
+    # A short record, i.e. cut by a recv timeout, is written at the start of each channel of its record region,
+    # the number of valid samples is given in its capture
+    def write_record(
+        self, rx_data, rx_args, txs_args, general_config, idx, record_info=None, record_time=None
+    ):
+        if record_time is None:
+            record_time = time.time()
+        num_samps = rx_data.shape[-1]
+        if num_samps > self.num_samps:
+            raise Exception("ERROR: Record is larger than the record size of the SigMF archive", num_samps)
+        capture_info = get_sigmf_capture_info(rx_args, record_info, record_time)
+        capture_info["record_index"] = idx
+        capture_info["valid_num_samps"] = num_samps
+        if self.chunk_compressor is not None:
+            # compress in parallel with other writer workers, only the file write is serialized
+            chunks, record_compression_info = self.chunk_compressor.compress_record(rx_data)
+            with self.lock:
+                capture_info["chunk_offsets"] = write_chunks(self.data_file, chunks)
+                for key in self.compression_totals:
+                    self.compression_totals[key] += record_compression_info[key]
+            capture_info["raw_nbytes"] = record_compression_info["raw_nbytes"]
+        elif isinstance(rx_data, np.memmap):
+            rx_data.flush()
+        elif num_samps == self.num_samps:
+            with self.lock:
+                self.data_file.seek(idx * self.record_nbytes)
+                rx_data.tofile(self.data_file)
+        else:
+            # keep the channel offsets of the record region, like a record received into the memory-mapped region
+            with self.lock:
+                for chan in range(self.num_channels):
+                    self.data_file.seek(idx * self.record_nbytes + chan * self.num_samps * self.dtype.itemsize)
+                    rx_data[chan].tofile(self.data_file)
+        with self.lock:
+            self.captures[idx] = capture_info
+
+    # Write the meta-data file, called after all records are written
+    def close(self):
+        self.data_file.close()
+        if not self.captures:
+            print("No records are written to SigMF archive: " + self.dataset_file_path)
+            return
+        # Truncate the data file if the recording is stopped before all records are written
+        num_records = max(self.captures) + 1
+        if num_records < self.nrecords and self.chunk_compressor is None:
+            os.truncate(self.dataset_file_path, num_records * self.record_nbytes)
+
+        global_info = get_sigmf_global_info(self.rx_args, self.general_config)
+        # Record size to get the offset of any record directly
+        global_info["num_records"] = num_records
+        global_info["record_num_samps"] = self.num_samps
+        if self.chunk_compressor is not None:
+            global_info["compression"] = self.chunk_compressor.get_compression_info(**self.compression_totals)
+            meta = SigMFFile(global_info=global_info)
+        else:
+            meta = SigMFFile(data_file=self.dataset_file_path, global_info=global_info)
+        for idx in sorted(self.captures):
+            meta.add_capture(
+                idx * self.num_samps,  # Sample Start
+                metadata=self.captures[idx],
+            )
+        # The system components are the same for all records of the variation
+        meta.add_annotation(
+            0,  # Sample Start
+            num_records * self.num_samps,  # Sample count
+            metadata=get_sigmf_annotation_info(self.rx_args, self.txs_args, self.general_config),
+        )
+
+        # Check for mistakes
+        meta.validate()
+
+        ## Write Meta Data to file
+        dataset_meta_file_path = os.path.splitext(self.dataset_file_path)[0] + ".sigmf-meta"
+        meta.tofile(dataset_meta_file_path)
+        print(dataset_meta_file_path)
+
+
 # Get tx waveform config from file name
 # example:
 #         waveform name: ["5GNR_FR1_DL_FDD_SISO_BW-20MHz_CC-1_SCS-30kHz_Mod-64QAM_OFDM_TM3.1.tdms"]},
@@ -12,6 +12,8 @@ NI RF Data Recording API - Main File
 # Parameters:
 #   main_config: configuration file name
 #   Note: if main_config parameter is not given, default config file will be used "config_rf_data_recording_api.yaml"
+#   Several config files can be given as a campaign, configs without common devices run in parallel processes
+#   max_workers: max number of worker processes of the campaign, 0: one worker per device group
 #
 # Pre-requests: Install UHD with Python API enabled
 #
@@ -27,6 +29,70 @@ from lib import rf_data_recording_api_def
 from lib import sync_settings
 from lib import read_waveform_config_interface
 from lib import data_format_conversion_lib
+from lib import variations_order
+from lib import campaign_planner
+from lib.waveform_cache import waveform_cache
+from lib.waveform_config_index import waveform_config_index
+from lib.variation_pipeline import VariationPipeline
+
+
+## Prepare a variation, it does not access the devices, so it can run while the previous variation is recording
+def prepare_variation(rf_data_recording_api, iteration_config, general_config):
+    # get default waveform config
+    wireless_link_parameter_map = general_config["wireless_link_parameter_map"]
+
+    ## Create class list for all TX USRPs, each class has the TX config of related TX signal emitter
+    # initialize the list
+    txs_data_recording_api_config = []
+    for idx in range(1, general_config["num_tx_usrps"] + 1):
+        tx_data_recording_api_config = rf_data_recording_api.TxRFDataRecorderConfig(
+            iteration_config, general_config, idx
+        )
+        txs_data_recording_api_config.append(tx_data_recording_api_config)
+
+    ## Create class list for all RX USRPs, each class has the RX config of related RX signal acquisition
+    # initialize the list
+    rxs_data_recording_api_config = []
+    for idx in range(1, general_config["num_rx_usrps"] + 1):
+        rx_data_recording_api_config = rf_data_recording_api.RxRFDataRecorderConfig(
+            iteration_config, general_config, idx
+        )
+        rxs_data_recording_api_config.append(rx_data_recording_api_config)
+
+    ## Get Tx Waveform config
+    for idx, tx_data_recording_api_config in enumerate(txs_data_recording_api_config):
+        txs_data_recording_api_config[
+            idx
+        ] = read_waveform_config_interface.read_tx_waveform_config(
+            tx_data_recording_api_config,
+            wireless_link_parameter_map,
+        )
+
+    ## Update rate of Tx and RX USRPs based on selected rate source
+    (
+        txs_data_recording_api_config,
+        rxs_data_recording_api_config,
+    ) = rf_data_recording_api.update_rate(
+        txs_data_recording_api_config, rxs_data_recording_api_config
+    )
+
+    ## Calculate USRP master clockrate based on given rate
+    (
+        txs_data_recording_api_config,
+        rxs_data_recording_api_config,
+    ) = rf_data_recording_api.find_proper_master_clock_rate(
+        txs_data_recording_api_config, rxs_data_recording_api_config
+    )
+
+    ## Load Tx waveforms into the waveform cache, so they are not read from file on the critical path
+    for tx_data_recording_api_config in txs_data_recording_api_config:
+        waveform_cache.get_waveform(
+            tx_data_recording_api_config.waveform_path,
+            tx_data_recording_api_config.waveform_file_name,
+            tx_data_recording_api_config.waveform_format,
+        )
+
+    return txs_data_recording_api_config, rxs_data_recording_api_config
 
 
 def main(rf_data_acq_config_file):
@@ -47,8 +113,6 @@ def main(rf_data_acq_config_file):
     # Read general config, it has only a single list
     general_config = variations_map.general_config.iloc[0]
 
-    # get default waveform config
-    wireless_link_parameter_map = general_config["wireless_link_parameter_map"]
     # get enabel console logging flag
     enable_console_logging = data_format_conversion_lib.str2bool(
         general_config["enable_console_logging"]
@@ -67,116 +131,111 @@ def main(rf_data_acq_config_file):
     variations_map = rf_data_recording_api.get_hardware_info(variations_map, enable_console_logging)
     print("")
 
+    ## Reorder variations to minimize expensive transitions, i.e. frequency retune
+    variations_order_mode = general_config.get("variations_order", "config")
+    if variations_order_mode == "min_retune_cost":
+        retune_cost_model = variations_order.get_retune_cost_model(
+            general_config.get("variations_retune_cost_model", None)
+        )
+        config_order_cost = variations_order.get_config_order_cost(
+            variations_map.variations_product, retune_cost_model
+        )
+        variations_map.variations_product = variations_order.order_variations_by_retune_cost(
+            variations_map.variations_product, retune_cost_model
+        )
+        print(
+            "Reorder variations by retune cost, estimated cost: config order",
+            config_order_cost,
+            ", new order",
+            colored(
+                variations_map.variations_product.product_indexes.get_cost(
+                    variations_map.variations_product.columns, retune_cost_model
+                ),
+                "green",
+            ),
+        )
+        print("")
+    elif variations_order_mode != "config":
+        raise Exception("ERROR: Unknown variations order", variations_order_mode)
+
     # Create que to store rx data in bytes
     # User will know the data size written to the memory
     rx_data_nbytes_que = Queue()
 
-    for i in range(len(variations_map.variations_product)):
-        print("Variation Number: ", i)
-
-        ##  Initlize sync settings
-        sync_settings.init()
-        # print sync status
-        if enable_console_logging:
-            print(
-                "Sync Status: Start Data Acquisition called = ",
-                sync_settings.start_rx_data_acquisition_called,
-                " Stop Tx Signal called = ",
-                sync_settings.stop_tx_signal_called,
-            )
-
-        ## Get TX and RX RF Data Recorder Config
-        iteration_config = variations_map.variations_product.iloc[i]
-
-        ## Create class list for all TX USRPs, each class has the TX config of related TX signal emitter
-        # initialize the list
-        txs_data_recording_api_config = []
-        for idx in range(1, general_config["num_tx_usrps"] + 1):
-            tx_data_recording_api_config = rf_data_recording_api.TxRFDataRecorderConfig(
-                iteration_config, general_config, idx
-            )
-            txs_data_recording_api_config.append(tx_data_recording_api_config)
-
-        ## Create class list for all RX USRPs, each class has the RX config of related RX signal acquisition
-        # initialize the list
-        rxs_data_recording_api_config = []
-        for idx in range(1, general_config["num_rx_usrps"] + 1):
-            rx_data_recording_api_config = rf_data_recording_api.RxRFDataRecorderConfig(
-                iteration_config, general_config, idx
-            )
-            rxs_data_recording_api_config.append(rx_data_recording_api_config)
-
-        ## Get Tx Waveform config
-        for idx, tx_data_recording_api_config in enumerate(txs_data_recording_api_config):
-            txs_data_recording_api_config[
-                idx
-            ] = read_waveform_config_interface.read_tx_waveform_config(
-                tx_data_recording_api_config,
-                wireless_link_parameter_map,
-            )
-
-        ## Update rate of Tx and RX USRPs based on selected rate source
-        (
-            txs_data_recording_api_config,
-            rxs_data_recording_api_config,
-        ) = rf_data_recording_api.update_rate(
-            txs_data_recording_api_config, rxs_data_recording_api_config
-        )
+    ## Prepare the next variations in background while the current variation is recording
+    variation_pipeline = VariationPipeline(
+        lambda iteration_config: prepare_variation(
+            rf_data_recording_api, iteration_config, general_config
+        ),
+        int(general_config.get("variation_pipeline_depth", 1)),
+    )
 
-        ## Calculate USRP master clockrate based on given rate
-        (
-            txs_data_recording_api_config,
-            rxs_data_recording_api_config,
-        ) = rf_data_recording_api.find_proper_master_clock_rate(
-            txs_data_recording_api_config, rxs_data_recording_api_config
-        )
+    # The variation pipeline, the device workers and the USRP sessions are closed also if a variation fails,
+    # i.e. if the process is reused by the campaign planner for the next config
+    variations = variation_pipeline.run(variations_map.variations_product)
+    try:
+        for i, (iteration_config, prepared_variation) in enumerate(variations):
+            print("Variation Number: ", i)
+
+            ##  Initlize sync settings, the TX and RX threads of each variation are synced by a variation sync object
+            sync_settings.init()
 
-        ## print iteration config
-        if enable_console_logging:
-            rf_data_recording_api.print_iteration_config(
-                iteration_config,
-                general_config,
-                txs_data_recording_api_config,
-                rxs_data_recording_api_config,
-            )
-
-        ## Get API Operation mode
-        api_operation_mode = general_config["API_operation_mode"]
-
-        # For Rx-only mode:
-        if (
-            api_operation_mode == rf_data_recording_api_def.RFDataRecorderAPI.API_operation_modes[1]
-        ):  # Rx only mode
-            rf_data_recording_api.start_rxs_execution(
-                txs_data_recording_api_config,
-                rxs_data_recording_api_config,
-                general_config,
-                rx_data_nbytes_que,
-            )
-
-        ### Start execution - TX emitters in parallel
-        # TX-only mode or Tx-Rx mode
-        else:
-            if general_config["txs_execution"] == "parallel":
-                rf_data_recording_api.start_execution_txs_in_parallel(
+            ## TX and RX configs of this variation with waveform config, rates and master clock rate
+            txs_data_recording_api_config, rxs_data_recording_api_config = prepared_variation
+
+            ## print iteration config
+            if enable_console_logging:
+                rf_data_recording_api.print_iteration_config(
+                    iteration_config,
+                    general_config,
                     txs_data_recording_api_config,
                     rxs_data_recording_api_config,
-                    api_operation_mode,
-                    general_config,
-                    rx_data_nbytes_que,
                 )
-            ## Start execution - TX emitters in sequential
-            elif general_config["txs_execution"] == "sequential":
-                rf_data_recording_api.start_execution_txs_in_sequential(
+
+            ## Get API Operation mode
+            api_operation_mode = general_config["API_operation_mode"]
+
+            # For Rx-only mode:
+            if (
+                api_operation_mode == rf_data_recording_api_def.RFDataRecorderAPI.API_operation_modes[1]
+            ):  # Rx only mode
+                rf_data_recording_api.start_rxs_execution(
                     txs_data_recording_api_config,
                     rxs_data_recording_api_config,
-                    api_operation_mode,
                     general_config,
                     rx_data_nbytes_que,
-                    enable_console_logging,
                 )
+
+            ### Start execution - TX emitters in parallel
+            # TX-only mode or Tx-Rx mode
             else:
-                raise Exception("Error: Unknow tx emitters execution order")
+                if general_config["txs_execution"] == "parallel":
+                    rf_data_recording_api.start_execution_txs_in_parallel(
+                        txs_data_recording_api_config,
+                        rxs_data_recording_api_config,
+                        api_operation_mode,
+                        general_config,
+                        rx_data_nbytes_que,
+                    )
+                ## Start execution - TX emitters in sequential
+                elif general_config["txs_execution"] == "sequential":
+                    rf_data_recording_api.start_execution_txs_in_sequential(
+                        txs_data_recording_api_config,
+                        rxs_data_recording_api_config,
+                        api_operation_mode,
+                        general_config,
+                        rx_data_nbytes_que,
+                        enable_console_logging,
+                    )
+                else:
+                    raise Exception("Error: Unknow tx emitters execution order")
+    finally:
+        variations.close()
+        # Close all USRP sessions opened during the API execution
+        rf_data_recording_api.close_sessions()
+    waveform_cache.print_stats()
+    waveform_config_index.print_stats()
+    variation_pipeline.print_stats()
 
     # Get end time
     end_time = time.time()
@@ -200,6 +259,14 @@ def main(rf_data_acq_config_file):
         "MByte",
     )
 
+    # Report of this config, merged into the campaign report
+    return {
+        "config_file": rf_data_acq_config_file,
+        "num_variations": len(variations_map.variations_product),
+        "rx_data_nbytes": total_rx_data_nbytes,
+        "elapsed_time_s": time_elapsed,
+    }
+
 
 if __name__ == "__main__":
     # flag to be disabled for execution from IDE
@@ -211,15 +278,29 @@ if __name__ == "__main__":
         parser.add_argument(
             "--config",
             type=str,
-            default="config/config_rf_data_recording_api.json",
-            help="RF data recording API config file",
+            nargs="+",
+            default=["config/config_rf_data_recording_api.json"],
+            help="RF data recording API config file, several config files can be given as a campaign",
+        )
+        parser.add_argument(
+            "--max_workers",
+            type=int,
+            default=0,
+            help="max number of worker processes of a campaign, 0: one worker per device group",
         )
         args = parser.parse_args()
 
-        rf_data_acq_config_file = args.config
+        rf_data_acq_config_files = args.config
+        max_workers = args.max_workers
     else:
         # use default config file
-        rf_data_acq_config_file = "config/config_rf_data_recording_api.json"
+        rf_data_acq_config_files = ["config/config_rf_data_recording_api.json"]
+        max_workers = 0
 
     # start main program
-    main(rf_data_acq_config_file)
+    if len(rf_data_acq_config_files) == 1:
+        main(rf_data_acq_config_files[0])
+    else:
+        # Run a campaign: configs without common devices run in parallel worker processes
+        campaign_report = campaign_planner.run_campaign(rf_data_acq_config_files, main, max_workers)
+        campaign_planner.print_campaign_report(campaign_report)
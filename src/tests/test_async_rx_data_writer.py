@@ -0,0 +1,54 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Asynchronous RX Data Writer
+"""
+# Description:
+#   The asynchronous RX data writer writes the RX records by background writer workers.
+#   The test hands off records with a slow dummy write function and checks that:
+#       -   all records are written after closing the writer (flush)
+#       -   record buffers are released after they are written
+#       -   the handoff blocks if the writer queue is full (backpressure)
+#
+# Test prints the write latency stats
+#
+import os
+import sys
+import time
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib.async_rx_data_writer import AsyncRxDataWriter
+
+if __name__ == "__main__":
+
+    num_records = 16
+    write_delay = 0.01
+    written_records = []
+    released_records = []
+
+    # dummy write function, emulates disk latency
+    def write_record(record_idx):
+        time.sleep(write_delay)
+        written_records.append(record_idx)
+
+    rx_data_writer = AsyncRxDataWriter(write_record, num_workers=2, queue_size=2)
+    start_time = time.time()
+    for record_idx in range(num_records):
+        rx_data_writer.submit(
+            record_idx, on_done=lambda idx=record_idx: released_records.append(idx)
+        )
+    handoff_time = time.time() - start_time
+    rx_data_writer.close()
+
+    assert sorted(written_records) == list(range(num_records))
+    assert sorted(released_records) == list(range(num_records))
+    # backpressure: the handoff of all records takes at least the write time of the records not fit in the queue
+    assert handoff_time > write_delay * (num_records - 4) / 2 * 0.5
+    print("Handoff time of all records: ", round(handoff_time * 1000, 3), "ms")
+    rx_data_writer.print_stats()
@@ -0,0 +1,106 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Campaign Planner
+"""
+# Description:
+#   Configs of a campaign are partitioned into device groups, configs that share a USRP or mmWave unit
+#   are in the same group and device groups run in parallel.
+#   The test checks that:
+#       -   the device IDs of a config are given by the USRP args and the mmWave serial numbers
+#       -   configs with overlapping devices are merged into one group, also transitively
+#       -   the config order is kept in each group and a config can be repeated
+#       -   device groups run in spawned worker processes that import the mmWave device module without console
+#
+import os
+import sys
+import json
+import tempfile
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib import campaign_planner
+
+
+def get_config(tx_ips, rx_ips, mmwave_serial_numbers=None):
+    rx_configs = [{"RFmode": "Rx", "type": "x300", "IPaddress": ip} for ip in rx_ips]
+    if mmwave_serial_numbers:
+        rx_configs[0]["mmwave_antenna_array_parameters"] = {
+            "serial_number": {"Values": mmwave_serial_numbers}
+        }
+    return {
+        "transmitters_config": [{"RFmode": "Tx", "type": "x300", "IPaddress": ip} for ip in tx_ips],
+        "receivers_config": rx_configs,
+    }
+
+
+# Run config in a worker process, the mmWave device module is imported as by the RF data recording API
+def run_config(config_file):
+    from lib import run_mmWave_device
+
+    return {
+        "config_file": config_file,
+        "pid": os.getpid(),
+        "num_variations": 1,
+        "rx_data_nbytes": 0,
+        "elapsed_time_s": 0,
+    }
+
+
+if __name__ == "__main__":
+    config_a = get_config(["192.168.40.2"], ["192.168.50.2"])
+    config_b = get_config(["192.168.60.2"], ["192.168.70.2"], ["D2230E013-28"])
+    config_c = get_config([], ["192.168.80.2"], ["D2230E013-28"])
+    config_d = get_config(["192.168.90.2"], ["192.168.50.2"])
+    config_e = get_config(["192.168.100.2"], ["192.168.110.2"])
+
+    device_ids = campaign_planner.get_device_ids(config_b)
+    print("Device IDs of config b: ", device_ids)
+    assert device_ids == {"addr=192.168.60.2", "addr=192.168.70.2", "mmwave_serial=D2230E013-28"}
+
+    configs_device_ids = [
+        campaign_planner.get_device_ids(config)
+        for config in [config_a, config_b, config_c, config_d, config_e]
+    ]
+    device_groups = campaign_planner.plan_device_groups(configs_device_ids)
+    print("Device groups: ", device_groups)
+    # a and d share a USRP, b and c share a mmWave unit
+    assert device_groups == [[0, 3], [1, 2], [4]]
+
+    # a config that bridges two groups merges them, the config order is kept
+    configs_device_ids.append({"addr=192.168.90.2", "addr=192.168.110.2"})
+    device_groups = campaign_planner.plan_device_groups(configs_device_ids)
+    print("Device groups: ", device_groups)
+    assert device_groups == [[0, 3, 4, 5], [1, 2]]
+
+    # the same config given twice is repeated in its device group
+    device_groups = campaign_planner.plan_device_groups(configs_device_ids + [configs_device_ids[1]])
+    print("Device groups: ", device_groups)
+    assert device_groups == [[0, 3, 4, 5], [1, 2, 6]]
+
+    # configs of one group run one after the other
+    reports = campaign_planner.run_config_group(
+        lambda config: {"config_file": config}, ["a.json", "d.json", "a.json"]
+    )
+    assert [report["config_file"] for report in reports] == ["a.json", "d.json", "a.json"]
+
+    # device groups in spawned worker processes, their stdin is not the console
+    with tempfile.TemporaryDirectory() as config_dir:
+        config_files = []
+        for config_name, config in zip(["a", "b", "d"], [config_a, config_b, config_d]):
+            config_file = os.path.join(config_dir, config_name + ".json")
+            with open(config_file, "w") as file:
+                json.dump(config, file)
+            config_files.append(config_file)
+        campaign_report = campaign_planner.run_campaign(config_files, run_config, max_workers=2)
+        assert campaign_report["num_workers"] == 2 and campaign_report["num_variations"] == 3
+        assert campaign_report["device_groups"] == [[config_files[0], config_files[2]], [config_files[1]]]
+        config_reports = campaign_report["config_reports"]
+        assert [report["config_file"] for report in config_reports] == [config_files[idx] for idx in [0, 2, 1]]
+        assert all(report["pid"] != os.getpid() for report in config_reports)
+    print("Test passed")
@@ -0,0 +1,123 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Parsed Config Cache
+"""
+# Description:
+#   The parsed config and the variation map are cached as JSON in the user cache folder, keyed by the content
+#   hash of the config file and of all files it depends on. Test checks:
+#       -   the cached variation map is the same as the parsed one, for YAML and JSON config files
+#       -   a changed config file is parsed again
+#       -   the second load of the same config comes from the cache, it is faster for a YAML config
+#       -   the API modules and the wireless link parameter map are part of the hash
+#       -   a broken cache file is ignored and the config is parsed again
+#
+import os
+import sys
+import time
+import shutil
+import tempfile
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+from lib import rf_data_recording_config_interface
+
+
+def load_config(rf_data_acq_config_file):
+    start_time = time.perf_counter()
+    variations_map = rf_data_recording_config_interface.generate_rf_data_recording_configs(rf_data_acq_config_file)
+    return variations_map, time.perf_counter() - start_time
+
+
+def get_time(function):
+    start_time = time.perf_counter()
+    function()
+    return time.perf_counter() - start_time
+
+
+if __name__ == "__main__":
+    # files the variation map depends on
+    dependency_files = [
+        os.path.basename(file_path) for file_path in rf_data_recording_config_interface.get_config_dependency_files()
+    ]
+    for file_name in ["rf_data_recording_config_interface.py", "data_format_conversion_lib.py"]:
+        assert file_name in dependency_files
+    assert "wireless_link_parameter_map.yaml" in dependency_files
+
+    test_config_dir = os.path.join(src_path, "config", "test_config_cache")
+    os.makedirs(test_config_dir, exist_ok=True)
+    # cache files of the test are written to a temporary user cache folder
+    user_cache_dir = tempfile.mkdtemp()
+    os.environ["XDG_CACHE_HOME"] = user_cache_dir
+    cache_dir = rf_data_recording_config_interface.get_config_cache_dir()
+    assert cache_dir.startswith(user_cache_dir)
+    try:
+        for config_file_name in ["config_rf_data_recording_api.yaml", "config_rf_data_recording_api.json"]:
+            shutil.copy(os.path.join(src_path, "config", config_file_name), test_config_dir)
+            rf_data_acq_config_file = os.path.join("config", "test_config_cache", config_file_name)
+            config_file_path = os.path.join(test_config_dir, config_file_name)
+            # cache files of the config file start with the hash of its path
+            config_cache_path = rf_data_recording_config_interface.get_config_cache_path(config_file_path, "")
+            config_path_hash = os.path.basename(config_cache_path).split(".")[0]
+
+            # parse config, then load it from cache
+            variations_map1, parse_time = load_config(rf_data_acq_config_file)
+            variations_map2, cache_time = load_config(rf_data_acq_config_file)
+            assert variations_map2.rf_data_acq_config == variations_map1.rf_data_acq_config
+            assert variations_map2.general_config.equals(variations_map1.general_config)
+            assert len(variations_map2.variations_product) == len(variations_map1.variations_product)
+            for variation1, variation2 in zip(variations_map1.variations_product, variations_map2.variations_product):
+                assert variation1.equals(variation2)
+            cache_files = [name for name in os.listdir(cache_dir) if name.startswith(config_path_hash)]
+            assert len(cache_files) == 1 and cache_files[0].endswith(".json")
+            assert rf_data_recording_config_interface.load_cached_config(os.path.join(cache_dir, cache_files[0]))
+            # a JSON config is parsed about as fast as the cache is loaded, so only the YAML load is compared
+            # The console logging and the config hash take the same time for both loads, so the parsing is timed
+            # against the cache load only, best of some runs
+            if config_file_name.endswith(".yaml"):
+                with open(config_file_path, "rb") as file:
+                    config_data = file.read()
+                yaml_parse_time = min(
+                    get_time(
+                        lambda: rf_data_recording_config_interface.CreateVariationsMap(
+                            rf_data_recording_config_interface.parse_config_data(config_data, ".yaml")
+                        )
+                    )
+                    for _ in range(5)
+                )
+                cache_load_time = min(
+                    get_time(
+                        lambda: rf_data_recording_config_interface.CreateVariationsMap(
+                            *rf_data_recording_config_interface.load_cached_config(
+                                os.path.join(cache_dir, cache_files[0])
+                            )
+                        )
+                    )
+                    for _ in range(5)
+                )
+                print("YAML parse time: ", yaml_parse_time, "s, cache load time: ", cache_load_time, "s")
+                assert cache_load_time < yaml_parse_time
+            print(config_file_name, ": parse time: ", parse_time, "s, cache load time: ", cache_time, "s")
+
+            # change config file, the changed config is parsed again and the old cache file is removed
+            with open(config_file_path, "a") as file:
+                file.write("\n")
+            variations_map3, _ = load_config(rf_data_acq_config_file)
+            assert variations_map3.rf_data_acq_config == variations_map1.rf_data_acq_config
+            new_cache_files = [name for name in os.listdir(cache_dir) if name.startswith(config_path_hash)]
+            assert len(new_cache_files) == 1 and new_cache_files[0] not in cache_files
+
+            # broken cache file: the config is parsed again and the cache file is rewritten
+            with open(os.path.join(cache_dir, new_cache_files[0]), "w") as file:
+                file.write("garbage")
+            variations_map4, _ = load_config(rf_data_acq_config_file)
+            assert variations_map4.general_config.equals(variations_map1.general_config)
+            assert rf_data_recording_config_interface.load_cached_config(os.path.join(cache_dir, new_cache_files[0]))
+    finally:
+        shutil.rmtree(test_config_dir)
+        shutil.rmtree(user_cache_dir)
+
+    print("Test passed")
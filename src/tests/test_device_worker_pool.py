@@ -0,0 +1,106 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Device Worker Pool
+"""
+# Description:
+#   The TX and RX tasks of each variation run on one long-lived worker per device.
+#   The test runs dummy device tasks over several variations and checks that:
+#       -   each device keeps the same worker thread across all variations
+#       -   the tasks of different devices run in parallel
+#       -   the completion and the errors of each task are reported by its future
+#       -   the master clock rate is not part of the device identity
+#       -   the error of a failed task is raised after all tasks of the variation are done
+#       -   tasks of one variation on the same device are rejected, they would block each other
+#
+import os
+import sys
+import threading
+import time
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib.device_worker_pool import DeviceWorkerPool
+
+
+def device_task(barrier, variation_idx):
+    # all devices of a variation should be running at the same time to pass the barrier
+    barrier.wait(timeout=5)
+    time.sleep(0.01)
+    return threading.current_thread().name, variation_idx
+
+
+def failed_device_task():
+    raise Exception("ERROR: Dummy device task failed")
+
+
+if __name__ == "__main__":
+    devices_args = ["type=x300,addr=192.168.40.2", "type=x300,addr=192.168.50.2", "type=b200,serial=3215B94"]
+    device_worker_pool = DeviceWorkerPool()
+
+    worker_names = {}
+    for variation_idx in range(5):
+        barrier = threading.Barrier(len(devices_args))
+        futures = [
+            device_worker_pool.submit(device_args, device_task, barrier, variation_idx)
+            for device_args in devices_args
+        ]
+        errors = DeviceWorkerPool.wait_for_tasks(futures)
+        assert not errors
+        for device_args, future in zip(devices_args, futures):
+            worker_name, task_variation_idx = future.result()
+            assert task_variation_idx == variation_idx
+            # the same worker serves the device in all variations
+            assert worker_names.setdefault(device_args, worker_name) == worker_name
+    print("Worker threads: ", worker_names)
+    assert len(set(worker_names.values())) == len(devices_args)
+
+    # the master clock rate is derived per variation, the device has still the same worker
+    future = device_worker_pool.submit(
+        "type=x300,addr=192.168.40.2,master_clock_rate=184.32e6", device_task, threading.Barrier(1), 5
+    )
+    assert future.result()[0] == worker_names[devices_args[0]]
+
+    # an error is reported by the future and the worker continues with the next task
+    futures = [
+        device_worker_pool.submit(devices_args[0], failed_device_task),
+        device_worker_pool.submit(devices_args[0], device_task, threading.Barrier(1), 6),
+    ]
+    errors = DeviceWorkerPool.wait_for_tasks(futures)
+    assert len(errors) == 1
+    assert futures[1].result()[1] == 6
+
+    # the error of a failed task is raised after the other tasks of the variation are done
+    futures = [
+        device_worker_pool.submit(devices_args[0], failed_device_task),
+        device_worker_pool.submit(devices_args[1], device_task, threading.Barrier(1), 7),
+    ]
+    try:
+        DeviceWorkerPool.wait_for_tasks_or_raise(futures)
+        raise AssertionError("Failed task is not reported")
+    except Exception as error:
+        assert "Device tasks of the variation failed" in str(error)
+    assert futures[1].done()
+
+    # two tasks of one variation on the same device are rejected, also with different master clock rates
+    DeviceWorkerPool.check_variation_devices(devices_args)
+    try:
+        DeviceWorkerPool.check_variation_devices(
+            devices_args + ["type=x300,addr=192.168.40.2,master_clock_rate=184.32e6"]
+        )
+        raise AssertionError("Same device is not detected")
+    except Exception as error:
+        assert "use the same device" in str(error)
+
+    stats = device_worker_pool.get_stats()
+    print("Number of tasks per device: ", stats)
+    assert sum(stats.values()) == 3 * 5 + 5
+
+    device_worker_pool.shutdown()
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("device_worker_")]
+    print("Test passed")
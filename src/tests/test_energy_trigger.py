@@ -0,0 +1,133 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Energy Trigger
+"""
+# Description:
+#   Apply the energy trigger to noise records with and without signal bursts. Test checks:
+#       -   the noise floor is calibrated and records with noise only are dropped
+#       -   the bursts are detected at their positions and the record is trimmed with pre- and post-trigger margins
+#       -   complex int16 records give the same bursts
+#       -   the bursts are written to the SigMF annotations of the trimmed record
+#
+import os
+import sys
+import json
+import tempfile
+import numpy as np
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib import write_rx_recorded_data_in_sigmf
+from lib.energy_trigger import EnergyTrigger
+from lib.rx_sample_format import complex64_to_sc16, SC16_SCALE_FACTOR
+
+if __name__ == "__main__":
+
+    # local class for testing
+    class RxRFDataRecorderConfig:
+        """Rx RFDataRecorder Config class"""
+
+        def __init__(self, rx_recorded_data_path):
+            self.channels = [0, 1]
+            self.num_rx_samps = 100000
+            self.rx_recorded_data_path = rx_recorded_data_path
+            self.captured_data_file_name = "rx-test-"
+            self.coerced_rx_freq = 2.4e9
+            self.coerced_rx_rate = 1e6
+            self.coerced_rx_gain = 30
+            self.coerced_rx_bandwidth = 1e6
+            self.hw_type = "x310"
+            self.hw_subtype = "UBX-160"
+            self.seid = 1
+            self.clock_reference = "internal"
+            self.channel_attenuation_db = 0
+            self.variation_index = 0
+
+    rng = np.random.default_rng(0)
+    num_channels, num_samps = 2, 100000
+    window_num_samps, pre_num_samps, post_num_samps = 128, 500, 700
+
+    def get_noise(noise_power_dbfs=-60):
+        noise_std = np.sqrt(10 ** (noise_power_dbfs / 10) / 2)
+        noise_shape = (num_channels, num_samps)
+        return (rng.normal(0, noise_std, noise_shape) + 1j * rng.normal(0, noise_std, noise_shape)).astype(
+            np.complex64
+        )
+
+    noise_record = get_noise()
+    burst_record = get_noise()
+    # bursts of -20 dBFS, 40 dB above the noise floor
+    bursts = [(20000, 3000), (60000, 5000)]
+    for burst_start, burst_num_samps in bursts:
+        burst_record[:, burst_start : burst_start + burst_num_samps] += 0.1 * np.exp(
+            2j * np.pi * 0.05 * np.arange(burst_num_samps)
+        )
+
+    for rx_sample_format in ["fc32", "sc16"]:
+        energy_trigger = EnergyTrigger(
+            threshold_db=10,
+            window_num_samps=window_num_samps,
+            pre_trigger_num_samps=pre_num_samps,
+            post_trigger_num_samps=post_num_samps,
+            scale_factor=1.0 if rx_sample_format == "fc32" else SC16_SCALE_FACTOR,
+        )
+        records = [noise_record, burst_record]
+        if rx_sample_format == "sc16":
+            records = [complex64_to_sc16(record) for record in records]
+
+        # noise only: the record is dropped, the noise floor is calibrated
+        rx_data, record_info = energy_trigger.apply(records[0], {})
+        assert rx_data is None
+        assert abs(energy_trigger.get_noise_floor_dbfs() + 60) < 1
+
+        # bursts: the record is trimmed from the first to the last burst with margins
+        rx_data, record_info = energy_trigger.apply(records[1], {"rx_time_s": 1.0})
+        trigger_annotations = record_info["trigger_annotations"]
+        assert len(trigger_annotations) == len(bursts)
+        sample_offset = record_info["trigger_sample_offset"]
+        for trigger_annotation, (burst_start, burst_num_samps) in zip(trigger_annotations, bursts):
+            detected_start = sample_offset + trigger_annotation["sample_start"]
+            detected_stop = detected_start + trigger_annotation["sample_count"]
+            assert abs(detected_start - burst_start) <= window_num_samps
+            assert abs(detected_stop - (burst_start + burst_num_samps)) <= window_num_samps
+            assert abs(trigger_annotation["metadata"]["mean_power_dbfs"] + 20) < 1
+            assert trigger_annotation["metadata"]["snr_db"] > 35
+        assert abs(sample_offset - (bursts[0][0] - pre_num_samps)) <= window_num_samps
+        assert rx_data.shape == (num_channels, detected_stop + post_num_samps - sample_offset)
+        assert np.array_equal(rx_data, records[1][:, sample_offset : sample_offset + rx_data.shape[-1]])
+        stats = energy_trigger.get_stats()
+        assert stats["num_records"] == 2 and stats["num_triggered_records"] == 1
+        energy_trigger.print_stats()
+
+    # write the trimmed record, the bursts are annotations
+    general_config = {
+        "use_tx_timestamp": "False",
+        "enable_mmwave": "False",
+        "author": "Test",
+        "description": "Test energy trigger",
+        "comment": "Test",
+    }
+    with tempfile.TemporaryDirectory() as rx_recorded_data_path:
+        rx_args = RxRFDataRecorderConfig(rx_recorded_data_path)
+        write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf(
+            rx_data, rx_args, [], general_config, 0, record_info
+        )
+        meta_file_name = [name for name in os.listdir(rx_recorded_data_path) if name.endswith(".sigmf-meta")][0]
+        with open(os.path.join(rx_recorded_data_path, meta_file_name), "r") as meta_file:
+            metadata = json.load(meta_file)
+        assert metadata["captures"][0]["trigger_sample_offset"] == sample_offset
+        assert "trigger_annotations" not in metadata["captures"][0]
+        annotations = metadata["annotations"]
+        assert annotations[0]["core:sample_count"] == rx_data.shape[-1]
+        trigger_annotations = [
+            annotation for annotation in annotations if annotation.get("core:label") == "energy_trigger"
+        ]
+        assert len(trigger_annotations) == len(bursts)
+
+    print("Test passed")
@@ -0,0 +1,65 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Extract RFWS Elements
+"""
+# Description:
+#   The RFWS elements of a waveform config are read in a single pass over the RFWS file.
+#   The elements to read are given in the wireless link parameter map per waveform generator.
+#   The test reads all RFWS files in the waveforms folder and checks that:
+#       -   the waveform generator is selected by the factory element
+#       -   every element has the same texts as the first hits of a full tree search
+#
+# Test prints the time of the single pass compared to the full tree search
+#
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib import read_waveform_config_interface
+
+if __name__ == "__main__":
+    rfws_generators = read_waveform_config_interface.read_wireless_link_parameter_map(
+        read_waveform_config_interface.DEFAULT_WIRELESS_LINK_PARAMETER_MAP
+    ).get_rfws_generators()
+    expected_generators = {"nr": "5gnr_ni_rfmx_rfws", "lte": "lte_ni_rfmx_rfws"}
+
+    for standard_dir, expected_generator_key in expected_generators.items():
+        waveforms_dir = os.path.join(src_path, "waveforms", standard_dir)
+        for file_name in sorted(os.listdir(waveforms_dir)):
+            if not file_name.endswith(".rfws"):
+                continue
+            waveform_file_path = os.path.join(waveforms_dir, file_name)
+
+            start_time = time.perf_counter()
+            generator_key, rfws_elements = read_waveform_config_interface.extract_rfws_elements(
+                waveform_file_path, rfws_generators
+            )
+            single_pass_time_ms = (time.perf_counter() - start_time) * 1000
+            assert generator_key == expected_generator_key
+
+            # full tree search for each element
+            start_time = time.perf_counter()
+            root = ET.parse(waveform_file_path).getroot()
+            for name, count in rfws_generators[generator_key]["rfws_elements"].items():
+                expected_texts = [element.text for element in root.findall(f".//*[@name='{name}']")][:count]
+                assert rfws_elements[name] == expected_texts, name
+            assert rfws_elements["factory"] == [root.findall(".//*[@name='factory']")[0].text]
+            tree_search_time_ms = (time.perf_counter() - start_time) * 1000
+            print(
+                file_name,
+                ": single pass",
+                round(single_pass_time_ms, 2),
+                "ms, full tree search",
+                round(tree_search_time_ms, 2),
+                "ms",
+            )
+    print("Test passed")
@@ -0,0 +1,137 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Read SigMF Recorded Data
+"""
+# Description:
+#   Write some records to a SigMF archive (one data file per variation with a capture segment per record),
+#   then read the records back by index and check the data.
+#   A short record (i.e. cut by a recv timeout) is read with its valid samples only, with and without compression.
+#   The records around a dropped record (i.e. without received samples) are read from their own record regions.
+#
+# Test prints the captures of the archive
+#
+import os
+import sys
+import tempfile
+import numpy as np
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib import write_rx_recorded_data_in_sigmf
+from lib.read_sigmf_recorded_data import SigMFRecordReader
+
+if __name__ == "__main__":
+
+    # local class for testing
+    class RxRFDataRecorderConfig:
+        """Rx RFDataRecorder Config class"""
+
+        def __init__(self, rx_recorded_data_path):
+            self.channels = [0]
+            self.num_rx_samps = 1000
+            self.rx_recorded_data_path = rx_recorded_data_path
+            self.captured_data_file_name = "rx-test-"
+            self.coerced_rx_freq = 2.4e9
+            self.coerced_rx_rate = 1e6
+            self.coerced_rx_gain = 30
+            self.coerced_rx_bandwidth = 1e6
+            self.hw_type = "x310"
+            self.hw_subtype = "UBX-160"
+            self.seid = 1
+            self.clock_reference = "internal"
+            self.channel_attenuation_db = 0
+            self.variation_index = 0
+
+    general_config = {
+        "use_tx_timestamp": "False",
+        "enable_mmwave": "False",
+        "author": "Test",
+        "description": "Test SigMF archive",
+        "comment": "Test",
+    }
+    nrecords = 4
+
+    with tempfile.TemporaryDirectory() as rx_recorded_data_path:
+        rx_args = RxRFDataRecorderConfig(rx_recorded_data_path)
+        rx_sigmf_archive = write_rx_recorded_data_in_sigmf.RxSigMFArchiveWriter(
+            rx_args, [], general_config, nrecords
+        )
+        # write records in reverse order, like out of order writer workers
+        for idx in reversed(range(nrecords)):
+            rx_data = np.full((1, rx_args.num_rx_samps), idx + 1j * idx, dtype=np.complex64)
+            rx_sigmf_archive.write_record(rx_data, rx_args, [], general_config, idx)
+        rx_sigmf_archive.close()
+
+        meta_file_path = os.path.splitext(rx_sigmf_archive.dataset_file_path)[0] + ".sigmf-meta"
+        reader = SigMFRecordReader(meta_file_path)
+        assert reader.get_num_records() == nrecords
+        for idx in range(nrecords):
+            rx_data = reader.read_record(idx)
+            assert rx_data.shape == (1, rx_args.num_rx_samps)
+            assert np.all(rx_data == idx + 1j * idx)
+            assert reader.get_capture_info(idx)["record_index"] == idx
+            print(reader.get_capture_info(idx))
+
+    # archive of two channels with a short record, without and with compression
+    for rx_data_compression in ["none", "zlib"]:
+        with tempfile.TemporaryDirectory() as rx_recorded_data_path:
+            rx_args = RxRFDataRecorderConfig(rx_recorded_data_path)
+            rx_args.channels = [0, 1]
+            archive_config = dict(general_config, rx_data_compression=rx_data_compression)
+            rx_sigmf_archive = write_rx_recorded_data_in_sigmf.RxSigMFArchiveWriter(
+                rx_args, [], archive_config, nrecords
+            )
+            records = []
+            for idx in range(nrecords):
+                # record 1 is short, the last record is short too, so it is not given by the data file size
+                num_samps = rx_args.num_rx_samps if idx in [0, 2] else rx_args.num_rx_samps // 3
+                rx_data = (np.arange(2 * num_samps).reshape(2, num_samps) + 1j * idx).astype(np.complex64)
+                records.append(rx_data)
+                rx_sigmf_archive.write_record(rx_data, rx_args, [], archive_config, idx)
+            rx_sigmf_archive.close()
+
+            meta_file_path = os.path.splitext(rx_sigmf_archive.dataset_file_path)[0] + ".sigmf-meta"
+            reader = SigMFRecordReader(meta_file_path)
+            assert reader.get_num_records() == nrecords
+            for idx, expected_data in enumerate(records):
+                assert reader.get_record_num_samps(idx) == expected_data.shape[-1]
+                assert reader.get_capture_info(idx)["valid_num_samps"] == expected_data.shape[-1]
+                assert np.array_equal(reader.read_record(idx), expected_data)
+                assert np.array_equal(reader.read_samples(idx, 10, 100), expected_data[:, 10:110])
+            print("Short records are read with compression:", rx_data_compression)
+
+    # archive of two channels with a dropped record, without and with compression
+    for rx_data_compression in ["none", "zlib"]:
+        with tempfile.TemporaryDirectory() as rx_recorded_data_path:
+            rx_args = RxRFDataRecorderConfig(rx_recorded_data_path)
+            rx_args.channels = [0, 1]
+            archive_config = dict(general_config, rx_data_compression=rx_data_compression)
+            rx_sigmf_archive = write_rx_recorded_data_in_sigmf.RxSigMFArchiveWriter(
+                rx_args, [], archive_config, nrecords
+            )
+            # record 1 is dropped
+            records = {}
+            for idx in [0, 2]:
+                num_samps = rx_args.num_rx_samps
+                rx_data = (np.arange(2 * num_samps).reshape(2, num_samps) + 1j * (idx + 1)).astype(np.complex64)
+                records[idx] = rx_data
+                rx_sigmf_archive.write_record(rx_data, rx_args, [], archive_config, idx)
+            rx_sigmf_archive.close()
+
+            meta_file_path = os.path.splitext(rx_sigmf_archive.dataset_file_path)[0] + ".sigmf-meta"
+            reader = SigMFRecordReader(meta_file_path)
+            assert reader.get_num_records() == 2
+            for record_idx, (idx, expected_data) in enumerate(records.items()):
+                assert reader.get_capture_info(record_idx)["record_index"] == idx
+                assert reader.get_record_num_samps(record_idx) == expected_data.shape[-1]
+                assert np.array_equal(reader.read_record(record_idx), expected_data)
+                assert np.array_equal(reader.read_samples(record_idx, 10, 100), expected_data[:, 10:110])
+            print("Records around a dropped record are read with compression:", rx_data_compression)
+
+    print("Test passed")
@@ -0,0 +1,111 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Replay Memory Allocator
+"""
+# Description:
+#   The replay memory allocator packs several waveforms into the on-board memory of the replay block.
+#   The test allocates buffers for some waveforms and checks that:
+#       -   buffers are word-aligned and do not overlap
+#       -   a loaded waveform is found again without upload
+#       -   the least recently used waveform is evicted if the memory is full, buffers in use are not evicted
+#       -   a loaded waveform is played again without upload, a failed upload is released and retried
+#       -   the allocation fails if all buffers are in use or the waveform is larger than the memory
+#
+# Test prints the allocator stats
+#
+import os
+import sys
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib.replay_memory_allocator import ReplayMemoryAllocator
+
+if __name__ == "__main__":
+
+    word_size = 64
+    replay_memory_allocator = ReplayMemoryAllocator(mem_size=1000 * word_size, word_size=word_size)
+
+    # allocate and upload three waveforms
+    waveforms = {"lte": 300 * word_size + 4, "nr": 400 * word_size, "radar": 200 * word_size}
+    addresses = {}
+    for content_hash, nbytes in waveforms.items():
+        addr, is_loaded = replay_memory_allocator.allocate(content_hash, nbytes)
+        assert not is_loaded
+        assert addr % word_size == 0
+        replay_memory_allocator.set_loaded(content_hash)
+        replay_memory_allocator.release(content_hash)
+        addresses[content_hash] = addr
+    ranges = sorted((addresses[key], addresses[key] + waveforms[key]) for key in waveforms)
+    assert all(ranges[idx][1] <= ranges[idx + 1][0] for idx in range(len(ranges) - 1))
+
+    # the waveform is already loaded
+    addr, is_loaded = replay_memory_allocator.allocate("lte", waveforms["lte"])
+    assert is_loaded and addr == addresses["lte"]
+
+    # memory is full: "nr" is the least recently used waveform not in use, "lte" is in use
+    addr, is_loaded = replay_memory_allocator.allocate("wifi", 350 * word_size)
+    assert not is_loaded
+    assert addr == addresses["nr"]
+    replay_memory_allocator.set_loaded("wifi")
+    replay_memory_allocator.release("wifi")
+
+    # "radar" and "wifi" are evicted to fit "nr" again
+    addr, is_loaded = replay_memory_allocator.allocate("nr", waveforms["nr"])
+    assert not is_loaded
+    assert replay_memory_allocator.get_stats()["evictions"] == 3
+
+    print(replay_memory_allocator.get_stats())
+
+    # upload only if the waveform is not loaded, like the transmitter of each variation
+    replay_memory_allocator = ReplayMemoryAllocator(mem_size=1000 * word_size, word_size=word_size)
+    uploads = []
+
+    def upload(addr):
+        uploads.append(addr)
+
+    def failed_upload(addr):
+        raise Exception("ERROR: Dummy upload failed")
+
+    addr, is_loaded = replay_memory_allocator.load("lte", 300 * word_size, upload)
+    assert not is_loaded and uploads == [addr]
+    replay_memory_allocator.release("lte")
+    for _ in range(3):
+        assert replay_memory_allocator.load("lte", 300 * word_size, upload) == (addr, True)
+        replay_memory_allocator.release("lte")
+    assert uploads == [addr]
+
+    # failed upload: the buffer is released and the waveform is uploaded again by the next variation
+    try:
+        replay_memory_allocator.load("nr", 400 * word_size, failed_upload)
+        raise AssertionError("Failed upload is not reported")
+    except Exception as error:
+        assert "Dummy upload failed" in str(error)
+    addr, is_loaded = replay_memory_allocator.load("nr", 400 * word_size, upload)
+    assert not is_loaded and uploads[-1] == addr
+
+    # memory is full and all buffers are in use: "nr" is still played, "lte" and "wifi" are played now
+    assert replay_memory_allocator.load("lte", 300 * word_size, upload)[1]
+    replay_memory_allocator.load("wifi", 300 * word_size, upload)
+    try:
+        replay_memory_allocator.allocate("radar", 200 * word_size)
+        raise AssertionError("Full memory is not reported")
+    except Exception as error:
+        assert "all buffers are in use" in str(error)
+    # larger than the whole memory
+    try:
+        replay_memory_allocator.allocate("long_waveform", 1001 * word_size)
+        raise AssertionError("Too large waveform is not reported")
+    except Exception as error:
+        assert "larger than the replay memory" in str(error)
+    # the failed allocations do not change the buffers
+    assert replay_memory_allocator.get_stats()["num_buffers"] == 3
+    assert replay_memory_allocator.get_stats()["evictions"] == 0
+
+    print(replay_memory_allocator.get_stats())
+    print("Test passed")
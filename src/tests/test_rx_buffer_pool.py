@@ -0,0 +1,59 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - RX Buffer Pool
+"""
+# Description:
+#   The RX buffer pool preallocates page-aligned RX record buffers that are reused for all records.
+#   The test acquires and releases the buffers and checks that:
+#       -   the buffers are page-aligned and have the record shape
+#       -   the same buffers are reused, no new memory is allocated per record
+#       -   acquiring waits until a buffer is released if all buffers are in use (miss)
+#
+# Test prints the pool metrics
+#
+import os
+import sys
+import mmap
+import threading
+import time
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib.rx_buffer_pool import RxBufferPool
+
+if __name__ == "__main__":
+
+    num_buffers = 3
+    num_channels = 2
+    num_samps = 1000
+    rx_buffer_pool = RxBufferPool(num_buffers, num_channels, num_samps)
+
+    buffer_addresses = set()
+    for _ in range(2 * num_buffers):
+        buffer_idx, rx_data = rx_buffer_pool.acquire()
+        assert rx_data.shape == (num_channels, num_samps)
+        assert rx_data.ctypes.data % mmap.PAGESIZE == 0
+        buffer_addresses.add(rx_data.ctypes.data)
+        rx_buffer_pool.release(buffer_idx)
+    assert len(buffer_addresses) <= num_buffers
+
+    # all buffers are in use, the next buffer is acquired when the first buffer is released
+    acquired_buffers = [rx_buffer_pool.acquire() for _ in range(num_buffers)]
+    release_timer = threading.Timer(0.05, rx_buffer_pool.release, [acquired_buffers[0][0]])
+    release_timer.start()
+    start_time = time.time()
+    buffer_idx, rx_data = rx_buffer_pool.acquire()
+    assert time.time() - start_time > 0.04
+    assert buffer_idx == acquired_buffers[0][0]
+
+    stats = rx_buffer_pool.get_stats()
+    assert stats["misses"] == 1
+    assert stats["peak_num_in_use"] == num_buffers
+    rx_buffer_pool.print_stats()
+    rx_buffer_pool.close()
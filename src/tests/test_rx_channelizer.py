@@ -0,0 +1,170 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - RX Channelizer
+"""
+# Description:
+#   Channelize a wideband record with two emitters, each emitter is a tone at its TX frequency. Test checks:
+#       -   the decimation factor of each emitter is given by its bandwidth and the oversampling
+#       -   the record of each emitter keeps its tone at zero frequency and suppresses the other emitter,
+#           for complex float and int16 samples
+#       -   an emitter without decimation (decimation factor 1) is filtered and the other emitter is suppressed
+#       -   the record of each emitter is written to its own files, with its sample rate, center frequency and
+#           transmitter ID in the metadata, in addition to the wideband record
+#
+import os
+import sys
+import json
+import tempfile
+import numpy as np
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib import write_rx_recorded_data_in_sigmf
+from lib.rx_channelizer import get_rx_channelizer
+from lib.rx_sample_format import complex64_to_sc16, sc16_to_complex64
+
+if __name__ == "__main__":
+
+    # local classes for testing
+    class TxConfig:
+        """Tx Config class"""
+
+        def __init__(self, freq, bandwidth):
+            self.freq = freq
+            self.rate = bandwidth
+            self.bandwidth = bandwidth
+            self.max_RF_bandwidth = bandwidth
+            self.gain = 10
+            self.seid = 2
+            self.hw_type = "x310"
+            self.hw_subtype = "UBX-160"
+            self.clock_reference = "internal"
+            self.waveform_config = {"standard": "test", "generator": "test", "bandwidth": bandwidth}
+
+    class RxRFDataRecorderConfig:
+        """Rx RFDataRecorder Config class"""
+
+        def __init__(self, rx_recorded_data_path, num_rx_samps, rate):
+            self.channels = [0, 1]
+            self.num_rx_samps = num_rx_samps
+            self.rx_recorded_data_path = rx_recorded_data_path
+            self.captured_data_file_name = "rx-test-"
+            self.coerced_rx_freq = 2.4e9
+            self.coerced_rx_rate = rate
+            self.coerced_rx_gain = 30
+            self.coerced_rx_bandwidth = rate
+            self.hw_type = "x310"
+            self.hw_subtype = "UBX-160"
+            self.seid = 1
+            self.clock_reference = "internal"
+            self.channel_attenuation_db = 0
+            self.variation_index = 0
+            self.decimation_factor = 1
+
+    rx_rate, rx_freq = 122.88e6, 2.4e9
+    num_channels, num_samps = 2, 122880
+    general_config = {
+        "use_tx_timestamp": "False",
+        "enable_mmwave": "False",
+        "author": "Test",
+        "description": "Test RX channelizer",
+        "comment": "Test",
+        "rx_channelizer_mode": "per_emitter",
+        "rx_channelizer_oversampling": 1.25,
+    }
+    # emitter of 10 MHz at -20 MHz: decimation factor 122.88 / 12.5 --> 9
+    # emitter of 20 MHz at +20 MHz: decimation factor 122.88 / 25 --> 4
+    txs_args = [TxConfig(rx_freq - 20e6, 10e6), TxConfig(rx_freq + 20e6, 20e6)]
+    rx_channelizer = get_rx_channelizer(general_config, rx_rate, rx_freq, txs_args)
+    assert [channel["transmitter_id"] for channel in rx_channelizer.channels] == [0, 1]
+    assert [channel["decimation_factor"] for channel in rx_channelizer.channels] == [9, 4]
+    assert get_rx_channelizer(dict(general_config, rx_channelizer_mode="none"), rx_rate, rx_freq, txs_args) is None
+    assert get_rx_channelizer(general_config, rx_rate, rx_freq, []) is None
+
+    # tone of each emitter, 1 MHz above its TX frequency
+    t = np.arange(num_samps) / rx_rate
+    emitter_tones = [amplitude * np.exp(2j * np.pi * 1e6 * t) for amplitude in [0.5, 0.25]]
+    rx_data_fc32 = np.tile(
+        emitter_tones[0] * np.exp(-2j * np.pi * 20e6 * t) + emitter_tones[1] * np.exp(2j * np.pi * 20e6 * t),
+        (num_channels, 1),
+    ).astype(np.complex64)
+    for rx_data in [rx_data_fc32, complex64_to_sc16(rx_data_fc32)]:
+        channels_data = rx_channelizer.channelize(rx_data)
+        for channel, channel_data, emitter_tone in zip(rx_channelizer.channels, channels_data, emitter_tones):
+            decimation_factor = channel["decimation_factor"]
+            assert channel_data.dtype == rx_data.dtype
+            assert channel_data.shape == (num_channels, -(-num_samps // decimation_factor))
+            if channel_data.dtype != np.complex64:
+                channel_data = sc16_to_complex64(channel_data)
+            expected_data = np.tile(emitter_tone[::decimation_factor], (num_channels, 1))
+            # the filter settles after its length, compare the samples in the middle of the record
+            error = channel_data[:, 500:-500] - expected_data[:, 500:-500]
+            error_db = 10 * np.log10(np.mean(np.abs(error) ** 2) / np.mean(np.abs(expected_data) ** 2))
+            print("Error of record of TX", channel["transmitter_id"], ": ", error_db, "dB")
+            assert error_db < -40
+
+    # emitter of 16 MHz at -7 MHz that does not allow decimation at 30.72 Msps: decimation factor 30.72 / 20 --> 1
+    # emitter of 4 MHz at +9 MHz: decimation factor 30.72 / 5 --> 6
+    # a 20 MHz emitter at the default rate of 30.72 Msps is not decimated either
+    low_rx_rate = 30.72e6
+    wideband_channelizer = get_rx_channelizer(general_config, low_rx_rate, rx_freq, [TxConfig(rx_freq, 20e6)])
+    assert wideband_channelizer.channels[0]["decimation_factor"] == 1
+    low_rate_txs_args = [TxConfig(rx_freq - 7e6, 16e6), TxConfig(rx_freq + 9e6, 4e6)]
+    low_rate_channelizer = get_rx_channelizer(general_config, low_rx_rate, rx_freq, low_rate_txs_args)
+    assert [channel["decimation_factor"] for channel in low_rate_channelizer.channels] == [1, 6]
+    # tone of each emitter: 1 MHz and 0.5 MHz above its TX frequency
+    t = np.arange(num_samps) / low_rx_rate
+    emitter_tones = [0.5 * np.exp(2j * np.pi * 1e6 * t), 0.25 * np.exp(2j * np.pi * 0.5e6 * t)]
+    rx_data = np.tile(
+        emitter_tones[0] * np.exp(-2j * np.pi * 7e6 * t) + emitter_tones[1] * np.exp(2j * np.pi * 9e6 * t),
+        (num_channels, 1),
+    ).astype(np.complex64)
+    channels_data = low_rate_channelizer.channelize(rx_data)
+    for channel, channel_data, emitter_tone in zip(low_rate_channelizer.channels, channels_data, emitter_tones):
+        decimation_factor = channel["decimation_factor"]
+        assert channel_data.shape == (num_channels, -(-num_samps // decimation_factor))
+        expected_data = np.tile(emitter_tone[::decimation_factor], (num_channels, 1))
+        error = channel_data[:, 500:-500] - expected_data[:, 500:-500]
+        error_db = 10 * np.log10(np.mean(np.abs(error) ** 2) / np.mean(np.abs(expected_data) ** 2))
+        print("Error of record of TX", channel["transmitter_id"], "at 30.72 Msps: ", error_db, "dB")
+        assert error_db < -40
+
+    # write wideband record and record of each emitter
+    with tempfile.TemporaryDirectory() as rx_recorded_data_path:
+        rx_args = RxRFDataRecorderConfig(rx_recorded_data_path, num_samps, rx_rate)
+        write_rx_recorded_data = rx_channelizer.wrap_write_function(
+            write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf
+        )
+        write_rx_recorded_data(rx_data_fc32, rx_args, txs_args, general_config, 0, {})
+        meta_file_names = sorted(name for name in os.listdir(rx_recorded_data_path) if name.endswith(".sigmf-meta"))
+        assert len(meta_file_names) == 3
+        for tx_idx, tx_args in enumerate(txs_args):
+            meta_file_name = [name for name in meta_file_names if name.startswith(f"rx-test-tx{tx_idx}-")][0]
+            with open(os.path.join(rx_recorded_data_path, meta_file_name), "r") as meta_file:
+                metadata = json.load(meta_file)
+            decimation_factor = rx_channelizer.channels[tx_idx]["decimation_factor"]
+            assert metadata["global"]["core:sample_rate"] == rx_rate / decimation_factor
+            assert metadata["global"]["decimation_factor"] == decimation_factor
+            assert metadata["captures"][0]["core:frequency"] == tx_args.freq
+            assert metadata["captures"][0]["transmitter_id"] == str(tx_idx)
+            annotation = metadata["annotations"][0]
+            assert annotation["core:sample_count"] == -(-num_samps // decimation_factor)
+            txs_info = annotation["system_components:transmitter"]
+            assert [tx_info["transmitter_id"] for tx_info in txs_info] == [str(tx_idx)]
+
+        # without the wideband record
+        write_rx_recorded_data = rx_channelizer.wrap_write_function(
+            write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf, keep_wideband=False
+        )
+        write_rx_recorded_data(rx_data_fc32, rx_args, txs_args, general_config, 1, {})
+        meta_file_names = [name for name in os.listdir(rx_recorded_data_path) if name.endswith(".sigmf-meta")]
+        assert len(meta_file_names) == 5
+        assert not any(name.startswith("rx-test-1-") for name in meta_file_names)
+
+    print("Test passed")
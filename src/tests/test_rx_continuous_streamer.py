@@ -0,0 +1,87 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - RX Continuous Streamer
+"""
+# Description:
+#   Records are carved out of a continuous stream into the record buffers of the RX buffer pool. The test uses a
+#   stub RX streamer instead of a USRP that returns partial blocks of samples, as UHD does after an overflow, and
+#   that receives into C-contiguous buffers only, as UHD does. Test checks that:
+#       -   all samples of a multi-channel record are written into the record buffer, also after a partial block
+#       -   the records follow each other in the stream without lost samples, also after dropping samples
+#       -   the same for a single-channel record
+#
+import os
+import sys
+import numpy as np
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib.rx_continuous_streamer import ContinuousRxStreamer
+
+
+# Stub RX metadata without errors
+class StubRxMetadata:
+    """Stub RX metadata class"""
+
+    has_time_spec = False
+
+    def __init__(self, error_code):
+        self.error_code = error_code
+
+    def strerror(self):
+        return ""
+
+
+# Stub RX streamer: stream of increasing sample values per channel, returned in partial blocks
+class StubRxStreamer:
+    """Stub RX streamer class"""
+
+    def __init__(self, num_channels, block_num_samps, max_num_samps=64):
+        self.num_channels = num_channels
+        self.block_num_samps = block_num_samps
+        self.max_num_samps = max_num_samps
+        self.num_streamed_samps = 0
+
+    def get_max_num_samps(self):
+        return self.max_num_samps
+
+    def recv(self, rx_data, rx_metadata, timeout):
+        # UHD fills a temporary copy if the buffer is not C-contiguous
+        recv_buffer = rx_data if rx_data.flags.c_contiguous else rx_data.copy()
+        samps = min(self.block_num_samps, recv_buffer.shape[-1])
+        stream = np.arange(self.num_streamed_samps, self.num_streamed_samps + samps)
+        for chan in range(self.num_channels):
+            recv_buffer[chan, :samps] = stream + 1j * chan
+        self.num_streamed_samps += samps
+        return samps
+
+
+if __name__ == "__main__":
+    num_samps = 1000
+    for num_channels in [2, 1]:
+        # the record is received in blocks of 48 samples, shorter than the max number of samples per packet
+        rx_streamer = StubRxStreamer(num_channels, 48)
+        continuous_rx_streamer = ContinuousRxStreamer(None, rx_streamer, list(range(num_channels)))
+        continuous_rx_streamer.rx_metadata = StubRxMetadata(continuous_rx_streamer.rx_metadata.error_code)
+        stream_start = 0
+        for record_idx in range(3):
+            # stale content of the record buffer of the pool
+            rx_data = np.full((num_channels, num_samps), -1, dtype=np.complex64)
+            record_info = continuous_rx_streamer.recv_record(rx_data)
+            assert record_info["rx_num_samps"] == num_samps
+            expected_stream = np.arange(stream_start, stream_start + num_samps)
+            for chan in range(num_channels):
+                assert np.array_equal(rx_data[chan], expected_stream + 1j * chan)
+            # drop samples between the records, i.e. during dwell time
+            assert continuous_rx_streamer.skip_samps(100) == 100
+            stream_start += num_samps + 100
+        assert rx_streamer.num_streamed_samps == stream_start
+        print("Records of", num_channels, "channels received from the stream")
+
+    print("Test passed")
@@ -0,0 +1,110 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - RX Data Compression
+"""
+# Description:
+#   Write bursty records with RX data compression (per record and per variation layout), then read them back.
+#   Test checks:
+#       -   the records are read back unchanged, for complex float and complex int16 samples
+#       -   random sample ranges are read by decompressing only the chunks of the range
+#       -   codec, compression ratio and throughput are written to the metadata
+#
+import os
+import sys
+import tempfile
+import numpy as np
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib import write_rx_recorded_data_in_sigmf
+from lib.read_sigmf_recorded_data import SigMFRecordReader
+from lib.rx_data_compression import is_codec_available, COMPRESSED_DATA_FILE_EXTENSION
+from lib.rx_sample_format import get_rx_sample_format, complex64_to_sc16
+
+if __name__ == "__main__":
+
+    # local class for testing
+    class RxRFDataRecorderConfig:
+        """Rx RFDataRecorder Config class"""
+
+        def __init__(self, rx_recorded_data_path, num_rx_samps):
+            self.channels = [0, 1]
+            self.num_rx_samps = num_rx_samps
+            self.rx_recorded_data_path = rx_recorded_data_path
+            self.captured_data_file_name = "rx-test-"
+            self.coerced_rx_freq = 2.4e9
+            self.coerced_rx_rate = 1e6
+            self.coerced_rx_gain = 30
+            self.coerced_rx_bandwidth = 1e6
+            self.hw_type = "x310"
+            self.hw_subtype = "UBX-160"
+            self.seid = 1
+            self.clock_reference = "internal"
+            self.channel_attenuation_db = 0
+            self.variation_index = 0
+
+    # bursty signal: noise bursts in a silent record
+    rng = np.random.default_rng(0)
+    num_channels, num_samps, nrecords = 2, 100000, 3
+    rx_data_fc32 = np.zeros((num_channels, num_samps), dtype=np.complex64)
+    for burst_start in range(0, num_samps, 20000):
+        rx_data_fc32[:, burst_start : burst_start + 2000] = (
+            rng.normal(0, 0.1, (num_channels, 2000)) + 1j * rng.normal(0, 0.1, (num_channels, 2000))
+        )
+
+    for codec in ["zlib", "zstd", "lz4"]:
+        for rx_sample_format in ["fc32", "sc16"]:
+            general_config = {
+                "use_tx_timestamp": "False",
+                "enable_mmwave": "False",
+                "author": "Test",
+                "description": "Test RX data compression",
+                "comment": "Test",
+                "rx_sample_format": rx_sample_format,
+                "rx_data_compression": codec,
+                "rx_compression_level": 1,
+                "rx_compression_chunk_size_kb": 16,
+            }
+            dtype = get_rx_sample_format(rx_sample_format)["dtype"]
+            rx_data = rx_data_fc32 if rx_sample_format == "fc32" else complex64_to_sc16(rx_data_fc32)
+            with tempfile.TemporaryDirectory() as rx_recorded_data_path:
+                rx_args = RxRFDataRecorderConfig(rx_recorded_data_path, num_samps)
+
+                # per record layout
+                write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf(
+                    rx_data, rx_args, [], general_config, 0
+                )
+                # per variation layout, records are written in reverse order, like out of order writer workers
+                rx_sigmf_archive = write_rx_recorded_data_in_sigmf.RxSigMFArchiveWriter(
+                    rx_args, [], general_config, nrecords, dtype=dtype
+                )
+                for idx in reversed(range(nrecords)):
+                    rx_sigmf_archive.write_record(rx_data, rx_args, [], general_config, idx)
+                rx_sigmf_archive.close()
+
+                file_names = os.listdir(rx_recorded_data_path)
+                # only compressed data files are written
+                assert not [name for name in file_names if name.endswith(".sigmf-data")]
+                assert len([name for name in file_names if name.endswith(COMPRESSED_DATA_FILE_EXTENSION)]) == 2
+                for meta_file_name in [name for name in file_names if name.endswith(".sigmf-meta")]:
+                    reader = SigMFRecordReader(os.path.join(rx_recorded_data_path, meta_file_name))
+                    compression_info = reader.get_global_info()["compression"]
+                    assert compression_info["codec"] == (codec if is_codec_available(codec) else "zlib")
+                    assert compression_info["compression_ratio"] > 2
+                    assert compression_info["compression_throughput_mbps"] > 0
+                    print(meta_file_name, compression_info)
+                    for idx in range(reader.get_num_records()):
+                        assert np.array_equal(reader.read_record(idx, raw=True), rx_data)
+                        for sample_start, num_range_samps in [(0, 1), (4000, 100), (12345, 20000), (99999, 1)]:
+                            rx_data_range = reader.read_samples(idx, sample_start, num_range_samps, raw=True)
+                            assert np.array_equal(
+                                rx_data_range, rx_data[:, sample_start : sample_start + num_range_samps]
+                            )
+
+    print("Test passed")
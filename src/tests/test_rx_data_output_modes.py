@@ -0,0 +1,139 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - RX Data Output Modes
+"""
+# Description:
+#   Write records with the RX data output modes memmap and direct, then read them back and check the data:
+#       -   memmap: the record is received into the memory-mapped data file and the file has the record size,
+#           a short record (i.e. cut by a recv timeout) is written with its received samples only
+#       -   direct: the record is written with O_DIRECT from a page-aligned buffer, also if the record size is
+#           not a multiple of the block size (the unaligned tail is written with buffered I/O), and with
+#           buffered I/O if the buffer is not aligned
+#   If the file system does not support direct I/O, the direct mode falls back to buffered I/O, so the data is
+#   the same in both cases.
+#
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib import write_rx_recorded_data_in_sigmf
+from lib.read_sigmf_recorded_data import SigMFRecordReader
+from lib.rx_buffer_pool import RxBufferPool
+
+if __name__ == "__main__":
+
+    # local class for testing
+    class RxRFDataRecorderConfig:
+        """Rx RFDataRecorder Config class"""
+
+        def __init__(self, rx_recorded_data_path, num_rx_samps):
+            self.channels = [0, 1]
+            self.num_rx_samps = num_rx_samps
+            self.rx_recorded_data_path = rx_recorded_data_path
+            self.captured_data_file_name = "rx-test-"
+            self.coerced_rx_freq = 2.4e9
+            self.coerced_rx_rate = 1e6
+            self.coerced_rx_gain = 30
+            self.coerced_rx_bandwidth = 1e6
+            self.hw_type = "x310"
+            self.hw_subtype = "UBX-160"
+            self.seid = 1
+            self.clock_reference = "internal"
+            self.channel_attenuation_db = 0
+            self.variation_index = 0
+
+    general_config = {
+        "use_tx_timestamp": "False",
+        "enable_mmwave": "False",
+        "author": "Test",
+        "description": "Test RX data output modes",
+        "comment": "Test",
+    }
+    num_channels = 2
+
+    def get_test_record(num_samps, idx):
+        samps = np.arange(num_channels * num_samps, dtype=np.float32).reshape(num_channels, num_samps)
+        return (samps + 1j * (samps + idx)).astype(np.complex64)
+
+    def read_back(rx_recorded_data_path, idx):
+        meta_file_name = [
+            name
+            for name in os.listdir(rx_recorded_data_path)
+            if name.startswith(f"rx-test-{idx}-") and name.endswith(".sigmf-meta")
+        ][0]
+        reader = SigMFRecordReader(os.path.join(rx_recorded_data_path, meta_file_name))
+        return reader, reader.read_record(0)
+
+    with tempfile.TemporaryDirectory() as rx_recorded_data_path:
+        # memmap: receive into the mapped data file
+        num_samps = 1000
+        rx_args = RxRFDataRecorderConfig(rx_recorded_data_path, num_samps)
+        memmap_config = dict(general_config, rx_data_output_mode="memmap")
+        record_time = time.time()
+        rx_data = write_rx_recorded_data_in_sigmf.create_rx_data_memmap(
+            rx_args, [], memmap_config, 0, record_time, num_channels, num_samps
+        )
+        assert isinstance(rx_data, np.memmap) and rx_data.shape == (num_channels, num_samps)
+        expected_data = get_test_record(num_samps, 0)
+        rx_data[:] = expected_data
+        write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf(
+            rx_data, rx_args, [], memmap_config, 0, {}, record_time
+        )
+        reader, read_data = read_back(rx_recorded_data_path, 0)
+        assert os.path.getsize(reader.data_file_path) == expected_data.nbytes
+        assert np.array_equal(read_data, expected_data)
+
+        # memmap: short record
+        record_time = time.time() + 1
+        rx_data = write_rx_recorded_data_in_sigmf.create_rx_data_memmap(
+            rx_args, [], memmap_config, 5, record_time, num_channels, num_samps
+        )
+        expected_data = get_test_record(num_samps // 3, 5)
+        rx_data[:, : num_samps // 3] = expected_data
+        write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf(
+            rx_data[:, : num_samps // 3], rx_args, [], memmap_config, 5, {}, record_time
+        )
+        reader, read_data = read_back(rx_recorded_data_path, 5)
+        assert os.path.getsize(reader.data_file_path) == expected_data.nbytes
+        assert np.array_equal(read_data, expected_data)
+
+        # direct: record sizes that are a multiple of the block size and that are not, from an aligned buffer
+        direct_config = dict(general_config, rx_data_output_mode="direct")
+        block_num_samps = write_rx_recorded_data_in_sigmf.DIRECT_IO_ALIGNMENT // 8 // num_channels
+        for idx, num_samps in enumerate([4 * block_num_samps, 1000, 3], start=1):
+            rx_args = RxRFDataRecorderConfig(rx_recorded_data_path, num_samps)
+            rx_buffer_pool = RxBufferPool(1, num_channels, num_samps)
+            buffer_idx, rx_data = rx_buffer_pool.acquire()
+            assert rx_data.ctypes.data % write_rx_recorded_data_in_sigmf.DIRECT_IO_ALIGNMENT == 0
+            expected_data = get_test_record(num_samps, idx)
+            rx_data[:] = expected_data
+            write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf(
+                rx_data, rx_args, [], direct_config, idx
+            )
+            rx_buffer_pool.release(buffer_idx)
+            reader, read_data = read_back(rx_recorded_data_path, idx)
+            print("Direct write of", expected_data.nbytes, "bytes")
+            assert os.path.getsize(reader.data_file_path) == expected_data.nbytes
+            assert np.array_equal(read_data, expected_data)
+            rx_buffer_pool.close()
+
+        # direct: unaligned buffer is written with buffered I/O
+        data_file_path = os.path.join(rx_recorded_data_path, "unaligned.sigmf-data")
+        expected_data = get_test_record(1000, 4)
+        unaligned_buffer = np.empty(expected_data.size + 1, dtype=np.complex64)[1:].reshape(num_channels, -1)
+        assert unaligned_buffer.ctypes.data % write_rx_recorded_data_in_sigmf.DIRECT_IO_ALIGNMENT
+        unaligned_buffer[:] = expected_data
+        write_rx_recorded_data_in_sigmf.write_rx_data_direct(unaligned_buffer, data_file_path)
+        assert np.array_equal(np.fromfile(data_file_path, dtype=np.complex64), expected_data.reshape(-1))
+
+    print("Test passed")
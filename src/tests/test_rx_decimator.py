@@ -0,0 +1,129 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - RX Decimator
+"""
+# Description:
+#   Decimate records with a tone in the occupied bandwidth of the TX signals and a tone outside. Test checks:
+#       -   the decimation factor is given by the occupied bandwidth and the oversampling
+#       -   the tone in the bandwidth is kept and the tone outside is suppressed, for complex float and int16 samples
+#       -   the filter design is cached
+#       -   the decimated sample rate and the trigger annotations are written to the metadata
+#
+import os
+import sys
+import json
+import tempfile
+import numpy as np
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib import write_rx_recorded_data_in_sigmf
+from lib.rx_decimator import get_rx_decimator, design_decimation_filter
+from lib.rx_sample_format import complex64_to_sc16, sc16_to_complex64
+
+if __name__ == "__main__":
+
+    # local classes for testing
+    class TxConfig:
+        """Tx Config class"""
+
+        def __init__(self, freq, bandwidth):
+            self.freq = freq
+            self.bandwidth = bandwidth
+            self.waveform_config = {"bandwidth": bandwidth}
+
+    class RxRFDataRecorderConfig:
+        """Rx RFDataRecorder Config class"""
+
+        def __init__(self, rx_recorded_data_path, num_rx_samps, rate):
+            self.channels = [0, 1]
+            self.num_rx_samps = num_rx_samps
+            self.rx_recorded_data_path = rx_recorded_data_path
+            self.captured_data_file_name = "rx-test-"
+            self.coerced_rx_freq = 2.4e9
+            self.coerced_rx_rate = rate
+            self.coerced_rx_gain = 30
+            self.coerced_rx_bandwidth = rate
+            self.hw_type = "x310"
+            self.hw_subtype = "UBX-160"
+            self.seid = 1
+            self.clock_reference = "internal"
+            self.channel_attenuation_db = 0
+            self.variation_index = 0
+            self.decimation_factor = 1
+
+    rx_rate, rx_freq = 122.88e6, 2.4e9
+    num_channels, num_samps = 2, 122880
+    general_config = {
+        "use_tx_timestamp": "False",
+        "enable_mmwave": "False",
+        "author": "Test",
+        "description": "Test RX decimator",
+        "comment": "Test",
+        "rx_decimation_mode": "signal_bandwidth",
+        "rx_decimation_oversampling": 1.25,
+    }
+    # two emitters of 10 MHz bandwidth at +-5 MHz: occupied bandwidth 20 MHz, decimation factor 122.88 / 25 --> 4
+    txs_args = [TxConfig(rx_freq - 5e6, 10e6), TxConfig(rx_freq + 5e6, 10e6)]
+    rx_decimator = get_rx_decimator(general_config, rx_rate, rx_freq, txs_args)
+    assert rx_decimator.bandwidth == 20e6
+    assert rx_decimator.decimation_factor == 4
+    assert rx_decimator.out_rate == rx_rate / 4
+    assert get_rx_decimator(dict(general_config, rx_decimation_mode="none"), rx_rate, rx_freq, txs_args) is None
+    # no decimation if the occupied bandwidth needs the RX rate
+    assert get_rx_decimator(general_config, 30.72e6, rx_freq, txs_args) is None
+
+    # tone in the occupied bandwidth and tone that aliases into it after decimation
+    t = np.arange(num_samps) / rx_rate
+    in_band_tone = 0.5 * np.exp(2j * np.pi * 7e6 * t)
+    out_of_band_tone = 0.25 * np.exp(2j * np.pi * (rx_rate / 4 + 7e6) * t)
+    rx_data_fc32 = np.tile(in_band_tone + out_of_band_tone, (num_channels, 1)).astype(np.complex64)
+    expected_data = np.tile(in_band_tone[::4], (num_channels, 1))
+    for rx_data in [rx_data_fc32, complex64_to_sc16(rx_data_fc32)]:
+        rx_data_decimated = rx_decimator.decimate(rx_data)
+        assert rx_data_decimated.dtype == rx_data.dtype
+        assert rx_data_decimated.shape == (num_channels, rx_decimator.get_num_out_samps(num_samps))
+        if rx_data_decimated.dtype != np.complex64:
+            rx_data_decimated = sc16_to_complex64(rx_data_decimated)
+        # the filter settles after its length, compare the samples in the middle of the record
+        error = rx_data_decimated[:, 1000:-1000] - expected_data[:, 1000:-1000]
+        error_db = 10 * np.log10(np.mean(np.abs(error) ** 2) / np.mean(np.abs(expected_data) ** 2))
+        print("Error of decimated record: ", error_db, "dB")
+        assert error_db < -40
+
+    # the filter is designed once
+    get_rx_decimator(general_config, rx_rate, rx_freq, txs_args)
+    assert design_decimation_filter.cache_info().hits >= 1
+
+    # write decimated record with trigger annotations
+    with tempfile.TemporaryDirectory() as rx_recorded_data_path:
+        rx_args = RxRFDataRecorderConfig(rx_recorded_data_path, num_samps, rx_rate)
+        rx_args.decimation_factor = rx_decimator.decimation_factor
+        write_rx_recorded_data = rx_decimator.wrap_write_function(
+            write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf
+        )
+        record_info = {
+            "trigger_annotations": [
+                {"sample_start": 4000, "sample_count": 1001, "metadata": {"core:label": "energy_trigger"}}
+            ]
+        }
+        write_rx_recorded_data(rx_data_fc32, rx_args, [], general_config, 0, record_info)
+        meta_file_name = [name for name in os.listdir(rx_recorded_data_path) if name.endswith(".sigmf-meta")][0]
+        with open(os.path.join(rx_recorded_data_path, meta_file_name), "r") as meta_file:
+            metadata = json.load(meta_file)
+        assert metadata["global"]["core:sample_rate"] == rx_rate / 4
+        assert metadata["global"]["decimation_factor"] == 4
+        assert metadata["global"]["receiver_sample_rate"] == rx_rate
+        annotations = metadata["annotations"]
+        assert annotations[0]["core:sample_count"] == num_samps // 4
+        assert annotations[1]["core:sample_start"] == 1000 and annotations[1]["core:sample_count"] == 251
+        data_file_path = os.path.join(rx_recorded_data_path, meta_file_name.replace(".sigmf-meta", ".sigmf-data"))
+        assert os.path.getsize(data_file_path) == rx_data_fc32.nbytes // 4
+
+    print("Test passed")
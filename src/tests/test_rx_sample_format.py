@@ -0,0 +1,103 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - RX Sample Format
+"""
+# Description:
+#   Write records with the RX sample formats fc32 and sc16 to SigMF files (per record and per variation layout),
+#   then read them back. Test checks:
+#       -   sc16 records are written as ci16_le with half the data size of fc32 records
+#       -   sc16 records are converted to complex64 on load with the scale factor given in the metadata
+#       -   the raw complex int16 data can be read as well
+#
+import os
+import sys
+import tempfile
+import numpy as np
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib import write_rx_recorded_data_in_sigmf
+from lib.read_sigmf_recorded_data import SigMFRecordReader
+from lib.rx_sample_format import get_rx_sample_format, complex64_to_sc16, sc16_to_complex64, SC16_SCALE_FACTOR
+
+if __name__ == "__main__":
+
+    # local class for testing
+    class RxRFDataRecorderConfig:
+        """Rx RFDataRecorder Config class"""
+
+        def __init__(self, rx_recorded_data_path):
+            self.channels = [0, 1]
+            self.num_rx_samps = 1000
+            self.rx_recorded_data_path = rx_recorded_data_path
+            self.captured_data_file_name = "rx-test-"
+            self.coerced_rx_freq = 2.4e9
+            self.coerced_rx_rate = 1e6
+            self.coerced_rx_gain = 30
+            self.coerced_rx_bandwidth = 1e6
+            self.hw_type = "x310"
+            self.hw_subtype = "UBX-160"
+            self.seid = 1
+            self.clock_reference = "internal"
+            self.channel_attenuation_db = 0
+            self.variation_index = 0
+
+    # complex samples in full scale, as received with fc32
+    rng = np.random.default_rng(0)
+    num_channels, num_samps = 2, 1000
+    rx_data_fc32 = (
+        rng.uniform(-1, 1, (num_channels, num_samps)) + 1j * rng.uniform(-1, 1, (num_channels, num_samps))
+    ).astype(np.complex64)
+    rx_data_sc16 = complex64_to_sc16(rx_data_fc32)
+    assert np.max(np.abs(sc16_to_complex64(rx_data_sc16) - rx_data_fc32)) <= SC16_SCALE_FACTOR
+
+    data_nbytes = {}
+    for rx_sample_format in ["fc32", "sc16"]:
+        general_config = {
+            "use_tx_timestamp": "False",
+            "enable_mmwave": "False",
+            "author": "Test",
+            "description": "Test RX sample format",
+            "comment": "Test",
+            "rx_sample_format": rx_sample_format,
+        }
+        dtype = get_rx_sample_format(rx_sample_format)["dtype"]
+        rx_data = rx_data_fc32 if rx_sample_format == "fc32" else rx_data_sc16
+        with tempfile.TemporaryDirectory() as rx_recorded_data_path:
+            rx_args = RxRFDataRecorderConfig(rx_recorded_data_path)
+
+            # per record layout
+            write_rx_recorded_data_in_sigmf.write_rx_recorded_data_in_sigmf(
+                rx_data, rx_args, [], general_config, 0
+            )
+            meta_file_name = [name for name in os.listdir(rx_recorded_data_path) if name.endswith(".sigmf-meta")][0]
+            reader = SigMFRecordReader(os.path.join(rx_recorded_data_path, meta_file_name))
+            data_nbytes[rx_sample_format] = os.path.getsize(reader.data_file_path)
+            print(rx_sample_format, ":", reader.get_global_info())
+
+            # per variation layout
+            rx_sigmf_archive = write_rx_recorded_data_in_sigmf.RxSigMFArchiveWriter(
+                rx_args, [], general_config, 2, dtype=dtype
+            )
+            for idx in range(2):
+                rx_sigmf_archive.write_record(rx_data, rx_args, [], general_config, idx)
+            rx_sigmf_archive.close()
+            archive_reader = SigMFRecordReader(rx_sigmf_archive.dataset_file_path[: -len(".sigmf-data")])
+
+            for record_reader in [reader, archive_reader]:
+                for idx in range(record_reader.get_num_records()):
+                    rx_data_read = record_reader.read_record(idx)
+                    assert rx_data_read.dtype == np.complex64
+                    assert rx_data_read.shape == (num_channels, num_samps)
+                    assert np.max(np.abs(rx_data_read - rx_data_fc32)) <= SC16_SCALE_FACTOR
+                    assert np.array_equal(record_reader.read_record(idx, raw=True), rx_data)
+
+    assert data_nbytes["sc16"] * 2 == data_nbytes["fc32"]
+
+    print("Test passed")
@@ -0,0 +1,115 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - TX and Rx Data Acquisition Sync
+"""
+# Description:
+#   The TX and RX threads of a variation are synced by a variation sync object.
+#   The test runs dummy TX and RX threads and checks that:
+#       -   RX starts if any TX or if all TXs are ready, depending on the RX start trigger
+#       -   TXs are stopped if all RXs are done, a single TX can be stopped
+#       -   a failing thread cancels the variation and releases the waiting threads
+#       -   waiting for a TX that is never ready times out
+#
+# Test prints the latency of the TX ready to RX start handshake
+#
+import os
+import sys
+import time
+import threading
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib import sync_settings
+
+
+# dummy TX: get ready after the given delay and wait until it is stopped
+def dummy_transmitter(ready_delay, events, variation_sync=None, tx_idx=None):
+    time.sleep(ready_delay)
+    events.append(("tx_ready", tx_idx, time.perf_counter()))
+    variation_sync.set_tx_ready()
+    variation_sync.wait_for_stop_tx_signal(tx_idx)
+    events.append(("tx_stopped", tx_idx, time.perf_counter()))
+
+
+# dummy RX: wait for TX, record for the given duration
+def dummy_recorder(duration, events, variation_sync=None):
+    if not variation_sync.wait_for_start_rx_data_acquisition(timeout=5):
+        raise Exception("ERROR: RX data acquisition is not started")
+    events.append(("rx_started", None, time.perf_counter()))
+    time.sleep(duration)
+    variation_sync.set_rx_done()
+
+
+def run_threads(variation_sync, targets):
+    threads = [
+        threading.Thread(
+            target=sync_settings.run_with_variation_sync,
+            args=(variation_sync, target, *args),
+            kwargs=kwargs,
+        )
+        for target, args, kwargs in targets
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+
+if __name__ == "__main__":
+
+    # any TX ready: RX starts after the first TX, all TXs stop after the last RX
+    for rx_start_trigger, first_tx_event in [("any_tx_ready", 0), ("all_txs_ready", 1)]:
+        events = []
+        variation_sync = sync_settings.VariationSync(2, 2, rx_start_trigger)
+        run_threads(
+            variation_sync,
+            [
+                (dummy_transmitter, (0.05, events), {"tx_idx": 0}),
+                (dummy_transmitter, (0.2, events), {"tx_idx": 1}),
+                (dummy_recorder, (0.1, events), {}),
+                (dummy_recorder, (0.3, events), {}),
+            ],
+        )
+        tx_ready_times = [event[2] for event in events if event[0] == "tx_ready"]
+        rx_start_times = [event[2] for event in events if event[0] == "rx_started"]
+        tx_stop_times = [event[2] for event in events if event[0] == "tx_stopped"]
+        assert min(rx_start_times) >= tx_ready_times[first_tx_event]
+        assert len(tx_stop_times) == 2
+        print(
+            rx_start_trigger,
+            ": handshake latency",
+            round((max(rx_start_times) - tx_ready_times[first_tx_event]) * 1e6),
+            "us",
+        )
+
+    # stop a single TX
+    variation_sync = sync_settings.VariationSync(2, 1)
+    variation_sync.stop_tx_signal(1)
+    assert variation_sync.wait_for_stop_tx_signal(1, timeout=0)
+    assert not variation_sync.wait_for_stop_tx_signal(0, timeout=0.01)
+
+    # a failing TX cancels the variation, the RX does not wait for the timeout
+    def failing_transmitter(variation_sync=None):
+        raise Exception("TX failed")
+
+    events = []
+    variation_sync = sync_settings.VariationSync(1, 1)
+    threading.excepthook = lambda args: None
+    start_time = time.perf_counter()
+    run_threads(variation_sync, [(failing_transmitter, (), {}), (dummy_recorder, (0.1, events), {})])
+    assert variation_sync.is_cancelled()
+    assert time.perf_counter() - start_time < 1
+    assert not events
+
+    # TX is never ready
+    variation_sync = sync_settings.VariationSync(1, 1)
+    assert not variation_sync.wait_for_start_rx_data_acquisition(timeout=0.05)
+
+    print("Sync status:", variation_sync.get_status())
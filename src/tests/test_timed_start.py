@@ -0,0 +1,158 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Timed Start
+"""
+# Description:
+#   TX and RX devices of a variation start at a common device time in the future.
+#   The test runs against simulated USRPs (a minimal UHD stand-in, no hardware and no UHD is needed).
+#   Each simulated device has its own time offset and PPS edges are given by the host clock.
+#   The test checks that:
+#       -   the device time of all devices is aligned at the same PPS edge, or from the host
+#       -   all TX and RX threads get the same start time in the future of all devices
+#       -   the device time is aligned only once per session
+#       -   a cancelled variation releases the devices waiting for the timed start
+#
+# Test prints the device time offsets after alignment and the start time margin
+#
+import os
+import sys
+import math
+import time
+import types
+import random
+import threading
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+
+# Minimal UHD stand-in: only the time spec is needed
+class TimeSpec:
+    def __init__(self, real_secs=0.0):
+        self.real_secs = real_secs
+
+    def get_real_secs(self):
+        return self.real_secs
+
+
+if "uhd" not in sys.modules:
+    sys.modules["uhd"] = types.SimpleNamespace(types=types.SimpleNamespace(TimeSpec=TimeSpec))
+
+from lib import sync_settings
+from lib import timed_start
+from lib.timed_start import TimedStart
+
+# Faster PPS for the test
+timed_start.PPS_PERIOD_S = 0.2
+
+
+# Simulated device time: device time = host time + offset, PPS edges at multiples of PPS period of host time
+class SimulatedTimekeeper:
+    def __init__(self):
+        self.offset = random.uniform(-100, 100)
+        self.next_pps_time = None
+        self.next_pps_edge = None
+        self.lock = threading.Lock()
+
+    def update(self, host_time):
+        if self.next_pps_edge is not None and host_time >= self.next_pps_edge:
+            self.offset = self.next_pps_time - self.next_pps_edge
+            self.next_pps_edge = None
+
+    def get_time_now(self):
+        with self.lock:
+            host_time = time.monotonic()
+            self.update(host_time)
+            return TimeSpec(host_time + self.offset)
+
+    def get_time_last_pps(self):
+        with self.lock:
+            host_time = time.monotonic()
+            self.update(host_time)
+            last_pps_edge = math.floor(host_time / timed_start.PPS_PERIOD_S) * timed_start.PPS_PERIOD_S
+            return TimeSpec(last_pps_edge + self.offset)
+
+    def set_time_next_pps(self, time_spec):
+        with self.lock:
+            host_time = time.monotonic()
+            self.next_pps_edge = (math.floor(host_time / timed_start.PPS_PERIOD_S) + 1) * timed_start.PPS_PERIOD_S
+            self.next_pps_time = time_spec.get_real_secs()
+
+    def set_time_now(self, time_spec):
+        with self.lock:
+            self.offset = time_spec.get_real_secs() - time.monotonic()
+
+
+# Simulated session of the session pool
+class SimulatedSession:
+    def __init__(self):
+        self.timekeeper = SimulatedTimekeeper()
+        self.is_time_aligned = False
+
+    def get_timekeeper(self):
+        return self.timekeeper
+
+
+# Run one variation: all devices wait for the timed start, return start time and device time of each device
+def run_variation(sessions, device_time_source):
+    variation_sync = sync_settings.VariationSync(
+        len(sessions) - 1, 1, timed_start=TimedStart(len(sessions), 0.1, device_time_source)
+    )
+    results = [None] * len(sessions)
+
+    def device_thread(idx, session):
+        start_time = variation_sync.wait_for_timed_start(session, timeout=5)
+        results[idx] = (start_time, session.get_timekeeper().get_time_now().get_real_secs())
+
+    threads = [
+        threading.Thread(target=device_thread, args=(idx, session)) for idx, session in enumerate(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+if __name__ == "__main__":
+
+    for device_time_source in timed_start.DEVICE_TIME_SOURCES:
+        sessions = [SimulatedSession() for idx in range(3)]
+        for variation in range(2):
+            variation_start = time.time()
+            results = run_variation(sessions, device_time_source)
+            variation_time = time.time() - variation_start
+            start_times = [start_time for start_time, _ in results]
+            assert all(start_time == start_times[0] for start_time in start_times)
+            assert all(start_time > device_time for start_time, device_time in results)
+            assert all(session.is_time_aligned for session in sessions)
+            # the device time is aligned only for the first variation
+            if variation == 1:
+                assert variation_time < timed_start.PPS_PERIOD_S
+
+        device_times = [session.get_timekeeper().get_time_now().get_real_secs() for session in sessions]
+        max_offset = max(device_times) - min(device_times)
+        assert max_offset < 0.01
+        print(
+            device_time_source,
+            ": max device time offset",
+            round(max_offset * 1e6),
+            "us, start time margin",
+            round(min(start_time - device_time for start_time, device_time in results) * 1e3, 3),
+            "ms",
+        )
+
+    # a device never gets ready, the variation is cancelled
+    sessions = [SimulatedSession() for idx in range(2)]
+    variation_sync = sync_settings.VariationSync(1, 1, timed_start=TimedStart(2, 0.1, "host"))
+    waiting_thread = threading.Thread(target=variation_sync.wait_for_timed_start, args=(sessions[0],))
+    waiting_thread.start()
+    variation_sync.cancel()
+    waiting_thread.join(timeout=1)
+    assert not waiting_thread.is_alive()
+    assert variation_sync.wait_for_timed_start(sessions[1]) is None
@@ -0,0 +1,159 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - USRP Session Pool
+"""
+# Description:
+#   The USRP sessions are opened once and reused across all variations. The test uses a stub device session
+#   instead of a USRP and checks that:
+#       -   the session of a device is reused, the device key does not depend on the master clock rate
+#       -   the device is reopened if the session type or the device args (master clock rate) change
+#       -   only the changed RF settings are applied, redundant sets are skipped
+#       -   all sessions are closed at the end of the API execution
+#       -   a multi-channel record is received completely into the record buffer if the RX streamer returns partial
+#           blocks of samples and receives into C-contiguous buffers only, as UHD does
+#
+import os
+import sys
+import numpy as np
+import uhd
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib.usrp_session_pool import UsrpSession, UsrpSessionPool, MultiUsrpSession, get_device_key
+
+
+# Stub device sessions that count how often a device is opened and closed
+class StubSession(UsrpSession):
+    """Stub session class"""
+
+    num_opened = 0
+    num_closed = 0
+
+    def __init__(self, args):
+        super().__init__(args)
+        StubSession.num_opened += 1
+        self.is_open = True
+        # values set on the stub device
+        self.set_values = []
+
+    def set_freq(self, chan, freq):
+        return self.set_if_changed(chan, "freq", freq, self.set_values.append)
+
+    def close(self):
+        super().close()
+        StubSession.num_closed += 1
+        self.is_open = False
+
+
+class OtherStubSession(StubSession):
+    """Stub session class of another session type"""
+
+
+# Stub USRP device with device time only
+class StubUsrp:
+    """Stub USRP class"""
+
+    def get_time_now(self):
+        return uhd.types.TimeSpec(0.0)
+
+
+# MultiUSRP session of a stub USRP device
+class StubMultiUsrpSession(MultiUsrpSession):
+    """Stub MultiUSRP session class"""
+
+    def __init__(self, args):
+        UsrpSession.__init__(self, args)
+        self.usrp = StubUsrp()
+        self.rx_streamers = {}
+        self.rx_buffer_pool = None
+
+
+# Stub RX streamer: increasing sample values per channel, returned in partial blocks
+class StubRxStreamer:
+    """Stub RX streamer class"""
+
+    def __init__(self, num_channels, block_num_samps, max_num_samps=64):
+        self.num_channels = num_channels
+        self.block_num_samps = block_num_samps
+        self.max_num_samps = max_num_samps
+
+    def get_max_num_samps(self):
+        return self.max_num_samps
+
+    def issue_stream_cmd(self, stream_cmd):
+        self.num_streamed_samps = 0
+
+    def recv(self, rx_data, rx_metadata, timeout):
+        # UHD fills a temporary copy if the buffer is not C-contiguous
+        recv_buffer = rx_data if rx_data.flags.c_contiguous else rx_data.copy()
+        samps = min(self.block_num_samps, recv_buffer.shape[-1])
+        stream = np.arange(self.num_streamed_samps, self.num_streamed_samps + samps)
+        for chan in range(self.num_channels):
+            recv_buffer[chan, :samps] = stream + 1j * chan
+        self.num_streamed_samps += samps
+        return samps
+
+
+if __name__ == "__main__":
+    usrp_session_pool = UsrpSessionPool()
+    device_args = "type=x300,addr=192.168.40.2,master_clock_rate=184.32e6"
+
+    # the device key does not depend on the order of the args and the master clock rate
+    assert get_device_key(device_args) == get_device_key(" addr=192.168.40.2 ,type=x300")
+
+    # session is reused by all variations
+    session = usrp_session_pool.get_session(StubSession, device_args)
+    for _ in range(3):
+        assert usrp_session_pool.get_session(StubSession, device_args) is session
+    assert StubSession.num_opened == 1
+
+    # only changed settings are applied
+    assert session.set_freq(0, 2.4e9)
+    assert not session.set_freq(0, 2.4e9)
+    assert session.set_freq(1, 2.4e9)
+    assert session.set_freq(0, 3.5e9)
+    assert session.set_values == [2.4e9, 2.4e9, 3.5e9]
+
+    # master clock rate changed: reopen the device, the settings are applied again
+    reopened_session = usrp_session_pool.get_session(
+        StubSession, "type=x300,addr=192.168.40.2,master_clock_rate=200e6"
+    )
+    assert reopened_session is not session and not session.is_open
+    assert StubSession.num_opened == 2 and StubSession.num_closed == 1
+    assert reopened_session.set_freq(0, 3.5e9)
+
+    # session type changed: reopen the device
+    other_session = usrp_session_pool.get_session(
+        OtherStubSession, "type=x300,addr=192.168.40.2,master_clock_rate=200e6"
+    )
+    assert isinstance(other_session, OtherStubSession) and not reopened_session.is_open
+    assert StubSession.num_opened == 3 and StubSession.num_closed == 2
+
+    # sessions of different devices
+    second_session = usrp_session_pool.get_session(StubSession, "type=b200,serial=3215B94")
+    assert len(usrp_session_pool.sessions) == 2
+
+    # close all sessions, the next variation opens the device again
+    usrp_session_pool.close_all()
+    assert not usrp_session_pool.sessions
+    assert not other_session.is_open and not second_session.is_open
+    assert StubSession.num_closed == 4
+    assert usrp_session_pool.get_session(StubSession, "type=b200,serial=3215B94") is not second_session
+    assert StubSession.num_opened == 5
+
+    # multi-channel record received in partial blocks into a record buffer with stale content
+    num_samps = 1000
+    multi_usrp_session = StubMultiUsrpSession("type=x300,addr=192.168.40.2")
+    rx_data = np.full((2, num_samps), -1, dtype=np.complex64)
+    rx_data = multi_usrp_session.recv_num_samps(StubRxStreamer(2, 48), num_samps, [0, 1], rx_data)
+    assert rx_data.shape == (2, num_samps)
+    for chan in range(2):
+        assert np.array_equal(rx_data[chan], np.arange(num_samps) + 1j * chan)
+
+    print("Test passed")
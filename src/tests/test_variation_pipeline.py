@@ -0,0 +1,70 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Variation Pipeline
+"""
+# Description:
+#   The next variations are prepared in background while the current variation is recording.
+#   The test runs dummy variations with a preparation time and an execution time and checks that:
+#       -   the variations are given in order with their prepared data
+#       -   the preparation of the next variation overlaps with the execution of the current variation
+#       -   the total time is reduced compared to a pipeline depth of zero (no pipelining)
+#
+# Test prints the pipeline stats
+#
+import os
+import sys
+import time
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib.variation_pipeline import VariationPipeline
+
+PREPARE_TIME_S = 0.05
+EXECUTION_TIME_S = 0.05
+NUM_VARIATIONS = 10
+
+
+def prepare_variation(iteration_config):
+    time.sleep(PREPARE_TIME_S)
+    return {"variation": iteration_config, "prepared_time": time.perf_counter()}
+
+
+def run_variations(pipeline_depth):
+    variation_pipeline = VariationPipeline(prepare_variation, pipeline_depth)
+    start_time = time.perf_counter()
+    variations = []
+    for iteration_config, prepared_variation in variation_pipeline.run(range(NUM_VARIATIONS)):
+        assert prepared_variation["variation"] == iteration_config
+        variations.append(iteration_config)
+        time.sleep(EXECUTION_TIME_S)
+    elapsed_time_s = time.perf_counter() - start_time
+    variation_pipeline.print_stats()
+    assert variations == list(range(NUM_VARIATIONS))
+    return elapsed_time_s, variation_pipeline
+
+
+if __name__ == "__main__":
+    serial_time_s, _ = run_variations(0)
+    pipelined_time_s, variation_pipeline = run_variations(1)
+    print("Elapsed time: serial", round(serial_time_s, 3), "s, pipelined", round(pipelined_time_s, 3), "s")
+    # serial: preparation and execution of every variation, pipelined: only the first preparation is waited for
+    assert serial_time_s >= NUM_VARIATIONS * (PREPARE_TIME_S + EXECUTION_TIME_S)
+    assert pipelined_time_s < serial_time_s * 0.75
+    assert variation_pipeline.wait_time_s < variation_pipeline.prepare_time_s / 2
+
+    # a deeper pipeline gives the same variations in the same order
+    run_variations(3)
+
+    # the pending preparations are dropped if the execution is stopped
+    variation_pipeline = VariationPipeline(prepare_variation, 2)
+    for iteration_config, _ in variation_pipeline.run(range(NUM_VARIATIONS)):
+        if iteration_config == 2:
+            break
+    assert variation_pipeline.num_variations == 3
+    print("Test passed")
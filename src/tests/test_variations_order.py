@@ -0,0 +1,82 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Variations Order
+"""
+# Description:
+#   The variations are reordered to minimize expensive transitions between two consecutive variations.
+#   The test reorders a variations product and checks that:
+#       -   every variation is given exactly once and its config order index is kept
+#       -   exactly one parameter changes between two consecutive variations
+#       -   the most expensive parameter (frequency) changes the fewest times
+#       -   the estimated cost is the same as the cost counted over all transitions
+#
+# Test prints the transition cost of config order and new order
+#
+import os
+import sys
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib.variations_product import VariationsProduct
+from lib import variations_order
+
+
+# Count the transition cost over all consecutive variations
+def count_transition_cost(variations_product, cost_model):
+    total_cost = 0
+    previous_config = None
+    for iteration_config in variations_product:
+        if previous_config is not None:
+            for parameter in variations_product.columns:
+                if iteration_config[parameter] != previous_config[parameter]:
+                    total_cost += variations_order.get_parameter_cost(parameter, cost_model)
+        previous_config = iteration_config
+    return total_cost
+
+
+if __name__ == "__main__":
+
+    variations_dict = {
+        "Tx1_gain": [0, 10, 20, 30],
+        "Tx1_waveform_file_name": ["LTE_TDD", "NR_FR1", "WiFi"],
+        "Tx1_freq": [3.5e9, 3.6e9, 3.7e9],
+        "Tx1_antenna": ["TX/RX"],
+        "Rx1_gain": [10, 20],
+    }
+    variations_product = VariationsProduct(variations_dict)
+    cost_model = variations_order.get_retune_cost_model({"gain": 2})
+    ordered_variations = variations_order.order_variations_by_retune_cost(variations_product, cost_model)
+
+    assert len(ordered_variations) == len(variations_product)
+    assert sorted(ordered_variations.product_indexes) == list(range(len(variations_product)))
+    for iteration_config in ordered_variations:
+        assert iteration_config.equals(variations_product[iteration_config.name])
+
+    ordered_configs = list(ordered_variations)
+    for previous_config, iteration_config in zip(ordered_configs[:-1], ordered_configs[1:]):
+        assert (previous_config != iteration_config).sum() == 1
+    num_freq_changes = sum(
+        previous_config["Tx1_freq"] != iteration_config["Tx1_freq"]
+        for previous_config, iteration_config in zip(ordered_configs[:-1], ordered_configs[1:])
+    )
+    assert num_freq_changes == 2
+
+    config_order_cost = variations_order.get_config_order_cost(variations_product, cost_model)
+    new_order_cost = ordered_variations.product_indexes.get_cost(ordered_variations.columns, cost_model)
+    assert config_order_cost == count_transition_cost(variations_product, cost_model)
+    assert new_order_cost == count_transition_cost(ordered_variations, cost_model)
+    assert new_order_cost < config_order_cost
+
+    # slices of the new order
+    view = ordered_variations[5:20]
+    assert [iteration_config.name for iteration_config in view] == [
+        iteration_config.name for iteration_config in ordered_configs[5:20]
+    ]
+
+    print("Transition cost: config order", config_order_cost, ", new order", new_order_cost)
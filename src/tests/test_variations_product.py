@@ -0,0 +1,65 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Variations Product
+"""
+# Description:
+#   The variations product computes the cross product of all parameter variations on demand.
+#   The test compares it with the cross merge of pandas data frames and checks that:
+#       -   the number and the order of variations are the same
+#       -   random access, negative indexes and slicing give the same variations
+#       -   constant parameters do not change the number of variations
+#
+# Test prints the variations product
+#
+import os
+import sys
+import functools
+import pandas as pd
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib.variations_product import VariationsProduct
+
+if __name__ == "__main__":
+
+    variations_dict = {
+        "Tx1_args": ["type=x300,addr=192.168.40.2,"],
+        "Tx1_freq": [3.5e9, 3.6e9, 3.7e9],
+        "Tx1_gain": list(range(0, 30, 5)),
+        "Tx1_waveform_file_name": ["LTE_TDD", "NR_FR1"],
+        "Rx1_enable_lo_offset": [True, False],
+    }
+    variations_product = VariationsProduct(variations_dict)
+    variations_data_frame = functools.reduce(
+        lambda df1, df2: pd.merge(df1, df2, how="cross"),
+        [pd.DataFrame({key: value}) for key, value in variations_dict.items()],
+    )
+
+    assert len(variations_product) == len(variations_data_frame) == 3 * 6 * 2 * 2
+    for i, iteration_config in enumerate(variations_product):
+        assert iteration_config.equals(variations_data_frame.iloc[i].astype(object).rename(i))
+    assert variations_product.iloc[-1].equals(variations_product[len(variations_product) - 1])
+
+    # slices are lazy views of the same product
+    view = variations_product[10:40:3]
+    assert len(view) == len(range(10, 40, 3))
+    for iteration_config, i in zip(view, range(10, 40, 3)):
+        assert iteration_config.name == i
+        assert iteration_config.equals(variations_product[i])
+    assert view[-1].equals(variations_product[37])
+
+    # constant parameters, i.e. HW info
+    variations_product.add_constant_column("Tx1_hw_type", "USRP X300")
+    variations_product.set_column_values(
+        "Tx1_hw_type", [hw_type + " + BBox" for hw_type in variations_product["Tx1_hw_type"]]
+    )
+    assert len(variations_product) == len(variations_data_frame)
+    assert variations_product[5]["Tx1_hw_type"] == "USRP X300 + BBox"
+
+    print(variations_product)
@@ -0,0 +1,90 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Waveform Cache
+"""
+# Description:
+#   The waveform cache reads each TX waveform file once and shares it by all variations and transmitters.
+#   The test writes some waveforms in MATLAB format and checks that:
+#       -   a cached waveform is returned without reading the file again (hit)
+#       -   the least recently used waveform is evicted if the cache size is exceeded
+#       -   a changed waveform file (modification time) is read again, its content hash is updated and its old
+#           version is removed from the cache
+#
+# Test prints the cache stats
+#
+import os
+import sys
+import tempfile
+import numpy as np
+import scipy.io
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib.waveform_cache import WaveformCache
+
+if __name__ == "__main__":
+
+    num_samps = 1000
+    waveform_nbytes = num_samps * np.dtype(np.complex64).itemsize
+
+    def write_waveform(waveform_path, waveform_file_name, value, mtime_ns=None):
+        waveform_file_path = os.path.join(waveform_path, waveform_file_name + ".mat")
+        scipy.io.savemat(waveform_file_path, {"waveform": np.full((num_samps, 1), value, dtype=np.complex64)})
+        if mtime_ns is not None:
+            os.utime(waveform_file_path, ns=(mtime_ns, mtime_ns))
+
+    with tempfile.TemporaryDirectory() as waveform_path:
+        for idx in range(3):
+            write_waveform(waveform_path, f"waveform_{idx}", idx + 1j)
+        # room for two waveforms
+        waveform_cache = WaveformCache(max_nbytes=2 * waveform_nbytes)
+
+        # first read is a miss, the next reads are hits and return the same shared data
+        tx_data_0, properties_0 = waveform_cache.get_waveform(waveform_path, "waveform_0", "matlab")
+        assert np.all(tx_data_0 == 1j) and not tx_data_0.flags.writeable
+        for _ in range(3):
+            tx_data, properties = waveform_cache.get_waveform(waveform_path, "waveform_0", "matlab")
+            assert tx_data is tx_data_0 and properties["content_hash"] == properties_0["content_hash"]
+        assert waveform_cache.hits == 3 and waveform_cache.misses == 1
+
+        # waveform 0 is used again after waveform 1, so waveform 1 is the least recently used one
+        waveform_cache.get_waveform(waveform_path, "waveform_1", "matlab")
+        waveform_cache.get_waveform(waveform_path, "waveform_0", "matlab")
+        waveform_cache.get_waveform(waveform_path, "waveform_2", "matlab")
+        assert waveform_cache.evictions == 1
+        assert waveform_cache.nbytes == 2 * waveform_nbytes
+        cached_names = [key[1] for key in waveform_cache.waveforms]
+        assert cached_names == ["waveform_0", "waveform_2"]
+        waveform_cache.get_waveform(waveform_path, "waveform_0", "matlab")
+        assert waveform_cache.misses == 3
+        waveform_cache.get_waveform(waveform_path, "waveform_1", "matlab")
+        assert waveform_cache.misses == 4
+
+        # changed waveform file: read again with a new content hash, the old version is removed
+        waveform_file_path = os.path.join(waveform_path, "waveform_0.mat")
+        mtime_ns = os.stat(waveform_file_path).st_mtime_ns + 10**9
+        write_waveform(waveform_path, "waveform_0", 5 + 1j, mtime_ns)
+        tx_data, properties = waveform_cache.get_waveform(waveform_path, "waveform_0", "matlab")
+        assert np.all(tx_data == 5 + 1j)
+        assert properties["content_hash"] != properties_0["content_hash"]
+        assert waveform_cache.misses == 5
+        cached_names = [key[1] for key in waveform_cache.waveforms]
+        assert cached_names.count("waveform_0") == 1
+        assert waveform_cache.nbytes == len(cached_names) * waveform_nbytes
+
+        # same content with a new modification time: read again, the content hash is the same
+        write_waveform(waveform_path, "waveform_0", 5 + 1j, mtime_ns + 10**9)
+        _, same_properties = waveform_cache.get_waveform(waveform_path, "waveform_0", "matlab")
+        assert same_properties["content_hash"] == properties["content_hash"]
+        assert waveform_cache.misses == 6
+
+        waveform_cache.print_stats()
+        assert not waveform_cache.load_locks
+
+    print("Test passed")
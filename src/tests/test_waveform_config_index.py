@@ -0,0 +1,137 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Waveform Config Index
+"""
+# Description:
+#   The waveform configs are parsed once and stored in an on-disk index keyed by the source file stats.
+#   The test scans the waveforms folder into a temporary index and checks that:
+#       -   every waveform config read from the index is the same as the parsed one, including numpy types
+#       -   a new index object loads the index file and gives the waveform configs without parsing
+#       -   a changed waveform config file is parsed again
+#       -   all waveform configs are parsed again if a parser module is changed
+#       -   the default index file is in the user cache folder, outside of the source tree
+#
+# Test prints the index stats and the parsing time compared to the index lookup time
+#
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib import read_waveform_config_interface
+from lib import waveform_config_index as waveform_config_index_module
+from lib.waveform_config_index import WaveformConfigIndex
+
+
+# Compare two waveform configs, including the type of each value
+def check_same_waveform_config(waveform_config, expected_waveform_config):
+    assert waveform_config.keys() == expected_waveform_config.keys()
+    for key, value in expected_waveform_config.items():
+        assert waveform_config[key] == value, key
+        assert type(waveform_config[key]) == type(value), key
+
+
+if __name__ == "__main__":
+    waveforms_dir = os.path.join(src_path, "waveforms")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        index_file_path = os.path.join(temp_dir, "waveform_config_index.json")
+        parsed_waveforms = []
+
+        # count the parsed waveform configs
+        def read_waveform_config(waveform_path, waveform_file_name, waveform_format):
+            parsed_waveforms.append(waveform_file_name)
+            return read_waveform_config_interface.read_waveform_config_file(
+                waveform_path, waveform_file_name, waveform_format
+            )
+
+        waveform_config_index = WaveformConfigIndex(index_file_path)
+        start_time = time.perf_counter()
+        num_waveforms = waveform_config_index.scan(waveforms_dir, read_waveform_config)
+        parse_time_s = time.perf_counter() - start_time
+        print("Indexed waveforms: ", num_waveforms)
+        assert num_waveforms > 0
+        assert len(parsed_waveforms) == num_waveforms
+        assert os.path.exists(index_file_path)
+
+        # a new index object reads the index file, no waveform config is parsed again
+        waveform_config_index = WaveformConfigIndex(index_file_path)
+        waveform_path = os.path.join(waveforms_dir, "nr")
+        waveform_file_name = "5GNR_FR1_DL_FDD_SISO_BW-10MHz_CC-1_SCS-30kHz_TM2"
+        start_time = time.perf_counter()
+        num_waveforms_lookup = waveform_config_index.scan(waveforms_dir, read_waveform_config)
+        lookup_time_s = time.perf_counter() - start_time
+        assert num_waveforms_lookup == num_waveforms
+        assert len(parsed_waveforms) == num_waveforms
+        print("Parsing time: ", round(parse_time_s, 3), "s, index lookup time: ", round(lookup_time_s, 3), "s")
+
+        for waveform_format, waveform_subdir, name in [
+            ("tdms", "nr", waveform_file_name),
+            ("tdms", "lte", "LTE_FDD_DL_10MHz_CC-1_E-UTRA_E-TM2"),
+            ("matlab", "radar", "Radar_Waveform_BW_2M"),
+            ("matlab_ieee", "wifi", "IEEE_tx11ac_legacy_20MHz_80MSps_MCS7_27bytes_1frame"),
+        ]:
+            waveform_config = waveform_config_index.get_waveform_config(
+                os.path.join(waveforms_dir, waveform_subdir), name, waveform_format, read_waveform_config
+            )
+            expected_waveform_config = read_waveform_config_interface.read_waveform_config_file(
+                os.path.join(waveforms_dir, waveform_subdir), name, waveform_format
+            )
+            check_same_waveform_config(waveform_config, expected_waveform_config)
+        assert len(parsed_waveforms) == num_waveforms
+
+        # a changed waveform config file is parsed again
+        changed_waveform_path = os.path.join(temp_dir, "nr")
+        shutil.copytree(waveform_path, changed_waveform_path)
+        waveform_config_index.get_waveform_config(
+            changed_waveform_path, waveform_file_name, "tdms", read_waveform_config
+        )
+        num_parsed = len(parsed_waveforms)
+        rfws_file_path = os.path.join(changed_waveform_path, waveform_file_name + ".rfws")
+        file_stat = os.stat(rfws_file_path)
+        os.utime(rfws_file_path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 1000000000))
+        waveform_config_index.get_waveform_config(
+            changed_waveform_path, waveform_file_name, "tdms", read_waveform_config
+        )
+        assert len(parsed_waveforms) == num_parsed + 1
+        waveform_config_index.get_waveform_config(
+            changed_waveform_path, waveform_file_name, "tdms", read_waveform_config
+        )
+        assert len(parsed_waveforms) == num_parsed + 1
+        waveform_config_index.print_stats()
+
+        # a changed parser module invalidates all entries, they are parsed again and the old entries are dropped
+        parser_files = []
+        for parser_file in waveform_config_index_module.WAVEFORM_CONFIG_PARSER_MODULES:
+            shutil.copy(parser_file, temp_dir)
+            parser_files.append(os.path.join(temp_dir, os.path.basename(parser_file)))
+        parser_index_file_path = os.path.join(temp_dir, "parser_waveform_config_index.json")
+        waveform_config_index = WaveformConfigIndex(parser_index_file_path, parser_files)
+        num_parsed = len(parsed_waveforms)
+        waveform_config_index.scan(waveforms_dir, read_waveform_config)
+        assert len(parsed_waveforms) == num_parsed + num_waveforms
+        WaveformConfigIndex(parser_index_file_path, parser_files).scan(waveforms_dir, read_waveform_config)
+        assert len(parsed_waveforms) == num_parsed + num_waveforms
+        with open(parser_files[0], "a") as file:
+            file.write("\n")
+        waveform_config_index = WaveformConfigIndex(parser_index_file_path, parser_files)
+        waveform_config_index.scan(waveforms_dir, read_waveform_config)
+        assert len(parsed_waveforms) == num_parsed + 2 * num_waveforms
+        assert len(waveform_config_index.entries) == num_waveforms
+
+        # default index file in the user cache folder
+        os.environ["XDG_CACHE_HOME"] = temp_dir
+        assert waveform_config_index_module.get_default_waveform_config_index_file().startswith(temp_dir)
+        assert not waveform_config_index_module.get_default_waveform_config_index_file().startswith(src_path)
+    finally:
+        shutil.rmtree(temp_dir)
+    print("Test passed")
@@ -0,0 +1,63 @@
+#
+# Copyright 2023 National Instruments Corporation
+#
+# SPDX-License-Identifier: MIT
+#
+"""
+Test - Wireless Link Parameter Map
+"""
+# Description:
+#   The wireless link parameter map is loaded once, compiled per waveform generator and loaded again only
+#   if the file is changed.
+#   The test checks that:
+#       -   the same compiled map is given as long as the file is not changed, and a new one after a change
+#       -   the parameter pairs keep the order of the map, one source parameter can give several SigMF parameters
+#       -   an incomplete parameter specification is reported
+#
+import os
+import sys
+import shutil
+import tempfile
+
+dir_path = os.path.dirname(__file__)
+src_path = os.path.split(dir_path)[0]
+sys.path.insert(0, src_path)
+
+from lib.wireless_link_parameter_map import get_wireless_link_parameter_map
+
+if __name__ == "__main__":
+    temp_dir = tempfile.mkdtemp()
+    try:
+        parameter_map_path = os.path.join(temp_dir, "wireless_link_parameter_map.yaml")
+        shutil.copyfile(os.path.join(src_path, "config", "wireless_link_parameter_map.yaml"), parameter_map_path)
+
+        parameter_map = get_wireless_link_parameter_map(parameter_map_path)
+        assert get_wireless_link_parameter_map(parameter_map_path) is parameter_map
+
+        # parameter pairs in map order, the bandwidth gives the bandwidth and the sample rate of 802.11
+        parameter_pairs = parameter_map.get_parameter_pairs("802.11_ieee_gen_matlab")
+        print("802.11 parameter pairs: ", [pair[:2] for pair in parameter_pairs])
+        assert parameter_pairs[0] == ("mods", "modulation", {"1": "bpsk", "2": "qpsk", "4": "16_qam", "6": "64_qam", "8": "256_qam"})
+        assert [pair[1] for pair in parameter_pairs if pair[0] == "BW_str"] == ["bandwidth", "sample_rate"]
+        assert parameter_map.get_parameter_pairs("802.11_ieee_gen_matlab") is parameter_pairs
+        assert set(parameter_map.get_rfws_generators()) == {"5gnr_ni_rfmx_rfws", "lte_ni_rfmx_rfws"}
+
+        # a changed file is loaded again
+        with open(parameter_map_path, "r") as file:
+            parameter_map_text = file.read()
+        with open(parameter_map_path, "w") as file:
+            file.write(parameter_map_text.replace("name: 'mcs'", "name: ''"))
+        file_stat = os.stat(parameter_map_path)
+        os.utime(parameter_map_path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 1000000000))
+        changed_parameter_map = get_wireless_link_parameter_map(parameter_map_path)
+        assert changed_parameter_map is not parameter_map
+
+        # the changed map has an incomplete parameter specification
+        try:
+            changed_parameter_map.get_parameter_pairs("802.11_ieee_gen_matlab")
+            raise AssertionError("Incomplete specification is not reported")
+        except Exception as error:
+            assert "Incomplete specification" in str(error)
+    finally:
+        shutil.rmtree(temp_dir)
+    print("Test passed")